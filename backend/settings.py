@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from components import config, BASE_DIR
 
@@ -94,6 +95,43 @@ else:
         }
     }
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+# Backend of the rendered payloads cache: locmem | file | database.
+# Use file or database to share the payloads between the workers, the database backend
+# needs `python3 manage.py createcachetable`. The file backend writes to the system temporary
+# directory unless SWITCHKEYS_CACHE_LOCATION is set, out of the source tree.
+SWITCHKEYS_CACHE_BACKEND = config("SWITCHKEYS_CACHE_BACKEND", default="locmem")
+SWITCHKEYS_CACHE_LOCATION = config(
+    "SWITCHKEYS_CACHE_LOCATION",
+    default=os.path.join(tempfile.gettempdir(), "switchkeys-cache"),
+)
+SWITCHKEYS_CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "switchkeys",
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": SWITCHKEYS_CACHE_LOCATION,
+    },
+    "database": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "switchkeys_cache",
+    },
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "switchkeys": {
+        **SWITCHKEYS_CACHE_BACKENDS[SWITCHKEYS_CACHE_BACKEND],
+        "TIMEOUT": config("SWITCHKEYS_CACHE_TIMEOUT", default=300, cast=int),
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -116,9 +154,15 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "switchkeys.api.renderers.MessagePackRenderer",
+    ],
     "DEFAULT_PARSER_CLASSES": [
         "rest_framework.parsers.JSONParser",
         "rest_framework.parsers.MultiPartParser",
+        "switchkeys.api.parsers.MessagePackParser",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
@@ -202,3 +246,68 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 APPEND_SLASH = True
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
+
+# SwitchKeys
+# Seconds between two heartbeats on an idle environment stream.
+SWITCHKEYS_STREAM_HEARTBEAT = config(
+    "SWITCHKEYS_STREAM_HEARTBEAT", default=15, cast=int
+)
+# Number of the last events kept per environment to resume a stream from its last event id.
+SWITCHKEYS_STREAM_BACKLOG = config("SWITCHKEYS_STREAM_BACKLOG", default=100, cast=int)
+# Size and time to live (seconds) of the process-local environment key cache. Other workers
+# see an environment change after at most the time to live.
+SWITCHKEYS_ENVIRONMENT_CACHE_SIZE = config(
+    "SWITCHKEYS_ENVIRONMENT_CACHE_SIZE", default=1024, cast=int
+)
+SWITCHKEYS_ENVIRONMENT_CACHE_TTL = config(
+    "SWITCHKEYS_ENVIRONMENT_CACHE_TTL", default=5, cast=float
+)
+# Maximum items of a bulk request, and the rows written by each bulk query.
+SWITCHKEYS_BULK_MAX_ITEMS = config("SWITCHKEYS_BULK_MAX_ITEMS", default=5000, cast=int)
+SWITCHKEYS_BULK_BATCH_SIZE = config(
+    "SWITCHKEYS_BULK_BATCH_SIZE", default=1000, cast=int
+)
+# Environments with more users than this get their new features assigned to the users in a
+# background thread, the progress is served by the feature fan-out endpoint.
+SWITCHKEYS_FAN_OUT_ASYNC_THRESHOLD = config(
+    "SWITCHKEYS_FAN_OUT_ASYNC_THRESHOLD", default=10000, cast=int
+)
+# Seconds without progress after which a background fan-out is reported as failed, its worker
+# thread is not resumed when the worker stops, `manage.py fan_out_feature` completes it.
+SWITCHKEYS_FAN_OUT_STALE_TIME = config(
+    "SWITCHKEYS_FAN_OUT_STALE_TIME", default=600, cast=int
+)
+# Days the deletions are kept for the clients syncing by revision, `manage.py prune_tombstones`
+# deletes the older ones, the clients syncing from before them need a full sync.
+SWITCHKEYS_TOMBSTONE_RETENTION_DAYS = config(
+    "SWITCHKEYS_TOMBSTONE_RETENTION_DAYS", default=30, cast=int
+)
+# How the user features are stored: "materialized" copies every environment feature to every
+# environment user, "sparse" only stores the user overrides and reads the environment value
+# for the others. Run `manage.py convert_user_features` when switching between them.
+SWITCHKEYS_FEATURE_STORAGE = config(
+    "SWITCHKEYS_FEATURE_STORAGE", default="materialized"
+)
+# Largest page a client can ask for with the `page_size` query param of the list endpoints
+# paged by `SwitchKeysCursorPagination`, the others keep the page numbers of `PAGE_SIZE`.
+SWITCHKEYS_MAX_PAGE_SIZE = config("SWITCHKEYS_MAX_PAGE_SIZE", default=1000, cast=int)
+# Number of environments whose compiled targeting rules are kept by each process. They are
+# compiled once per environment revision, the time to live only bounds the memory.
+SWITCHKEYS_RULES_CACHE_SIZE = config(
+    "SWITCHKEYS_RULES_CACHE_SIZE", default=256, cast=int
+)
+SWITCHKEYS_RULES_CACHE_TTL = config(
+    "SWITCHKEYS_RULES_CACHE_TTL", default=3600, cast=float
+)
+# Default and largest number of changes returned by a call to the change feed.
+SWITCHKEYS_CHANGE_FEED_LIMIT = config(
+    "SWITCHKEYS_CHANGE_FEED_LIMIT", default=1000, cast=int
+)
+SWITCHKEYS_CHANGE_FEED_MAX_LIMIT = config(
+    "SWITCHKEYS_CHANGE_FEED_MAX_LIMIT", default=10000, cast=int
+)
+# Seconds after which the change feed skips a change number never committed, the longest a write
+# transaction can take. The changes recorded after it are held back until then.
+SWITCHKEYS_CHANGE_FEED_SETTLE_TIME = config(
+    "SWITCHKEYS_CHANGE_FEED_SETTLE_TIME", default=60, cast=float
+)
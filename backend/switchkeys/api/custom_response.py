@@ -2,8 +2,10 @@ from typing import Any, List, Optional, Union
 from rest_framework.response import Response
 from rest_framework.status import (
     HTTP_200_OK,
+    HTTP_304_NOT_MODIFIED,
     HTTP_400_BAD_REQUEST,
     HTTP_404_NOT_FOUND,
+    HTTP_410_GONE,
     HTTP_401_UNAUTHORIZED,
 )
 
@@ -77,3 +79,18 @@ class CustomResponse:
             message = "You are not authorized to access this resource."
 
         return Response({"message": message}, status=status_code)
+
+    @staticmethod
+    def gone(
+        message: Optional[str] = None, status_code: int = HTTP_410_GONE
+    ) -> Response:
+        """gone response method, the requested resource is no longer available"""
+        if not message:
+            message = "The resource is no longer available."
+
+        return Response({"message": message}, status=status_code)
+
+    @staticmethod
+    def not_modified(etag: str) -> Response:
+        """not modified response method, the client cached representation is still valid"""
+        return Response(status=HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,116 @@
+from typing import Dict, Optional
+
+from rest_framework.request import Request
+
+# A parsed `?fields=`/`?expand=` value, e.g. `project.name,id` -> {"project": {"name": {}}, "id": {}}.
+SelectionTree = Dict[str, "SelectionTree"]
+
+
+def parse_selection(value: Optional[str]) -> Optional[SelectionTree]:
+    """Parse a comma separated list of dotted field paths, None when the param was not given."""
+    if value is None:
+        return None
+
+    tree: SelectionTree = {}
+    for path in value.split(","):
+        node = tree
+        for name in path.strip().split("."):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+class FieldSelection:
+    """
+    The fields and the nested relations a client asked for with the `?fields=` and `?expand=`
+    query params, nested fields and relations are given with dotted paths.
+
+    Attributes:
+        fields (SelectionTree | None): The rendered fields, all of them when None.
+        expand (SelectionTree | None): The embedded relations, all of them when None, the others
+            are rendered as their primary key(s).
+    """
+
+    fields_query_param = "fields"
+    expand_query_param = "expand"
+
+    def __init__(
+        self,
+        fields: Optional[SelectionTree] = None,
+        expand: Optional[SelectionTree] = None,
+    ):
+        self.fields = fields
+        self.expand = expand
+
+    @classmethod
+    def from_request(cls, request: Optional[Request]) -> "FieldSelection":
+        """Read the selection from the query params, everything is selected without a request."""
+        if request is None:
+            return cls()
+
+        return cls(
+            fields=parse_selection(request.query_params.get(cls.fields_query_param)),
+            expand=parse_selection(request.query_params.get(cls.expand_query_param)),
+        )
+
+    @property
+    def is_default(self) -> bool:
+        """Whether everything is selected, i.e. the documents can be served as they are cached."""
+        return self.fields is None and self.expand is None
+
+    def nested(self, name: str) -> "FieldSelection":
+        """Return the selection of the nested serializer of a field."""
+        fields = None
+        if self.fields is not None and self.fields.get(name):
+            fields = self.fields[name]
+
+        expand = None
+        if self.expand is not None:
+            expand = self.expand.get(name, {})
+
+        return FieldSelection(fields=fields, expand=expand)
+
+    def includes(self, path: str) -> bool:
+        """Whether the field of a dotted path is rendered, its parent relations are all expanded."""
+        *parents, name = path.split(".")
+        selection = self
+        for parent in parents:
+            if not selection.expands(parent):
+                return False
+            selection = selection.nested(parent)
+
+        return selection.fields is None or name in selection.fields
+
+    def expands(self, path: str) -> bool:
+        """Whether the relation of a dotted path is rendered and embedded."""
+        if not self.includes(path):
+            return False
+
+        *parents, name = path.split(".")
+        selection = self
+        for parent in parents:
+            selection = selection.nested(parent)
+
+        return selection.expand is None or name in selection.expand
+
+
+class DynamicFieldsMixin:
+    """
+    Render only the fields of the `FieldSelection` of the request, the nested serializers of the
+    unrequested fields never run. The selection is read from the `request` of the context, or
+    given with the `selection` argument to the nested serializers.
+
+    The methods serializing a relation check `self.selection.expands(name)`, and render its
+    primary key(s) instead of the nested serializer when it's not expanded.
+    """
+
+    def __init__(self, *args, selection: Optional[FieldSelection] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if selection is None:
+            selection = FieldSelection.from_request(self.context.get("request"))
+        self.selection = selection
+
+        # Keep every field of the serializers validating data.
+        if selection.fields is not None and not hasattr(self, "initial_data"):
+            for name in set(self.fields) - set(selection.fields):
+                self.fields.pop(name)
@@ -0,0 +1,67 @@
+from typing import Any, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import QuerySet
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+
+def estimate_count(queryset: QuerySet) -> int:
+    """
+    Return the number of rows of the queryset, estimated from the table statistics on PostgreSQL
+    when the queryset is the whole table, counted otherwise.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql" and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+
+        # -1 when the table has never been analyzed.
+        if row is not None and row[0] >= 0:
+            return row[0]
+
+    return queryset.count()
+
+
+class SwitchKeysCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the `created` index, every page is a single indexed range query
+    whatever its depth, instead of a `COUNT(*)` and an `OFFSET` scan. The list endpoints keep
+    the page numbers of the default paginator, the largest ones opt in with `pagination_class`.
+
+    ### Query params
+        - cursor (str): The opaque cursor of the `next` or `previous` link.
+        - page_size (int): The page size, up to `SWITCHKEYS_MAX_PAGE_SIZE`.
+        - total (bool): Add the `total` of the rows to the response, estimated on PostgreSQL.
+    """
+
+    ordering = ("-created", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = settings.SWITCHKEYS_MAX_PAGE_SIZE
+    total_query_param = "total"
+
+    def paginate_queryset(
+        self, queryset: QuerySet, request: Request, view: Any = None
+    ) -> Optional[List[Any]]:
+        self.total = None
+        if request.query_params.get(self.total_query_param, "").lower() == "true":
+            self.total = estimate_count(queryset)
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data: List[Any]) -> Response:
+        response = super().get_paginated_response(data)
+        if self.total is not None:
+            response.data["total"] = self.total
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema["properties"]["total"] = {"type": "integer", "example": 123}
+        return schema
@@ -0,0 +1,24 @@
+from typing import Any, Mapping, Optional
+
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class MessagePackParser(BaseParser):
+    """Parse the request bodies sent with `Content-Type: application/msgpack`."""
+
+    media_type = "application/msgpack"
+
+    def parse(
+        self,
+        stream: Any,
+        media_type: Optional[str] = None,
+        parser_context: Optional[Mapping[str, Any]] = None,
+    ) -> Any:
+        try:
+            return msgpack.unpackb(stream.read())
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError(
+                f"MessagePack parse error - {str(exc) or exc.__class__.__name__}"
+            )
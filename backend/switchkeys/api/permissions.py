@@ -1,8 +1,12 @@
+from django.views import View
 from rest_framework import permissions
 from rest_framework.request import Request
 from rest_framework.views import APIView
 
-from switchkeys.services.environments import get_environment_by_key
+from switchkeys.services.environments import (
+    aget_environment_by_key,
+    get_environment_by_key,
+)
 from switchkeys.models.users import UserType
 
 
@@ -44,3 +48,14 @@ class HasEnvironmentKey(permissions.BasePermission):
         env = get_environment_by_key(environment_key)
 
         return env is not None
+
+    async def ahas_permission(self, request: Request, view: View) -> bool:
+        """The async `has_permission`, checked by the `AsyncAPIView` views."""
+        environment_key = view.kwargs.get("environment_key")
+
+        if not environment_key:
+            return False
+
+        env = await aget_environment_by_key(environment_key)
+
+        return env is not None
@@ -0,0 +1,126 @@
+from typing import Any, Callable, List
+
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from switchkeys.api.fields import FieldSelection
+from switchkeys.api.parsers import MessagePackParser
+from switchkeys.api.renderers import MessagePackRenderer
+from switchkeys.utils.etags import environment_etag
+
+
+class AsyncAPIView(View):
+    """
+    Base of the async read views, serve them through `asgi.py` so the requests waiting on the
+    database or the cache don't hold a worker thread.
+
+    The handlers return the same `CustomResponse` as the DRF views, rendered with the renderer
+    negotiated from the `Accept` header. The permissions are checked with their async
+    `ahas_permission` method.
+    """
+
+    renderer_classes: List[type] = [JSONRenderer, MessagePackRenderer]
+    parser_classes: List[type] = [JSONParser, MessagePackParser]
+    permission_classes: List[type] = []
+
+    @classmethod
+    def as_view(cls, **initkwargs) -> Callable:
+        # The SDK calls are not authenticated by the session cookie, as for the DRF views.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        request = Request(request, parsers=[parser() for parser in self.parser_classes])
+        for permission in [permission() for permission in self.permission_classes]:
+            if not await permission.ahas_permission(request, self):
+                response = Response(
+                    {"detail": getattr(permission, "message", "Permission denied.")},
+                    status=403,
+                )
+                return self.finalize_response(request, response)
+
+        try:
+            response = await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            # e.g. the `ParseError` of a malformed body.
+            response = Response({"detail": exc.detail}, status=exc.status_code)
+
+        if not isinstance(response, Response):
+            # e.g. the `405 Method Not Allowed` and `OPTIONS` responses of Django.
+            return response
+        return self.finalize_response(request, response)
+
+    def finalize_response(self, request: Request, response: Response) -> HttpResponse:
+        """Render the DRF response into a plain `HttpResponse`."""
+        try:
+            renderer, media_type = self.negotiate(request)
+        except NotAcceptable as exc:
+            renderer, media_type = JSONRenderer(), JSONRenderer.media_type
+            response = Response({"detail": exc.detail}, status=exc.status_code)
+
+        content_type = media_type
+        if renderer.charset:
+            content_type = f"{media_type}; charset={renderer.charset}"
+
+        rendered = HttpResponse(
+            renderer.render(
+                response.data,
+                media_type,
+                {"request": request, "response": response, "view": self},
+            ),
+            status=response.status_code,
+            content_type=content_type,
+        )
+        for name, value in response.items():
+            if name != "Content-Type":
+                rendered[name] = value
+        # The representation, and its ETag, depend on the negotiated renderer.
+        patch_vary_headers(rendered, ("Accept",))
+        return rendered
+
+    def negotiate(self, request: Request) -> tuple[BaseRenderer, str]:
+        """Select the renderer of the `Accept` header, raise `NotAcceptable` if none matches."""
+        return DefaultContentNegotiation().select_renderer(
+            request, [renderer() for renderer in self.renderer_classes]
+        )
+
+    def get_etag(self, request: Request, revision: int) -> str:
+        """
+        Build the ETag of the representation of an environment revision asked by the request,
+        with its media type and its `?fields=` and `?expand=` selection.
+        """
+        try:
+            media_type = self.negotiate(request)[1]
+        except NotAcceptable:
+            # Answered with a `406 Not Acceptable` by `finalize_response`.
+            media_type = ""
+
+        return environment_etag(
+            revision,
+            media_type,
+            request.query_params.get(FieldSelection.fields_query_param, ""),
+            request.query_params.get(FieldSelection.expand_query_param, ""),
+        )
+
+
+def split_view_by_method(async_view: Callable, view: Callable) -> Callable:
+    """
+    Serve the GET requests of a path with the async view and the other methods with the DRF
+    view, the DRF view runs in a worker thread.
+    """
+    sync_view = sync_to_async(view)
+
+    async def dispatch(request: HttpRequest, *args, **kwargs) -> Any:
+        if request.method in ("GET", "HEAD"):
+            return await async_view(request, *args, **kwargs)
+        return await sync_view(request, *args, **kwargs)
+
+    return csrf_exempt(dispatch)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SwitchKeyssConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "switchkeys"
+
+    def ready(self):
+        # Connect the signal receivers.
+        from switchkeys import signals  # noqa: F401
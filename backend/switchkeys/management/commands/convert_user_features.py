@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from switchkeys.models.management import ProjectEnvironment
+from switchkeys.services.environments import (
+    FeatureStorage,
+    compact_users_features,
+    materialize_users_features,
+)
+from switchkeys.services.snapshots import invalidate_environment_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert the stored user features to the given storage. Converting to the sparse storage "
+        "deletes the user features holding the environment value, set "
+        "SWITCHKEYS_FEATURE_STORAGE=sparse first. Converting to the materialized storage gives "
+        "every environment user all the environment features, set "
+        "SWITCHKEYS_FEATURE_STORAGE=materialized after."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "storage", choices=[storage.value for storage in FeatureStorage]
+        )
+
+    def handle(self, *args, **options):
+        storage = FeatureStorage(options["storage"])
+
+        if storage == FeatureStorage.SPARSE:
+            count = compact_users_features()
+            self.stdout.write(f"{count} user features holding the default deleted.")
+        else:
+            count = 0
+            batch_size = settings.SWITCHKEYS_BULK_BATCH_SIZE
+            for environment in ProjectEnvironment.objects.order_by("id"):
+                users = list(environment.users.order_by("id"))
+                with transaction.atomic():
+                    for start in range(0, len(users), batch_size):
+                        end = start + batch_size
+                        count += materialize_users_features(
+                            environment, users[start:end], environment.revision
+                        )
+            self.stdout.write(f"{count} user features created.")
+
+        # The effective features are the same, the documents are rebuilt on the next read.
+        invalidate_environment_snapshots(ProjectEnvironment.objects.all())
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from switchkeys.services.environments import (
+    get_environment_by_key,
+    get_environment_feature,
+)
+from switchkeys.services.fanout import complete_fan_out
+
+
+class Command(BaseCommand):
+    help = (
+        "Give every environment user the environment feature, to complete a background fan-out "
+        "reported as failed, e.g. when its worker was stopped. The users who already got the "
+        "feature are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("environment_key")
+        parser.add_argument("feature")
+
+    def handle(self, *args, **options):
+        environment = get_environment_by_key(options["environment_key"])
+        if environment is None:
+            raise CommandError("The project environment does not exist.")
+
+        feature = get_environment_feature(options["feature"], environment)
+        if feature is None:
+            raise CommandError(
+                f"Feature '{options['feature']}' does not exist on the "
+                f"'{environment.name}' environment."
+            )
+
+        progress = complete_fan_out(environment, feature)
+        self.stdout.write(f"{progress['total']} users got the feature.")
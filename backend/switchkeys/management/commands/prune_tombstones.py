@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from switchkeys.services.deltas import prune_environment_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the environment deletions recorded for the clients syncing by revision once "
+        "they are older than the retention, run it periodically. The clients syncing from "
+        "before the pruned deletions are asked for a full sync."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.SWITCHKEYS_TOMBSTONE_RETENTION_DAYS,
+            help="The retention in days, SWITCHKEYS_TOMBSTONE_RETENTION_DAYS by default.",
+        )
+
+    def handle(self, *args, **options):
+        count = prune_environment_tombstones(
+            timezone.now() - timedelta(days=options["days"])
+        )
+        self.stdout.write(f"{count} tombstones deleted.")
@@ -0,0 +1,82 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from switchkeys.models.users import User
+from switchkeys.services.seeding import SEED_BATCH_SIZE, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset with bulk inserts, to reproduce a production scale locally: "
+        "organizations with their members, projects with their default environments, features, "
+        "and environment users with devices and user features on the first environment. Use "
+        "this command only in development mode."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--owner",
+            default=os.environ.get("DJANGO_SUPERUSER_EMAIL"),
+            help="The email of the organizations owner, DJANGO_SUPERUSER_EMAIL by default.",
+        )
+        parser.add_argument("--organizations", type=int, default=1)
+        parser.add_argument(
+            "--projects",
+            type=int,
+            default=1,
+            help="The projects of every organization.",
+        )
+        parser.add_argument(
+            "--members", type=int, default=5, help="The members of every organization."
+        )
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument(
+            "--features",
+            type=int,
+            default=200,
+            help="The features of every environment.",
+        )
+        parser.add_argument(
+            "--user-features",
+            type=int,
+            default=None,
+            help="The user features of every user, all the features by default, none with "
+            "the sparse storage.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="The same seed seeds the same values.",
+        )
+        parser.add_argument("--batch-size", type=int, default=SEED_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        owner = User.objects.filter(email=options["owner"]).first()
+        if owner is None:
+            raise CommandError(
+                f"The owner '{options['owner']}' does not exist, run `create_superuser` first."
+            )
+
+        started = time.perf_counter()
+        dataset = seed_dataset(
+            owner,
+            organizations=options["organizations"],
+            projects=options["projects"],
+            members=options["members"],
+            users=options["users"],
+            features=options["features"],
+            user_features=options["user_features"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+        )
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{len(dataset.organizations)} organizations, {len(dataset.projects)} projects, "
+            f"{len(dataset.environments)} environments and {len(dataset.users)} users "
+            f"seeded in {elapsed:.1f}s, the users are on the environment "
+            f"{dataset.environment.environment_key}."
+        )
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:53
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("switchkeys", "0008_alter_projectenvironmentuser_options_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EnvironmentSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("modified", models.DateTimeField(auto_now=True)),
+                (
+                    "document",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="Document",
+                    ),
+                ),
+                (
+                    "environment",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="snapshot",
+                        to="switchkeys.projectenvironment",
+                        verbose_name="Environment",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Environment Snapshot",
+                "verbose_name_plural": "Environment Snapshots",
+            },
+        ),
+    ]
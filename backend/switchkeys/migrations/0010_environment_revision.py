@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("switchkeys", "0009_environmentsnapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="environmentsnapshot",
+            name="revision",
+            field=models.PositiveBigIntegerField(
+                default=0,
+                help_text="The environment revision the document was built from.",
+                verbose_name="Revision",
+            ),
+        ),
+        migrations.AddField(
+            model_name="projectenvironment",
+            name="revision",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
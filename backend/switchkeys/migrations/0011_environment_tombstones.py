@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("switchkeys", "0010_environment_revision"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="switchkeysfeature",
+            name="revision",
+            field=models.PositiveBigIntegerField(
+                db_index=True, default=0, verbose_name="Revision"
+            ),
+        ),
+        migrations.AddField(
+            model_name="userfeature",
+            name="revision",
+            field=models.PositiveBigIntegerField(
+                db_index=True, default=0, verbose_name="Revision"
+            ),
+        ),
+        migrations.CreateModel(
+            name="EnvironmentTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("modified", models.DateTimeField(auto_now=True)),
+                (
+                    "revision",
+                    models.PositiveBigIntegerField(
+                        db_index=True, verbose_name="Revision"
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("Feature", "feature"),
+                            ("User", "user"),
+                            ("UserFeature", "user feature"),
+                        ],
+                        max_length=20,
+                        verbose_name="Kind",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(blank=True, max_length=50, verbose_name="Name"),
+                ),
+                (
+                    "username",
+                    models.CharField(
+                        blank=True, max_length=30, verbose_name="Username"
+                    ),
+                ),
+                (
+                    "environment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tombstones",
+                        to="switchkeys.projectenvironment",
+                        verbose_name="Environment",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Environment Tombstone",
+                "verbose_name_plural": "Environment Tombstones",
+            },
+        ),
+    ]
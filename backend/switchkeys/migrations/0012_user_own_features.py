@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def mark_user_own_features(apps, schema_editor):
+    """
+    The features created by setting a user feature that the environment doesn't have belong to
+    the user only, the sparse storage serves them next to the environment features.
+    """
+    SwitchKeysFeature = apps.get_model("switchkeys", "SwitchKeysFeature")
+    SwitchKeysFeature.objects.filter(environment_default_features__isnull=True).update(
+        is_default=False
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("switchkeys", "0011_environment_tombstones"),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_user_own_features, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+import uuid
+
+from django.db import migrations, models
+
+
+def backfill_environment_keys(apps, schema_editor):
+    """
+    Give a new key to the environments with a malformed key, or with a key already used by an
+    older environment, before the key becomes unique.
+    """
+    ProjectEnvironment = apps.get_model("switchkeys", "ProjectEnvironment")
+    table = schema_editor.quote_name(ProjectEnvironment._meta.db_table)
+
+    # Read the raw values, a malformed key can't be loaded through the model.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT id, environment_key FROM {table} ORDER BY id")
+        rows = cursor.fetchall()
+
+    seen = set()
+    for environment_id, environment_key in rows:
+        try:
+            environment_key = uuid.UUID(str(environment_key))
+        except ValueError:
+            environment_key = None
+
+        if environment_key is None or environment_key in seen:
+            environment_key = uuid.uuid4()
+            ProjectEnvironment.objects.filter(id=environment_id).update(
+                environment_key=environment_key
+            )
+        seen.add(environment_key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("switchkeys", "0012_user_own_features"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_environment_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="projectenvironment",
+            name="environment_key",
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_feature_environments(apps, schema_editor):
+    """
+    Set the environment of every environment feature from the `EnvironmentFeature.features`
+    relation. A name used twice on an environment gets the feature id appended, before the
+    name becomes unique per environment.
+    """
+    SwitchKeysFeature = apps.get_model("switchkeys", "SwitchKeysFeature")
+    EnvironmentFeature = apps.get_model("switchkeys", "EnvironmentFeature")
+
+    features = []
+    seen = set()
+    for feature_id, environment_id, name in (
+        EnvironmentFeature.features.through.objects.filter(
+            environmentfeature__environment__isnull=False
+        )
+        .order_by("switchkeysfeature_id")
+        .values_list(
+            "switchkeysfeature_id",
+            "environmentfeature__environment_id",
+            "switchkeysfeature__name",
+        )
+    ):
+        if (environment_id, name) in seen:
+            suffix = f"-{feature_id}"
+            name = name[: 50 - len(suffix)] + suffix
+        seen.add((environment_id, name))
+        features.append(
+            SwitchKeysFeature(id=feature_id, environment_id=environment_id, name=name)
+        )
+
+    SwitchKeysFeature.objects.bulk_update(
+        features, ["environment", "name"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("switchkeys", "0013_unique_environment_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="switchkeysfeature",
+            name="environment",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="features",
+                to="switchkeys.projectenvironment",
+                verbose_name="Environment",
+            ),
+        ),
+        migrations.RunPython(backfill_feature_environments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="switchkeysfeature",
+            constraint=models.UniqueConstraint(
+                fields=("environment", "name"), name="unique_environment_feature_name"
+            ),
+        ),
+    ]
@@ -0,0 +1,96 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def split_environment_users(apps, schema_editor):
+    """
+    Move every user to its environment. A user of many environments keeps its row for the first
+    one and gets a copy for each other one, with the overrides of the features of that
+    environment and a copy of its own features. Users of no environment are deleted.
+    """
+    ProjectEnvironment = apps.get_model("switchkeys", "ProjectEnvironment")
+    ProjectEnvironmentUser = apps.get_model("switchkeys", "ProjectEnvironmentUser")
+    UserFeature = apps.get_model("switchkeys", "UserFeature")
+
+    users = {user.id: user for user in ProjectEnvironmentUser.objects.all()}
+    memberships = ProjectEnvironment.users.through.objects.order_by(
+        "projectenvironmentuser_id", "projectenvironment_id"
+    ).values_list("projectenvironmentuser_id", "projectenvironment_id")
+
+    moved = []
+    for user_id, environment_id in memberships:
+        user = users[user_id]
+        if user.environment_id is None:
+            user.environment_id = environment_id
+            moved.append(user)
+            continue
+
+        copy = ProjectEnvironmentUser.objects.create(
+            environment_id=environment_id,
+            username=user.username,
+            device_id=user.device_id,
+            is_active=user.is_active,
+        )
+        UserFeature.objects.filter(
+            user_id=user_id, feature__environment_id=environment_id
+        ).update(user=copy)
+        UserFeature.objects.bulk_create(
+            UserFeature(
+                user=copy,
+                feature_id=user_feature.feature_id,
+                feature_value=user_feature.feature_value,
+                revision=user_feature.revision,
+            )
+            for user_feature in UserFeature.objects.filter(
+                user_id=user_id, feature__environment__isnull=True
+            )
+        )
+
+    ProjectEnvironmentUser.objects.bulk_update(moved, ["environment"], batch_size=1000)
+    ProjectEnvironmentUser.objects.filter(environment__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("switchkeys", "0014_feature_environment"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="projectenvironmentuser",
+            name="environment",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="switchkeys.projectenvironment",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="projectenvironmentuser",
+            name="username",
+            field=models.CharField(max_length=30),
+        ),
+        migrations.RunPython(split_environment_users, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="projectenvironment",
+            name="users",
+        ),
+        migrations.AlterField(
+            model_name="projectenvironmentuser",
+            name="environment",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="users",
+                to="switchkeys.projectenvironment",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="projectenvironmentuser",
+            constraint=models.UniqueConstraint(
+                fields=("environment", "username"),
+                name="unique_environment_user_username",
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:32
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("switchkeys", "0015_environment_users"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="switchkeysfeature",
+            name="rollout_percentage",
+            field=models.PositiveSmallIntegerField(
+                blank=True,
+                help_text="The percentage of the users getting the value, empty for all of them.",
+                null=True,
+                validators=[django.core.validators.MaxValueValidator(100)],
+                verbose_name="Rollout Percentage",
+            ),
+        ),
+    ]
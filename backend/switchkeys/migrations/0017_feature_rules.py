@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("switchkeys", "0016_feature_rollout_percentage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeatureRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("modified", models.DateTimeField(auto_now=True)),
+                (
+                    "device_type",
+                    models.CharField(
+                        blank=True,
+                        choices=[("IPhone", "iPhone"), ("Android", "Android")],
+                        max_length=20,
+                        verbose_name="Device Type",
+                    ),
+                ),
+                (
+                    "min_version",
+                    models.CharField(
+                        blank=True, max_length=100, verbose_name="Minimum Version"
+                    ),
+                ),
+                (
+                    "max_version",
+                    models.CharField(
+                        blank=True, max_length=100, verbose_name="Maximum Version"
+                    ),
+                ),
+                ("value", models.TextField(max_length=5000, verbose_name="Value")),
+                (
+                    "priority",
+                    models.PositiveIntegerField(default=0, verbose_name="Priority"),
+                ),
+                (
+                    "environment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rules",
+                        to="switchkeys.projectenvironment",
+                        verbose_name="Environment",
+                    ),
+                ),
+                (
+                    "feature",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rules",
+                        to="switchkeys.switchkeysfeature",
+                        verbose_name="Feature",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Feature Rule",
+                "verbose_name_plural": "Feature Rules",
+                "ordering": ("priority", "id"),
+            },
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("switchkeys", "0017_feature_rules"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GroupSegment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("modified", models.DateTimeField(auto_now=True)),
+                ("members", models.BinaryField(default=bytes, verbose_name="Members")),
+            ],
+            options={
+                "verbose_name": "Group Segment",
+                "verbose_name_plural": "Group Segments",
+            },
+        ),
+        migrations.AddField(
+            model_name="featurerule",
+            name="segment",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="rules",
+                to="switchkeys.organizationprojectgroup",
+                verbose_name="Segment",
+            ),
+        ),
+        migrations.AddField(
+            model_name="projectenvironment",
+            name="user_ordinals",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="projectenvironmentuser",
+            name="ordinal",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="projectenvironmentuser",
+            constraint=models.UniqueConstraint(
+                fields=("environment", "ordinal"),
+                name="unique_environment_user_ordinal",
+            ),
+        ),
+        migrations.AddField(
+            model_name="groupsegment",
+            name="environment",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="segments",
+                to="switchkeys.projectenvironment",
+                verbose_name="Environment",
+            ),
+        ),
+        migrations.AddField(
+            model_name="groupsegment",
+            name="group",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="segments",
+                to="switchkeys.organizationprojectgroup",
+                verbose_name="Group",
+            ),
+        ),
+        migrations.AddField(
+            model_name="groupsegment",
+            name="users",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="segments",
+                to="switchkeys.projectenvironmentuser",
+                verbose_name="Users",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="groupsegment",
+            constraint=models.UniqueConstraint(
+                fields=("group", "environment"), name="unique_group_segment"
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("switchkeys", "0018_group_segments"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeEvent",
+            fields=[
+                (
+                    "sequence",
+                    models.BigAutoField(
+                        primary_key=True, serialize=False, verbose_name="Sequence"
+                    ),
+                ),
+                ("event", models.CharField(max_length=50, verbose_name="Event")),
+                (
+                    "organization_id",
+                    models.PositiveBigIntegerField(
+                        null=True, verbose_name="Organization"
+                    ),
+                ),
+                (
+                    "project_id",
+                    models.PositiveBigIntegerField(null=True, verbose_name="Project"),
+                ),
+                (
+                    "environment_key",
+                    models.UUIDField(null=True, verbose_name="Environment Key"),
+                ),
+                ("data", models.JSONField(default=dict, verbose_name="Data")),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Change Event",
+                "verbose_name_plural": "Change Events",
+                "ordering": ("sequence",),
+                "indexes": [
+                    models.Index(
+                        fields=["organization_id", "sequence"],
+                        name="change_organization_seq_idx",
+                    ),
+                    models.Index(
+                        fields=["project_id", "sequence"], name="change_project_seq_idx"
+                    ),
+                    models.Index(
+                        fields=["environment_key", "sequence"],
+                        name="change_environment_seq_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:40
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_user_overrides(apps, schema_editor):
+    """
+    Mark the existing overrides, the user features that don't hold their environment value or
+    have their own feature. An override set to the environment value can't be told apart.
+    """
+    UserFeature = apps.get_model("switchkeys", "UserFeature")
+    UserFeature.objects.exclude(
+        feature__is_default=True, feature_value=F("feature__value")
+    ).update(is_override=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("switchkeys", "0019_change_events"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userfeature",
+            name="is_override",
+            field=models.BooleanField(
+                default=False,
+                help_text="If the value has been set on the user.",
+                verbose_name="Override",
+            ),
+        ),
+        migrations.RunPython(mark_user_overrides, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("switchkeys", "0020_user_feature_is_override"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="projectenvironment",
+            name="pruned_revision",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
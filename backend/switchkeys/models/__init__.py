@@ -1,3 +1,4 @@
 from .users import *
 from .management import *
 from .environments import *
+from .changes import *
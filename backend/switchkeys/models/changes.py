@@ -0,0 +1,60 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class ChangeEvent(models.Model):
+    """
+    Model recording a change on an organization, a project or an environment, written in the
+    same transaction as the change itself. The events are never updated nor deleted, and are
+    read in their sequence order by the change feed.
+
+    The sequence is allocated by the database on insert, without any lock, so it follows the
+    insert order and not always the commit order. The feed holds back the events following a
+    sequence not committed yet, see `services/changes.py`.
+
+    The changed objects are kept by their ids, not as foreign keys, so the events outlive them.
+
+    ### Attributes:
+        - sequence (`int`): The position of the event in the feed, its primary key.
+        - event (`str`): The event name, e.g. `feature.updated`.
+        - organization_id (`int`): The id of the changed organization, or of its owner.
+        - project_id (`int`): The id of the changed project, or of its owner.
+        - environment_key (`UUID`): The key of the changed environment.
+        - data (`dict`): The compact event payload.
+        - created (`datetime`): When the event has been recorded.
+    """
+
+    sequence = models.BigAutoField(_("Sequence"), primary_key=True)
+    event = models.CharField(_("Event"), max_length=50)
+    organization_id = models.PositiveBigIntegerField(_("Organization"), null=True)
+    project_id = models.PositiveBigIntegerField(_("Project"), null=True)
+    environment_key = models.UUIDField(_("Environment Key"), null=True)
+    data = models.JSONField(_("Data"), default=dict)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        """
+        - Returns a string representation of the change event.
+
+        - Format: `{self.sequence}` | `{self.event}`
+        """
+        return f"{self.sequence} | {self.event}"
+
+    class Meta:
+        verbose_name = _("Change Event")
+        verbose_name_plural = _("Change Events")
+        ordering = ("sequence",)
+        indexes = [
+            # The feed filtered by an organization, a project or an environment.
+            models.Index(
+                fields=["organization_id", "sequence"],
+                name="change_organization_seq_idx",
+            ),
+            models.Index(
+                fields=["project_id", "sequence"], name="change_project_seq_idx"
+            ),
+            models.Index(
+                fields=["environment_key", "sequence"],
+                name="change_environment_seq_idx",
+            ),
+        ]
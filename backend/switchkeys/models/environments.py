@@ -1,11 +1,19 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import MaxValueValidator
 from django.db import models
 
-from switchkeys.models.users import ProjectEnvironmentUser
+from switchkeys.models.users import DeviceType, ProjectEnvironmentUser
 from switchkeys.models.abstracts import TimeStampedModel
-from switchkeys.models.management import ProjectEnvironment
+from switchkeys.models.management import OrganizationProjectGroup, ProjectEnvironment
 from django.utils.translation import gettext_lazy as _
 
 
+class TombstoneType(models.TextChoices):
+    FEATURE = "Feature", "feature"
+    USER = "User", "user"
+    USER_FEATURE = "UserFeature", "user feature"
+
+
 class SwitchKeysFeature(TimeStampedModel):
     """
     Model representing a feature in the SwitchKeys system.
@@ -18,16 +26,45 @@ class SwitchKeysFeature(TimeStampedModel):
         - value (`str`): The current value of the feature.
         - initial_value (`str`): The initial value of the feature.
         - is_default (`str`): if the feature is default feature.
+        - revision (`int`): The environment revision of the last change on the feature.
+        - rollout_percentage (`int`): The percentage of the users getting the value, the others
+          get the initial value. Every user gets the value when empty, see `utils/rollouts.py`.
+        - environment (`ProjectEnvironment`): The environment of the feature, empty for the
+          features set on a user only. A name is unique per environment.
     """
 
+    environment = models.ForeignKey(
+        ProjectEnvironment,
+        verbose_name=_("Environment"),
+        related_name="features",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+    )
     name = models.CharField(_("Name"), max_length=50)
     value = models.TextField(_("Value"), max_length=5000)
     initial_value = models.TextField(_("Initial Value"), max_length=5000)
     is_default = models.BooleanField(default=True)
+    revision = models.PositiveBigIntegerField(_("Revision"), default=0, db_index=True)
+    rollout_percentage = models.PositiveSmallIntegerField(
+        _("Rollout Percentage"),
+        null=True,
+        blank=True,
+        validators=[MaxValueValidator(100)],
+        help_text=_(
+            "The percentage of the users getting the value, empty for all of them."
+        ),
+    )
 
     class Meta:
         verbose_name = _("SwitchKeys Feature")
         verbose_name_plural = _("SwitchKeys Features")
+        constraints = [
+            # Also the index of the feature lookups by environment and name.
+            models.UniqueConstraint(
+                fields=["environment", "name"], name="unique_environment_feature_name"
+            ),
+        ]
 
     def __str__(self) -> str:
         """
@@ -38,6 +75,130 @@ class SwitchKeysFeature(TimeStampedModel):
         return f"{self.name}"
 
 
+class FeatureRuleManager(models.Manager):
+    """Load the feature with the rules, the rules are served with their feature name."""
+
+    def get_queryset(self) -> models.QuerySet:
+        return super().get_queryset().select_related("feature")
+
+
+class FeatureRule(TimeStampedModel):
+    """
+    Model representing a targeting rule of an environment feature, giving a value to the users
+    of a device type and a range of versions.
+
+    The rules of an environment are compiled once per environment revision, see
+    `utils/rules.py`. The first matching rule of a feature, by priority, gives its value.
+
+    ### Attributes:
+        - environment (`ProjectEnvironment`): The environment of the feature.
+        - feature (`SwitchKeysFeature`): The targeted feature.
+        - device_type (`DeviceType`): The device type of the targeted users, any when empty.
+        - min_version (`str`): The lowest targeted device version, inclusive, any when empty.
+        - max_version (`str`): The highest targeted device version, exclusive, any when empty.
+        - segment (`OrganizationProjectGroup`): The group whose segment members are targeted,
+          any user when empty.
+        - value (`str`): The value of the feature for the targeted users.
+        - priority (`int`): The rules of a feature are evaluated by ascending priority.
+    """
+
+    environment = models.ForeignKey(
+        ProjectEnvironment,
+        verbose_name=_("Environment"),
+        related_name="rules",
+        on_delete=models.CASCADE,
+    )
+    feature = models.ForeignKey(
+        SwitchKeysFeature,
+        verbose_name=_("Feature"),
+        related_name="rules",
+        on_delete=models.CASCADE,
+    )
+    device_type = models.CharField(
+        _("Device Type"), max_length=20, choices=DeviceType.choices, blank=True
+    )
+    min_version = models.CharField(_("Minimum Version"), max_length=100, blank=True)
+    max_version = models.CharField(_("Maximum Version"), max_length=100, blank=True)
+    segment = models.ForeignKey(
+        OrganizationProjectGroup,
+        verbose_name=_("Segment"),
+        related_name="rules",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+    )
+    value = models.TextField(_("Value"), max_length=5000)
+    priority = models.PositiveIntegerField(_("Priority"), default=0)
+
+    objects = FeatureRuleManager()
+
+    def __str__(self) -> str:
+        """
+        - Returns a string representation of the feature rule.
+
+        - Format: `{feature_name}` | `{device_type}` | `{min_version}` | `{max_version}`
+        """
+        return f"{self.feature.name} | {self.device_type} | {self.min_version} | {self.max_version}"
+
+    class Meta:
+        verbose_name = _("Feature Rule")
+        verbose_name_plural = _("Feature Rules")
+        ordering = ("priority", "id")
+
+
+class GroupSegment(TimeStampedModel):
+    """
+    Model representing the members of a project group on an environment, the group targets them
+    as a segment with the feature rules.
+
+    The members are indexed by a bitmap of their user ordinals, updated on every membership
+    change, so checking a user membership is a single bit test, see `utils/bitmaps.py`.
+
+    ### Attributes:
+        - group (`OrganizationProjectGroup`): The group of the segment.
+        - environment (`ProjectEnvironment`): The environment of the members.
+        - users (`ManyToManyField`): The members of the segment.
+        - members (`bytes`): The bitmap of the members ordinals.
+    """
+
+    group = models.ForeignKey(
+        OrganizationProjectGroup,
+        verbose_name=_("Group"),
+        related_name="segments",
+        on_delete=models.CASCADE,
+    )
+    environment = models.ForeignKey(
+        ProjectEnvironment,
+        verbose_name=_("Environment"),
+        related_name="segments",
+        on_delete=models.CASCADE,
+    )
+    users = models.ManyToManyField(
+        ProjectEnvironmentUser,
+        verbose_name=_("Users"),
+        related_name="segments",
+        blank=True,
+    )
+    members = models.BinaryField(_("Members"), default=bytes)
+
+    def __str__(self) -> str:
+        """
+        - Returns a string representation of the group segment.
+
+        - Format: `{self.group.name}` | `{self.environment.name}`
+        """
+        return f"{self.group.name} | {self.environment.name}"
+
+    class Meta:
+        verbose_name = _("Group Segment")
+        verbose_name_plural = _("Group Segments")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["group", "environment"], name="unique_group_segment"
+            ),
+        ]
+
+
 class EnvironmentFeature(TimeStampedModel):
     """
     Model representing features associated with a project environment in the SwitchKeys system.
@@ -86,6 +247,9 @@ class UserFeature(TimeStampedModel):
         - user (ProjectEnvironmentUser): The user associated with the features.
         - feature (SwitchKeysFeature): The feature associated with the user.
         - feature_value (TextField): The value of the feature associated with the user.
+        - is_override (bool): If the value has been set on the user, the others follow the
+          environment feature.
+        - revision (int): The environment revision of the last change on the user feature.
     """
 
     user = models.ForeignKey(
@@ -108,6 +272,14 @@ class UserFeature(TimeStampedModel):
         help_text=_("The value of the feature associated with the user."),
     )
 
+    is_override = models.BooleanField(
+        _("Override"),
+        default=False,
+        help_text=_("If the value has been set on the user."),
+    )
+
+    revision = models.PositiveBigIntegerField(_("Revision"), default=0, db_index=True)
+
     def __str__(self) -> str:
         """
         - Returns a string representation of the user feature.
@@ -120,3 +292,82 @@ class UserFeature(TimeStampedModel):
         verbose_name = _("User Feature")
         verbose_name_plural = _("User Features")
         unique_together = ("user", "feature")
+
+
+class EnvironmentSnapshot(TimeStampedModel):
+    """
+    Model holding a precomputed, ready-to-serve document of a project environment.
+
+    The document is the rendered output of `ProjectEnvironmentSerializer`, it's regenerated
+    on every write that touches the environment features, user overrides or membership so the
+    SDK read path becomes a single row fetch.
+
+    ### Attributes:
+        - environment (`ProjectEnvironment`): The project environment the snapshot belongs to.
+        - document (`JSONField`): The serialized environment.
+        - revision (`int`): The environment revision the document was built from.
+    """
+
+    environment = models.OneToOneField(
+        ProjectEnvironment,
+        verbose_name=_("Environment"),
+        related_name="snapshot",
+        on_delete=models.CASCADE,
+    )
+
+    document = models.JSONField(_("Document"), encoder=DjangoJSONEncoder)
+    revision = models.PositiveBigIntegerField(
+        _("Revision"),
+        default=0,
+        help_text=_("The environment revision the document was built from."),
+    )
+
+    def __str__(self) -> str:
+        """
+        - Returns a string representation of the environment snapshot.
+
+        - Format: `{self.environment.name}` | `{self.modified}`
+        """
+        return f"{self.environment.name} | {self.modified}"
+
+    class Meta:
+        verbose_name = _("Environment Snapshot")
+        verbose_name_plural = _("Environment Snapshots")
+
+
+class EnvironmentTombstone(TimeStampedModel):
+    """
+    Model recording a deletion on a project environment, so the clients syncing the environment
+    by revision know what to drop from their local copy.
+
+    ### Attributes:
+        - environment (`ProjectEnvironment`): The project environment where the deletion happened.
+        - revision (`int`): The environment revision of the deletion.
+        - kind (`TombstoneType`): What has been deleted, a feature, a user or a user feature.
+        - name (`str`): The deleted feature name, empty when a user is removed.
+        - username (`str`): The username of the deleted user or user feature, empty when an environment feature is deleted.
+    """
+
+    environment = models.ForeignKey(
+        ProjectEnvironment,
+        verbose_name=_("Environment"),
+        related_name="tombstones",
+        on_delete=models.CASCADE,
+    )
+
+    revision = models.PositiveBigIntegerField(_("Revision"), db_index=True)
+    kind = models.CharField(_("Kind"), max_length=20, choices=TombstoneType.choices)
+    name = models.CharField(_("Name"), max_length=50, blank=True)
+    username = models.CharField(_("Username"), max_length=30, blank=True)
+
+    def __str__(self) -> str:
+        """
+        - Returns a string representation of the environment tombstone.
+
+        - Format: `{self.kind}` | `{self.username}` | `{self.name}` | `{self.revision}`
+        """
+        return f"{self.kind} | {self.username} | {self.name} | {self.revision}"
+
+    class Meta:
+        verbose_name = _("Environment Tombstone")
+        verbose_name_plural = _("Environment Tombstones")
@@ -1,5 +1,5 @@
 from django.db import models
-from switchkeys.models.users import ProjectEnvironmentUser, User
+from switchkeys.models.users import User
 from switchkeys.models.abstracts import TimeStampedModel
 import uuid
 
@@ -81,10 +81,15 @@ class ProjectEnvironment(TimeStampedModel):
         null=True,
     )
     name = models.CharField(max_length=50)
-    environment_key = models.UUIDField(default=uuid.uuid4, editable=False)
-    users = models.ManyToManyField(
-        ProjectEnvironmentUser, related_name="environment_users", blank=True
-    )
+    # Resolved on every SDK request, unique so the lookup is a single index seek.
+    environment_key = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
+    # Bumped by every write on the environment, used for the ETags of the SDK endpoints.
+    revision = models.PositiveBigIntegerField(default=0)
+    # The number of user ordinals given on the environment, the next user gets this one.
+    user_ordinals = models.PositiveIntegerField(default=0)
+    # The tombstones up to this revision were pruned, the clients syncing from an older
+    # revision can't get their deletions and have to sync the whole environment again.
+    pruned_revision = models.PositiveBigIntegerField(default=0)
 
     def __str__(self):
         return f"{self.name} | {self.project.name}"
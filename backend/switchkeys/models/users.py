@@ -87,11 +87,18 @@ class User(AbstractBaseUser, TimeStampedModel):
 
 
 class ProjectEnvironmentUser(TimeStampedModel):
-    username = models.CharField(unique=True, max_length=30)
+    # A user belongs to one environment, the same username can be used by other environments.
+    environment = models.ForeignKey(
+        "ProjectEnvironment", related_name="users", on_delete=models.CASCADE
+    )
+    username = models.CharField(max_length=30)
     device = models.ForeignKey(
         "UserDevice", on_delete=models.SET_NULL, null=True, related_name="user_device"
     )
     is_active = models.BooleanField(default=True)
+    # The dense number of the user in the segment bitmaps of its environment, given when the
+    # user joins its first segment.
+    ordinal = models.PositiveIntegerField(null=True, blank=True)
 
     def __str__(self) -> str:
         return f"{self.username}"
@@ -99,6 +106,17 @@ class ProjectEnvironmentUser(TimeStampedModel):
     class Meta:
         verbose_name = "Environment User"
         verbose_name_plural = "Environment Users"
+        constraints = [
+            # Also the index resolving a user and its membership in one lookup.
+            models.UniqueConstraint(
+                fields=["environment", "username"],
+                name="unique_environment_user_username",
+            ),
+            models.UniqueConstraint(
+                fields=["environment", "ordinal"],
+                name="unique_environment_user_ordinal",
+            ),
+        ]
 
 
 class UserDevice(TimeStampedModel):
@@ -1,19 +1,34 @@
+from django.conf import settings
 from rest_framework.serializers import (
     Serializer,
     ModelSerializer,
     SerializerMethodField,
     IntegerField,
     CharField,
+    ListField,
+    RegexField,
+    PrimaryKeyRelatedField,
 )
 
+from switchkeys.api.fields import DynamicFieldsMixin
 from switchkeys.models.users import ProjectEnvironmentUser
 from switchkeys.serializers.users import ProjectEnvironmentUserSerializer
-from switchkeys.models.management import ProjectEnvironment
+from switchkeys.models.management import (
+    OrganizationProjectGroup,
+    ProjectEnvironment,
+)
 from switchkeys.models.environments import (
     EnvironmentFeature,
+    FeatureRule,
     SwitchKeysFeature,
     UserFeature,
 )
+from switchkeys.services.environments import (
+    get_environment_features,
+    get_user_feature_as_feature,
+    is_sparse_feature_storage,
+    resolve_user_features,
+)
 
 
 class EnvironmentUserDeviceSerializer(Serializer):
@@ -25,7 +40,7 @@ class EnvironmentUserDeviceSerializer(Serializer):
     device_type = CharField()
 
 
-class ProjectEnvironmentSerializer(ModelSerializer):
+class ProjectEnvironmentSerializer(DynamicFieldsMixin, ModelSerializer):
     """
     Serializer for Organization project environment.
     """
@@ -34,6 +49,8 @@ class ProjectEnvironmentSerializer(ModelSerializer):
     project_id = IntegerField(write_only=True)  # Used to know which project
     users = SerializerMethodField()
     features = SerializerMethodField()
+    rules = SerializerMethodField()
+    segments = SerializerMethodField()
 
     class Meta:
         model = ProjectEnvironment
@@ -44,6 +61,8 @@ class ProjectEnvironmentSerializer(ModelSerializer):
             "modified",
             "environment_key",
             "features",
+            "rules",
+            "segments",
             "project",
             "project_id",
             "users",
@@ -57,38 +76,91 @@ class ProjectEnvironmentSerializer(ModelSerializer):
         """
         from switchkeys.serializers.projects import OrganizationProjectSerializer
 
-        return OrganizationProjectSerializer(obj.project).data
+        if not self.selection.expands("project"):
+            return obj.project_id
+
+        return OrganizationProjectSerializer(
+            obj.project, selection=self.selection.nested("project")
+        ).data
 
     def get_users(self, obj: ProjectEnvironment):
         """
         Retrieve serialized user data associated with the environment.
         """
-        return ProjectEnvironmentUserSerializer(obj.users, many=True).data
+        if not self.selection.expands("users"):
+            return [user.id for user in obj.users.all()]
+
+        from switchkeys.services.rules import get_compiled_rules
+
+        context = dict(self.context)
+        context["rules"] = get_compiled_rules(obj)
+        if is_sparse_feature_storage():
+            # The users without an override read the environment values.
+            context["environment_features"] = self.get_environment_features(obj)
+
+        return ProjectEnvironmentUserSerializer(
+            obj.users.all(),
+            many=True,
+            context=context,
+            selection=self.selection.nested("users"),
+        ).data
 
     def get_features(self, obj: ProjectEnvironment):
         """
         Retrieve serialized features associated with the environment.
         """
-        features = EnvironmentFeature.objects.filter(environment=obj)
-        serialized_features = []
+        features = self.get_environment_features(obj)
+        if not self.selection.expands("features"):
+            return [feature.id for feature in features]
 
-        for feature in features:
-            serialized_features.extend(
-                SwitchKeysFeatureSerializer(feature.features.all(), many=True).data
-            )
+        return SwitchKeysFeatureSerializer(
+            features, many=True, selection=self.selection.nested("features")
+        ).data
+
+    def get_rules(self, obj: ProjectEnvironment):
+        """
+        Retrieve the targeting rules of the environment, the clients evaluate them locally.
+        """
+        from switchkeys.services.rules import get_compiled_rules
+
+        return get_compiled_rules(obj).rules
+
+    def get_segments(self, obj: ProjectEnvironment):
+        """
+        Retrieve the members bitmaps of the segments targeted by the rules, by group id.
+        """
+        from switchkeys.services.rules import get_compiled_rules, serialize_segments
+
+        return serialize_segments(get_compiled_rules(obj))
+
+    def get_environment_features(self, obj: ProjectEnvironment):
+        """
+        Retrieve the features of the environment, prefetched when serializing a whole environment.
+        """
+        try:
+            environment_features = obj.feature_environment
+        except EnvironmentFeature.DoesNotExist:
+            return []
 
-        return serialized_features
+        return environment_features.features.all()
 
 
-class SwitchKeysFeatureSerializer(ModelSerializer):
+class SwitchKeysFeatureSerializer(DynamicFieldsMixin, ModelSerializer):
     """
     Serializer for environment features.
     """
 
+    # The clients evaluating the targeting rules locally don't apply them to the overrides.
+    is_override = SerializerMethodField()
+
     class Meta:
         fields = "__all__"
         model = SwitchKeysFeature
 
+    def get_is_override(self, obj: SwitchKeysFeature):
+        # Only set on the features of a user, see `get_user_feature_as_feature`.
+        return getattr(obj, "is_override", False)
+
 
 class AddEnvironmentUserSerializer(Serializer):
     """
@@ -115,7 +187,9 @@ class AddEnvironmentUserSerializer(Serializer):
         """
         # If the user object is not an instance, retrieve it by username
         if not isinstance(user, ProjectEnvironmentUser):
-            user = ProjectEnvironmentUser.objects.get(username=user.get("username"))
+            user = ProjectEnvironmentUser.objects.get(
+                environment=self.context["environment"], username=user.get("username")
+            )
         return user.id
 
     def get_features(self, user: ProjectEnvironmentUser):
@@ -124,24 +198,48 @@ class AddEnvironmentUserSerializer(Serializer):
         """
         # If the user object is not an instance, retrieve it by username
         if not isinstance(user, ProjectEnvironmentUser):
-            user = ProjectEnvironmentUser.objects.get(username=user.get("username"))
+            user = ProjectEnvironmentUser.objects.get(
+                environment=self.context["environment"], username=user.get("username")
+            )
 
-        # Fetch user features and their corresponding feature values
-        user_features = UserFeature.objects.filter(user=user)
-        user_features_data = {
-            feature.feature.id: feature.feature_value for feature in user_features
-        }
+        # Fetch user features with their features, the environment features are only read
+        # with the sparse storage.
+        from switchkeys.services.rules import get_compiled_rules
 
-        # Fetch SwitchKeysFeature objects based on user features
-        features = SwitchKeysFeature.objects.filter(id__in=user_features_data.keys())
+        user_features = UserFeature.objects.filter(user=user).select_related("feature")
+        environment_features = get_environment_features(self.context["environment"])
+        rules = get_compiled_rules(self.context["environment"])
 
         # Replace the feature value with the user feature value
-        for feature in features:
-            feature.value = user_features_data.get(feature.id)
+        features = [
+            get_user_feature_as_feature(user_feature)
+            for user_feature in resolve_user_features(
+                user, environment_features, user_features, rules
+            )
+        ]
 
         return SwitchKeysFeatureSerializer(features, many=True).data
 
 
+class EnvironmentUserSerializer(Serializer):
+    """
+    Serializer for a user of a bulk add.
+    """
+
+    username = CharField()
+    device = EnvironmentUserDeviceSerializer()
+
+
+class AddEnvironmentUsersSerializer(Serializer):
+    """
+    Serializer to add many users to an environment.
+    """
+
+    users = EnvironmentUserSerializer(
+        many=True, allow_empty=False, max_length=settings.SWITCHKEYS_BULK_MAX_ITEMS
+    )
+
+
 class RemoveEnvironmentUserSerializer(Serializer):
     """
     Serializer to remove user from an environment.
@@ -150,7 +248,7 @@ class RemoveEnvironmentUserSerializer(Serializer):
     username = CharField()
 
 
-class EnvironmentFeatureSerialize(ModelSerializer):
+class EnvironmentFeatureSerialize(DynamicFieldsMixin, ModelSerializer):
     """
     Serializer for Organization project environment features.
     """
@@ -186,7 +284,12 @@ class EnvironmentFeatureSerialize(ModelSerializer):
         """
         Retrieve serialized features associated with the environment.
         """
-        return SwitchKeysFeatureSerializer(obj.features.all(), many=True).data
+        if not self.selection.expands("features"):
+            return [feature.id for feature in obj.features.all()]
+
+        return SwitchKeysFeatureSerializer(
+            obj.features.all(), many=True, selection=self.selection.nested("features")
+        ).data
 
 
 class EnvironmentFeatureSerializer(Serializer):
@@ -196,15 +299,88 @@ class EnvironmentFeatureSerializer(Serializer):
 
     name = CharField(write_only=True)
     value = CharField(write_only=True)
+    rollout_percentage = IntegerField(
+        write_only=True, required=False, allow_null=True, min_value=0, max_value=100
+    )
+
+
+class FeatureRuleSerializer(ModelSerializer):
+    """
+    Serializer for a targeting rule of an environment feature.
+    """
+
+    feature = CharField(source="feature.name", read_only=True)
+    segment = PrimaryKeyRelatedField(
+        queryset=OrganizationProjectGroup.objects.all(),
+        required=False,
+        allow_null=True,
+    )
+    min_version = RegexField(
+        r"^\d+(\.\d+)*$", max_length=100, required=False, allow_blank=True
+    )
+    max_version = RegexField(
+        r"^\d+(\.\d+)*$", max_length=100, required=False, allow_blank=True
+    )
+
+    class Meta:
+        model = FeatureRule
+        fields = [
+            "id",
+            "feature",
+            "device_type",
+            "min_version",
+            "max_version",
+            "segment",
+            "value",
+            "priority",
+        ]
+        read_only_fields = ("id", "feature")
+
+
+class UserFeatureValueSerializer(Serializer):
+    """
+    Serializer for a user feature value of a bulk set.
+    """
+
+    username = CharField()
+    name = CharField()
+    value = CharField()
+
+
+class SetEnvironmentUsersFeaturesSerializer(Serializer):
+    """
+    Serializer to set many user features on an environment.
+    """
+
+    features = UserFeatureValueSerializer(
+        many=True, allow_empty=False, max_length=settings.SWITCHKEYS_BULK_MAX_ITEMS
+    )
+
+
+class EvaluateEnvironmentUsersSerializer(Serializer):
+    """
+    Serializer to get the features of many users of an environment.
+    """
+
+    usernames = ListField(
+        child=CharField(),
+        allow_empty=False,
+        max_length=settings.SWITCHKEYS_BULK_MAX_ITEMS,
+    )
 
 
-class UserFeatureSerializers(ModelSerializer):
+class UserFeatureSerializers(DynamicFieldsMixin, ModelSerializer):
     """
     Serializer to get user features.
     """
 
     name = SerializerMethodField()
     value = SerializerMethodField()
+    # The clients evaluating the targeting rules locally apply the rollout to the rule values.
+    initial_value = CharField(source="feature.initial_value", read_only=True)
+    rollout_percentage = IntegerField(
+        source="feature.rollout_percentage", read_only=True
+    )
 
     class Meta:
         model = UserFeature
@@ -212,6 +388,9 @@ class UserFeatureSerializers(ModelSerializer):
             "id",
             "name",
             "value",
+            "initial_value",
+            "rollout_percentage",
+            "is_override",
             "created",
             "modified",
         ]
@@ -220,4 +399,5 @@ class UserFeatureSerializers(ModelSerializer):
         return obj.feature.name
 
     def get_value(self, obj: UserFeature):
+        # Resolved by `resolve_user_features`, with the rules and the rollout of the feature.
         return obj.feature_value
@@ -1,9 +1,18 @@
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import (
+    CharField,
+    ListField,
+    ModelSerializer,
+    Serializer,
+    SerializerMethodField,
+)
 
+from switchkeys.api.fields import DynamicFieldsMixin
+from switchkeys.models.environments import GroupSegment
 from switchkeys.models.management import OrganizationProjectGroup
+from switchkeys.utils.bitmaps import Bitmap
 
 
-class OrganizationProjectGroupSerializer(ModelSerializer):
+class OrganizationProjectGroupSerializer(DynamicFieldsMixin, ModelSerializer):
     """
     ``Serializer`` for ``Organization project group`` .
     """
@@ -12,3 +21,35 @@ class OrganizationProjectGroupSerializer(ModelSerializer):
         model = OrganizationProjectGroup
         fields = ("id", "name", "created", "modified", "project", "members")
         read_only_fields = ("id", "created", "modified")
+
+
+class GroupSegmentSerializer(ModelSerializer):
+    """
+    ``Serializer`` for the ``segment`` of a group on an environment.
+    """
+
+    environment = CharField(source="environment.environment_key", read_only=True)
+    users = SerializerMethodField()
+    members = SerializerMethodField()
+
+    class Meta:
+        model = GroupSegment
+        fields = ("id", "group", "environment", "users", "members", "modified")
+        read_only_fields = fields
+
+    def get_users(self, obj: GroupSegment) -> int:
+        """The number of members of the segment."""
+        return len(Bitmap(obj.members))
+
+    def get_members(self, obj: GroupSegment) -> str:
+        """The base64 encoded bitmap of the members ordinals."""
+        return Bitmap(obj.members).encode()
+
+
+class UpdateGroupSegmentSerializer(Serializer):
+    """
+    ``Serializer`` to add and remove members of a group segment, by their usernames.
+    """
+
+    add = ListField(child=CharField(), required=False, default=list)
+    remove = ListField(child=CharField(), required=False, default=list)
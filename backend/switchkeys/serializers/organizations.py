@@ -4,11 +4,12 @@ from rest_framework.serializers import (
     IntegerField,
 )
 
+from switchkeys.api.fields import DynamicFieldsMixin
 from switchkeys.serializers.users import OrganizationUserSerializer
 from switchkeys.models.management import Organization
 
 
-class OrganizationSerializer(ModelSerializer):
+class OrganizationSerializer(DynamicFieldsMixin, ModelSerializer):
     """
     ``Serializer`` for ``Organization`` .
     """
@@ -29,10 +30,20 @@ class OrganizationSerializer(ModelSerializer):
         read_only_fields = ("id", "members", "created", "modified", "owner")
 
     def get_owner(self, obj: Organization):
-        return OrganizationUserSerializer(obj.owner).data
+        if not self.selection.expands("owner"):
+            return obj.owner_id
+
+        return OrganizationUserSerializer(
+            obj.owner, selection=self.selection.nested("owner")
+        ).data
 
     def get_members(self, obj: Organization):
-        return OrganizationUserSerializer(obj.members, many=True).data
+        if not self.selection.expands("members"):
+            return [member.id for member in obj.members.all()]
+
+        return OrganizationUserSerializer(
+            obj.members, many=True, selection=self.selection.nested("members")
+        ).data
 
 
 class OrganizationAddMemberSerializer(ModelSerializer):
@@ -4,12 +4,14 @@ from rest_framework.serializers import (
     IntegerField,
 )
 
+from switchkeys.api.fields import DynamicFieldsMixin
+
 # from switchkeys.serializers.environments import EnvironmentKeyAndNameSerializer
 from switchkeys.serializers.organizations import OrganizationSerializer
 from switchkeys.models.management import OrganizationProject, ProjectEnvironment
 
 
-class EnvironmentKeyAndNameSerializer(ModelSerializer):
+class EnvironmentKeyAndNameSerializer(DynamicFieldsMixin, ModelSerializer):
     """Serializer to serialize the `ProjectEnvironment` model and return only the `[name, environment_key]` fields."""
 
     class Meta:
@@ -20,7 +22,7 @@ class EnvironmentKeyAndNameSerializer(ModelSerializer):
         ]
 
 
-class OrganizationProjectSerializer(ModelSerializer):
+class OrganizationProjectSerializer(DynamicFieldsMixin, ModelSerializer):
     """
     ``Serializer`` for ``Organization project`` .
     """
@@ -45,9 +47,19 @@ class OrganizationProjectSerializer(ModelSerializer):
 
     def get_organization(self, obj: OrganizationProject):
         """Return the `OrganizationSerializer` serializer"""
-        return OrganizationSerializer(obj.organization).data
+        if not self.selection.expands("organization"):
+            return obj.organization_id
+
+        return OrganizationSerializer(
+            obj.organization, selection=self.selection.nested("organization")
+        ).data
 
     def get_environments(self, obj: OrganizationProject):
         """Return the `EnvironmentKeyAndNameSerializer` serializer."""
-        envs = ProjectEnvironment.objects.filter(project=obj)
-        return EnvironmentKeyAndNameSerializer(envs, many=True).data
+        envs = obj.environment_project.all()
+        if not self.selection.expands("environments"):
+            return [env.id for env in envs]
+
+        return EnvironmentKeyAndNameSerializer(
+            envs, many=True, selection=self.selection.nested("environments")
+        ).data
@@ -1,9 +1,13 @@
-from switchkeys.models.environments import UserFeature
+from switchkeys.api.fields import DynamicFieldsMixin
 from switchkeys.models.users import ProjectEnvironmentUser, User
-from rest_framework.serializers import ModelSerializer, SerializerMethodField
+from rest_framework.serializers import (
+    IntegerField,
+    ModelSerializer,
+    SerializerMethodField,
+)
 
 
-class OrganizationUserSerializer(ModelSerializer):
+class OrganizationUserSerializer(DynamicFieldsMixin, ModelSerializer):
     """
     This class will be used to get all info about a user
     """
@@ -28,11 +32,13 @@ class OrganizationUserSerializer(ModelSerializer):
         ]
 
 
-class ProjectEnvironmentUserSerializer(ModelSerializer):
+class ProjectEnvironmentUserSerializer(DynamicFieldsMixin, ModelSerializer):
     """
     This class will be used to get all project users.
     """
 
+    # The dense position of the user in the segments bitmaps, set on its first membership.
+    ordinal = IntegerField(read_only=True)
     device = SerializerMethodField()
     features = SerializerMethodField()
 
@@ -41,6 +47,7 @@ class ProjectEnvironmentUserSerializer(ModelSerializer):
         fields = [
             "id",
             "username",
+            "ordinal",
             "device",
             "features",
         ]
@@ -55,14 +62,24 @@ class ProjectEnvironmentUserSerializer(ModelSerializer):
 
     def get_features(self, obj: ProjectEnvironmentUser):
         from switchkeys.serializers.environments import SwitchKeysFeatureSerializer
+        from switchkeys.services.environments import (
+            get_user_feature_as_feature,
+            resolve_user_features,
+        )
 
-        features = UserFeature.objects.filter(user=obj)
-        serialized_features = []
-
-        for feature in features:
-            feature.feature.value = feature.feature_value
-            serialized_features.append(
-                SwitchKeysFeatureSerializer(feature.feature).data
+        # Prefetched with the features when serializing a whole environment, the environment
+        # features are given by `ProjectEnvironmentSerializer` for the sparse storage, with the
+        # compiled targeting rules.
+        features = [
+            get_user_feature_as_feature(user_feature)
+            for user_feature in resolve_user_features(
+                obj,
+                self.context.get("environment_features", []),
+                obj.user_feature.all(),
+                self.context.get("rules"),
             )
+        ]
 
-        return serialized_features
+        return SwitchKeysFeatureSerializer(
+            features, many=True, selection=self.selection.nested("features")
+        ).data
@@ -0,0 +1,159 @@
+"""This file contains everything related to the change feed, the outbox of the changes."""
+
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from django.conf import settings
+from django.db.models import QuerySet, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from switchkeys.models.changes import ChangeEvent
+from switchkeys.models.management import OrganizationProject, ProjectEnvironment
+
+# The fields of a change event served by the feed.
+CHANGE_EVENT_FIELDS = (
+    "sequence",
+    "event",
+    "organization_id",
+    "project_id",
+    "environment_key",
+    "data",
+    "created",
+)
+
+
+def record_change_event(
+    event: str,
+    organization_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    environment_key: Optional[UUID] = None,
+    **data: Any,
+) -> ChangeEvent:
+    """
+    Record a change in the change feed, in the transaction of the change, so the event is
+    committed with the change or not at all.
+
+    ### Attributes
+        - event (str): The event name, e.g. `project.updated`.
+        - organization_id (int | None): The changed organization, or the one of the project.
+        - project_id (int | None): The changed project, or the one of the environment.
+        - environment_key (UUID | None): The changed environment.
+        - data (Any): The event payload, keep it small.
+    """
+    return ChangeEvent.objects.create(
+        event=event,
+        organization_id=organization_id,
+        project_id=project_id,
+        environment_key=environment_key,
+        data=data,
+    )
+
+
+def record_environment_change_event(
+    environment: ProjectEnvironment, event: str, **data: Any
+) -> ChangeEvent:
+    """Record a change on an environment, its organization is read by the insert itself."""
+    return record_change_event(
+        event,
+        organization_id=Subquery(
+            OrganizationProject.objects.filter(id=environment.project_id).values(
+                "organization_id"
+            )
+        ),
+        project_id=environment.project_id,
+        environment_key=environment.environment_key,
+        **data,
+    )
+
+
+def record_environments_change_events(
+    environments: Iterable[ProjectEnvironment],
+    organization_id: int,
+    event: str,
+    **data: Any,
+) -> List[ChangeEvent]:
+    """Record the same change on many environments of an organization, in a single query."""
+    return ChangeEvent.objects.bulk_create(
+        ChangeEvent(
+            event=event,
+            organization_id=organization_id,
+            project_id=environment.project_id,
+            environment_key=environment.environment_key,
+            data={"revision": environment.revision, **data},
+        )
+        for environment in environments
+    )
+
+
+def get_change_feed_horizon(after: int) -> int:
+    """
+    Return the last sequence the feed can serve after the given one.
+
+    The sequences are allocated on insert, a transaction may commit its events after the ones
+    of a later transaction. The events following a missing sequence are held back until it's
+    committed, or until `SWITCHKEYS_CHANGE_FEED_SETTLE_TIME` has passed since they have been
+    recorded, then it has been rolled back. Only the recent sequences are read.
+    """
+    settled = timezone.now() - timedelta(
+        seconds=settings.SWITCHKEYS_CHANGE_FEED_SETTLE_TIME
+    )
+    last_settled = (
+        ChangeEvent.objects.filter(created__lte=settled)
+        .order_by("-sequence")
+        .values("sequence")[:1]
+    )
+    sequences = (
+        ChangeEvent.objects.filter(
+            sequence__gt=after,
+            sequence__gte=Coalesce(Subquery(last_settled), 0),
+        )
+        .order_by("sequence")
+        .values_list("sequence", "created")
+    )
+
+    horizon = after
+    for sequence, created in sequences:
+        if created > settled and sequence != horizon + 1:
+            break
+        horizon = sequence
+    return horizon
+
+
+def get_change_events(
+    after: int,
+    limit: int,
+    organization_ids: QuerySet,
+    organization_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    environment_key: Optional[UUID] = None,
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Return the committed change events after a sequence number, in their sequence order.
+
+    ### Attributes
+        - after (int): The sequence number of the last event read, 0 to read from the start.
+        - limit (int): The maximum number of events to return.
+        - organization_ids (QuerySet): The organizations readable by the caller, only their
+          changes are returned, see `filter_user_organizations`.
+        - organization_id, project_id, environment_key: Only return the changes on them.
+
+    ### Returns
+        - A tuple of `(events, has_more)`, `has_more` is True when more events follow.
+    """
+    events = ChangeEvent.objects.filter(
+        sequence__gt=after,
+        sequence__lte=get_change_feed_horizon(after),
+        organization_id__in=organization_ids,
+    )
+    if organization_id is not None:
+        events = events.filter(organization_id=organization_id)
+    if project_id is not None:
+        events = events.filter(project_id=project_id)
+    if environment_key is not None:
+        events = events.filter(environment_key=environment_key)
+
+    # One more row tells if there's a next page, without a count.
+    events = list(events.order_by("sequence").values(*CHANGE_EVENT_FIELDS)[: limit + 1])
+    return events[:limit], len(events) > limit
@@ -0,0 +1,235 @@
+"""This file contains everything related to syncing an environment by revision."""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import Max, Q
+
+from switchkeys.models.environments import (
+    EnvironmentTombstone,
+    TombstoneType,
+    UserFeature,
+)
+from switchkeys.models.management import ProjectEnvironment
+from switchkeys.serializers.environments import SwitchKeysFeatureSerializer
+from switchkeys.services.environments import (
+    environment_key_cache,
+    get_environment_features,
+    get_user_feature_as_feature,
+    get_user_feature_value,
+    is_sparse_feature_storage,
+    resolve_user_features,
+)
+from switchkeys.services.rules import get_compiled_rules, serialize_segments
+from switchkeys.utils.rules import CompiledRules
+
+
+def add_environment_tombstone(
+    environment: ProjectEnvironment,
+    revision: int,
+    kind: TombstoneType,
+    name: str = "",
+    username: str = "",
+) -> EnvironmentTombstone:
+    """
+    Record a deletion on an environment.
+
+    ### Attributes
+        - environment (ProjectEnvironment): The environment where the deletion happened.
+        - revision (int): The environment revision of the deletion.
+        - kind (TombstoneType): What has been deleted.
+        - name (str): The deleted feature name.
+        - username (str): The username of the deleted user or user feature.
+    """
+    return EnvironmentTombstone.objects.create(
+        environment=environment,
+        revision=revision,
+        kind=kind,
+        name=name,
+        username=username,
+    )
+
+
+@transaction.atomic
+def prune_environment_tombstones(before: datetime) -> int:
+    """
+    Delete the tombstones recorded before the given time, the environments remember the last
+    pruned revision so the clients syncing from an older one are asked for a full sync.
+
+    ### Attributes
+        - before (datetime): The tombstones recorded before it are deleted.
+
+    ### Returns
+        - The number of deleted tombstones.
+    """
+    tombstones = EnvironmentTombstone.objects.filter(created__lt=before)
+    # The last pruned revision of every environment.
+    revisions = dict(
+        tombstones.values("environment_id")
+        .annotate(revision=Max("revision"))
+        .values_list("environment_id", "revision")
+    )
+    for environment in ProjectEnvironment.objects.filter(id__in=revisions).only(
+        "id", "environment_key"
+    ):
+        ProjectEnvironment.objects.filter(
+            id=environment.id, pruned_revision__lt=revisions[environment.id]
+        ).update(pruned_revision=revisions[environment.id])
+        environment_key_cache.delete(str(environment.environment_key))
+
+    count, _ = tombstones.delete()
+    return count
+
+
+def is_full_sync_required(environment: ProjectEnvironment, since: int) -> bool:
+    """
+    Whether the deletions after the given revision were pruned, the client has to drop its
+    local copy and sync the environment from the revision `0`.
+    """
+    return 0 < since < environment.pruned_revision
+
+
+def get_environment_changes(
+    environment: ProjectEnvironment, since: int, username: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Return the features and the user features that changed on an environment after the given
+    revision, with the deletions that happened after it.
+
+    ### Attributes
+        - environment (ProjectEnvironment): The environment to get its changes.
+        - since (int): The revision the client already has, `0` returns the whole environment.
+        - username (str | None): Only return the user features of this user.
+
+    ### Returns
+        - A dictionary with the following shape:
+        ```
+        {
+            "revision": 12,
+            "since": 10,
+            "features": [<feature>, ...],
+            "rules": [<rule>, ...],
+            "users": {"<username>": [<feature with the user value>, ...]},
+            "deleted": {
+                "features": ["<name>", ...],
+                "users": ["<username>", ...],
+                "user_features": {"<username>": ["<name>", ...]},
+            },
+        }
+        ```
+        Clients should apply the deletions first, then the changed features. The targeting
+        rules are always returned whole, they replace the rules of the client.
+
+        With the sparse storage, `users` only holds the changed user overrides, unless a
+        `username` is given, then it holds the changed effective features of the user, including
+        the environment values of the features the user doesn't override.
+    """
+    features = get_environment_features(environment)
+    user_features = UserFeature.objects.filter(
+        user__environment=environment
+    ).select_related("user__device", "feature")
+    tombstones = EnvironmentTombstone.objects.none()
+
+    if username is not None:
+        user_features = user_features.filter(user__username=username)
+
+    if since > 0:
+        features = features.filter(revision__gt=since)
+        # The user features without an override follow the changes on their feature.
+        user_features = user_features.filter(
+            Q(revision__gt=since) | Q(is_override=False, feature__revision__gt=since)
+        )
+        tombstones = environment.tombstones.filter(revision__gt=since).order_by(
+            "revision"
+        )
+
+    deleted = {"features": [], "users": [], "user_features": {}}
+    for tombstone in tombstones:
+        if tombstone.kind == TombstoneType.FEATURE:
+            deleted["features"].append(tombstone.name)
+        elif username is not None and tombstone.username != username:
+            continue
+        elif tombstone.kind == TombstoneType.USER:
+            deleted["users"].append(tombstone.username)
+        else:
+            deleted["user_features"].setdefault(tombstone.username, []).append(
+                tombstone.name
+            )
+
+    rules = get_compiled_rules(environment)
+    if is_sparse_feature_storage() and username is not None:
+        users = get_user_changes(environment, since, username, deleted, rules)
+    else:
+        users = {}
+        # The rules are evaluated once per user, for the values of its device and segments.
+        users_values: Dict[int, Dict[str, str]] = {}
+        for user_feature in user_features:
+            user = user_feature.user
+            values = users_values.get(user.id)
+            if values is None:
+                device = user.device
+                values = users_values[user.id] = rules.evaluate(
+                    device.device_type if device else None,
+                    device.version if device else None,
+                    user.ordinal,
+                )
+
+            # Serve the user override instead of the environment value, or the value the
+            # targeting rules give to the user device.
+            user_feature.feature_value = get_user_feature_value(
+                user_feature, user.username, values
+            )
+            users.setdefault(user.username, []).append(
+                SwitchKeysFeatureSerializer(
+                    get_user_feature_as_feature(user_feature)
+                ).data
+            )
+
+    return {
+        "revision": environment.revision,
+        "since": since,
+        "features": SwitchKeysFeatureSerializer(features, many=True).data,
+        "rules": rules.rules,
+        "segments": serialize_segments(rules),
+        "users": users,
+        "deleted": deleted,
+    }
+
+
+def get_user_changes(
+    environment: ProjectEnvironment,
+    since: int,
+    username: str,
+    deleted: Dict[str, Any],
+    rules: CompiledRules,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Return the effective features of an environment user that changed after the given revision,
+    for the sparse storage. A deleted user override is returned with the environment value, the
+    clients apply it after dropping the override.
+    """
+    user = environment.users.select_related("device").filter(username=username).first()
+    if user is None:
+        return {}
+
+    reverted = set(deleted["user_features"].get(username, []))
+    changed = []
+    for user_feature in resolve_user_features(
+        user,
+        get_environment_features(environment),
+        UserFeature.objects.filter(user=user).select_related("feature"),
+        rules,
+    ):
+        if (
+            since == 0
+            or user_feature.revision > since
+            or user_feature.feature.name in reverted
+        ):
+            changed.append(
+                SwitchKeysFeatureSerializer(
+                    get_user_feature_as_feature(user_feature)
+                ).data
+            )
+
+    return {username: changed} if changed else {}
@@ -1,11 +1,25 @@
+from copy import copy
 from enum import Enum
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Prefetch, QuerySet
+from django.utils import timezone
+from switchkeys.api.fields import FieldSelection
 from switchkeys.models.users import DeviceType, ProjectEnvironmentUser, UserDevice
-from switchkeys.models.environments import EnvironmentFeature, SwitchKeysFeature
+from switchkeys.models.environments import (
+    EnvironmentFeature,
+    SwitchKeysFeature,
+    UserFeature,
+)
 from switchkeys.models.management import (
     ProjectEnvironment,
     OrganizationProject,
 )
+from switchkeys.utils.cache import LRUCache
+from switchkeys.utils.rollouts import get_rollout_value
+from switchkeys.utils.rules import CompiledRules
+from switchkeys.utils.validators import is_valid_uuid
 
 
 class EnvironmentsName(Enum):
@@ -14,9 +28,90 @@ class EnvironmentsName(Enum):
     PRODUCTION = "production"
 
 
-def get_all_environments() -> List[ProjectEnvironment]:
+class BulkItemStatus(Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    FAILED = "failed"
+
+
+class FeatureStorage(Enum):
+    MATERIALIZED = "materialized"
+    SPARSE = "sparse"
+
+
+# Environment key -> environment row, resolved on every SDK call.
+environment_key_cache = LRUCache(
+    max_size=settings.SWITCHKEYS_ENVIRONMENT_CACHE_SIZE,
+    ttl=settings.SWITCHKEYS_ENVIRONMENT_CACHE_TTL,
+)
+
+
+def with_environment_relations(
+    environments: QuerySet, selection: Optional[FieldSelection] = None
+) -> QuerySet:
+    """
+    Load everything `ProjectEnvironmentSerializer` reads with the environments, so serializing
+    them costs the same number of queries whatever the number of users and features.
+
+    Only the relations rendered for the given `?fields=`/`?expand=` selection are loaded.
+    """
+    selection = selection or FieldSelection()
+    select_related = ["feature_environment"]
+    prefetch_related = []
+
+    if selection.expands("project.organization.owner"):
+        select_related.append("project__organization__owner")
+    elif selection.expands("project.organization"):
+        select_related.append("project__organization")
+    elif selection.expands("project"):
+        select_related.append("project")
+    if selection.includes("project.organization.members"):
+        prefetch_related.append("project__organization__members")
+    if selection.includes("project.environments"):
+        prefetch_related.append("project__environment_project")
+
+    # The users without an override read the environment features with the sparse storage.
+    if selection.includes("features") or (
+        selection.includes("users.features") and is_sparse_feature_storage()
+    ):
+        prefetch_related.append("feature_environment__features")
+
+    # The targeting rules are served, and give the user features the values of their device.
+    if selection.includes("rules") or selection.includes("users.features"):
+        prefetch_related.append("rules")
+
+    if selection.expands("users"):
+        users = ProjectEnvironmentUser.objects.all()
+        if selection.includes("users.device") or selection.includes("users.features"):
+            users = users.select_related("device")
+        if selection.includes("users.features"):
+            users = users.prefetch_related(
+                Prefetch(
+                    "user_feature",
+                    queryset=UserFeature.objects.select_related("feature"),
+                )
+            )
+        prefetch_related.append(Prefetch("users", queryset=users))
+    elif selection.includes("users"):
+        prefetch_related.append(
+            Prefetch(
+                "users",
+                queryset=ProjectEnvironmentUser.objects.only("id", "environment"),
+            )
+        )
+
+    return environments.select_related(*select_related).prefetch_related(
+        *prefetch_related
+    )
+
+
+def get_all_environments(
+    selection: Optional[FieldSelection] = None,
+) -> List[ProjectEnvironment]:
     """Return all environments"""
-    return ProjectEnvironment.objects.all().order_by("name")
+    return with_environment_relations(
+        ProjectEnvironment.objects.all(), selection
+    ).order_by("name")
 
 
 def get_all_project_environments(
@@ -37,12 +132,94 @@ def get_environment_by_id(id: str) -> ProjectEnvironment:
 
 
 def get_environment_by_key(environment_key: str) -> ProjectEnvironment | None:
-    """Return project environment who has the same id"""
+    """
+    Return project environment who has the same key.
+
+    The environment row is cached in the process, every call gets its own instance so callers
+    can't alter the cached copy. Malformed keys are rejected before touching the cache or the
+    database.
+    """
+    environment_key = str(environment_key)
+    if not is_valid_uuid(environment_key):
+        return None
+
+    environment = get_cached_environment(environment_key)
+    if environment is not None:
+        return environment
+
+    try:
+        environment = ProjectEnvironment.objects.get(environment_key=environment_key)
+    except ProjectEnvironment.DoesNotExist:
+        return None
+
+    cache_environment(environment_key, environment)
+    return environment
+
+
+async def aget_environment_by_key(environment_key: str) -> ProjectEnvironment | None:
+    """The async `get_environment_by_key`, sharing its cache of the environment rows."""
+    environment_key = str(environment_key)
+    if not is_valid_uuid(environment_key):
+        return None
+
+    environment = get_cached_environment(environment_key)
+    if environment is not None:
+        return environment
+
     try:
-        return ProjectEnvironment.objects.get(environment_key=str(environment_key))
+        environment = await ProjectEnvironment.objects.aget(
+            environment_key=environment_key
+        )
     except ProjectEnvironment.DoesNotExist:
         return None
 
+    cache_environment(environment_key, environment)
+    return environment
+
+
+def get_cached_environment(environment_key: str) -> ProjectEnvironment | None:
+    """Return a new instance of the cached environment row of the key, if any."""
+    values = environment_key_cache.get(environment_key)
+    if values is None:
+        return None
+
+    field_names = [field.attname for field in ProjectEnvironment._meta.concrete_fields]
+    return ProjectEnvironment.from_db("default", field_names, values)
+
+
+def cache_environment(environment_key: str, environment: ProjectEnvironment) -> None:
+    """Cache the environment row under the key it was looked up with."""
+    field_names = [field.attname for field in ProjectEnvironment._meta.concrete_fields]
+    environment_key_cache.set(
+        environment_key, [getattr(environment, name) for name in field_names]
+    )
+
+
+def bump_environment_revision(environment: ProjectEnvironment) -> int:
+    """
+    Increment the revision of an environment, call it after every write on the environment.
+
+    ### Attributes
+        - environment (ProjectEnvironment): The environment that has been changed.
+
+    ### Returns
+        - The new revision of the environment.
+    """
+    ProjectEnvironment.objects.filter(id=environment.id).update(
+        revision=F("revision") + 1, modified=timezone.now()
+    )
+    environment.refresh_from_db(fields=["revision", "modified"])
+    environment_key_cache.delete(str(environment.environment_key))
+    return environment.revision
+
+
+def bump_environments_revision(environments: QuerySet) -> None:
+    """Increment the revision of all the given environments in one query."""
+    environments.update(revision=F("revision") + 1, modified=timezone.now())
+    # Rare path (project/organization changes), dropping the whole cache is cheaper than
+    # looking up the keys of the updated environments.
+    environment_key_cache.clear()
+
 
 def get_environment_user_by_id(user_id: str) -> ProjectEnvironmentUser | None:
     """Return project environment who has the same id"""
@@ -54,29 +231,238 @@ def get_environment_user_by_id(user_id: str) -> ProjectEnvironmentUser | None:
         return None
 
 
-def get_environment_user_username(username: str) -> ProjectEnvironmentUser | None:
-    """Check and return the user if created or none if not."""
+def get_environment_user_username(
+    environment: ProjectEnvironment, username: str
+) -> ProjectEnvironmentUser | None:
+    """
+    Return the environment user with the username or none if not created, a single lookup on
+    the (environment, username) unique index also proving the membership.
+    """
     try:
-        return ProjectEnvironmentUser.objects.get(username=username)
+        return ProjectEnvironmentUser.objects.get(
+            environment=environment, username=username
+        )
     except ProjectEnvironmentUser.DoesNotExist:
         return None
 
 
+async def aresolve_users_features(
+    environment: ProjectEnvironment,
+    usernames: Iterable[str],
+    rules: Optional[CompiledRules] = None,
+) -> Dict[str, List[UserFeature]]:
+    """
+    Return the effective features of many environment users, the batch version of
+    `resolve_user_features` reading all the users in a fixed number of queries.
+
+    ### Attributes
+        - environment (ProjectEnvironment): The environment of the users.
+        - usernames (Iterable[str]): The usernames of the users.
+        - rules (CompiledRules | None): The compiled targeting rules of the environment.
+
+    ### Returns
+        - The effective features of every user by username, the unknown usernames are left out.
+    """
+    users = [
+        user
+        async for user in ProjectEnvironmentUser.objects.filter(
+            environment=environment, username__in=list(usernames)
+        ).select_related("device")
+    ]
+    if not users:
+        return {}
+
+    users_by_id = {user.id: user for user in users}
+    users_features: Dict[int, List[UserFeature]] = {user.id: [] for user in users}
+    async for user_feature in UserFeature.objects.filter(user__in=users).select_related(
+        "feature"
+    ):
+        # The serializers read the username, e.g. to evaluate the rollouts.
+        user_feature.user = users_by_id[user_feature.user_id]
+        users_features[user_feature.user_id].append(user_feature)
+
+    # The environment features are only read with the sparse storage.
+    environment_features = []
+    if is_sparse_feature_storage():
+        environment_features = [
+            feature async for feature in get_environment_features(environment)
+        ]
+
+    return {
+        user.username: resolve_user_features(
+            user, environment_features, users_features[user.id], rules
+        )
+        for user in users
+    }
+
+
 def create_environment_user(
-    username: str, device_type: DeviceType, device_version: str
+    environment: ProjectEnvironment,
+    username: str,
+    device_type: DeviceType,
+    device_version: str,
 ) -> ProjectEnvironmentUser | None:
-    """Create the user."""
+    """Create the user on the environment."""
     device = UserDevice.objects.get_or_create(
         device_type=device_type, version=device_version
     )
 
-    return ProjectEnvironmentUser.objects.create(username=username, device=device[0])
+    return ProjectEnvironmentUser.objects.create(
+        environment=environment, username=username, device=device[0]
+    )
+
+
+def is_sparse_feature_storage() -> bool:
+    """Check if the user features only hold the user overrides, see `SWITCHKEYS_FEATURE_STORAGE`."""
+    return settings.SWITCHKEYS_FEATURE_STORAGE == FeatureStorage.SPARSE.value
+
+
+def get_environment_features(environment: ProjectEnvironment) -> QuerySet:
+    """Return the features of the environment, the default value of every environment user."""
+    return SwitchKeysFeature.objects.filter(environment=environment)
+
+
+def is_user_override(user_feature: UserFeature) -> bool:
+    """
+    Check if a user feature overrides its environment feature, i.e. its value has been set on
+    the user, even to the environment value. The others follow the environment feature, with
+    its rollout and targeting rules.
+    """
+    return user_feature.is_override
+
+
+def get_user_feature_value(
+    user_feature: UserFeature, username: str, values: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    Return the effective value of a user feature: the user override, else the value of the
+    targeting rules matching the user, or the environment value, for the users in the rollout of
+    the feature. The users out of the rollout get its initial value.
+
+    ### Attributes
+        - user_feature (UserFeature): The user feature with its feature loaded.
+        - username (str): The username of the user, to evaluate the rollout.
+        - values (Dict[str, str] | None): The values of the rules matching the user, by name.
+    """
+    if is_user_override(user_feature):
+        return user_feature.feature_value
+
+    feature = user_feature.feature
+    value = (values or {}).get(feature.name, feature.value)
+    return get_rollout_value(feature, username, value)
+
+
+def resolve_user_features(
+    user: ProjectEnvironmentUser,
+    environment_features: Iterable[SwitchKeysFeature],
+    user_features: Iterable[UserFeature],
+    rules: Optional[CompiledRules] = None,
+) -> List[UserFeature]:
+    """
+    Return the effective features of an environment user.
+
+    With the materialized storage the user features are read as they are. With the sparse
+    storage every environment feature the user doesn't override is added as an unsaved user
+    feature holding the environment value, followed by the user's own features.
+
+    The user overrides are returned as they are. The other features get the value of the rules
+    matching the user device and segments, and the initial value when the user is out of their
+    rollout, as unsaved user features, whatever the storage.
+
+    ### Attributes
+        - user (ProjectEnvironmentUser): The environment user, with its device loaded.
+        - environment_features (Iterable[SwitchKeysFeature]): The features of the environment,
+          only read with the sparse storage.
+        - user_features (Iterable[UserFeature]): The user features with their feature loaded.
+        - rules (CompiledRules | None): The compiled targeting rules of the environment.
+    """
+    user_features = list(user_features)
+    if is_sparse_feature_storage():
+        user_features = resolve_sparse_user_features(
+            user, environment_features, user_features
+        )
+
+    values = {}
+    if rules:
+        device = user.device
+        values = rules.evaluate(
+            device.device_type if device else None,
+            device.version if device else None,
+            user.ordinal,
+        )
+
+    resolved = []
+    for user_feature in user_features:
+        if is_user_override(user_feature):
+            resolved.append(user_feature)
+            continue
+
+        feature = user_feature.feature
+        value = get_user_feature_value(user_feature, user.username, values)
+        # A change on the value, the rollout or the rules of a feature bumps its revision.
+        revision = max(user_feature.revision, feature.revision)
+        if value != user_feature.feature_value or revision != user_feature.revision:
+            user_feature = UserFeature(
+                id=user_feature.id,
+                user=user,
+                feature=feature,
+                feature_value=value,
+                revision=revision,
+                created=user_feature.created,
+                modified=user_feature.modified,
+            )
+        resolved.append(user_feature)
+    return resolved
+
+
+def get_user_feature_as_feature(user_feature: UserFeature) -> SwitchKeysFeature:
+    """
+    Return a copy of the feature of a user feature holding the user value and if it's an
+    override, to serialize it as a feature. The features are shared by the users with the
+    sparse storage, they're not changed.
+    """
+    feature = copy(user_feature.feature)
+    feature.value = user_feature.feature_value
+    feature.is_override = user_feature.is_override
+    return feature
+
+
+def resolve_sparse_user_features(
+    user: ProjectEnvironmentUser,
+    environment_features: Iterable[SwitchKeysFeature],
+    user_features: List[UserFeature],
+) -> List[UserFeature]:
+    """Add the environment features the user doesn't override, for the sparse storage."""
+    overrides = {
+        user_feature.feature_id: user_feature for user_feature in user_features
+    }
+    resolved = [
+        overrides.get(feature.id)
+        or UserFeature(
+            user=user,
+            feature=feature,
+            feature_value=feature.value,
+            revision=feature.revision,
+            created=feature.created,
+            modified=feature.modified,
+        )
+        for feature in environment_features
+    ]
+    # Features set on the user only, not on any environment.
+    resolved.extend(
+        user_feature
+        for user_feature in user_features
+        if not user_feature.feature.is_default
+    )
+    return resolved
 
 
 def get_all_environment_features(
     environment: ProjectEnvironment,
 ) -> List[EnvironmentFeature]:
-    return EnvironmentFeature.objects.filter(environment__id=environment.id)
+    return EnvironmentFeature.objects.filter(
+        environment__id=environment.id
+    ).prefetch_related("features")
 
 
 def create_environments(project: OrganizationProject) -> List[ProjectEnvironment]:
@@ -134,19 +520,13 @@ def is_feature_created(name: str, environment: ProjectEnvironment) -> bool:
         True
     """
 
-    all_features = SwitchKeysFeature.objects.filter(name=name).values_list(
-        "id", flat=True
-    )
-    env_features = EnvironmentFeature.objects.filter(
-        environment=environment, features__id__in=all_features
-    )
-
-    return env_features.exists()
+    # A single lookup on the (environment, name) unique index.
+    return SwitchKeysFeature.objects.filter(environment=environment, name=name).exists()
 
 
 def get_environment_feature(
     name: str, environment: ProjectEnvironment
-) -> Optional[EnvironmentFeature]:
+) -> Optional[SwitchKeysFeature]:
     """
     Retrieve an environment feature by name and environment.
 
@@ -155,21 +535,291 @@ def get_environment_feature(
         environment (ProjectEnvironment): The environment where the feature belongs.
 
     Returns:
-        EnvironmentFeature: The environment feature with the specified name, if found, else None.
-
-    Raises:
-        EnvironmentFeature.DoesNotExist: If the environment feature does not exist.
+        SwitchKeysFeature: The environment feature with the specified name, if found, else None.
 
     Example:
         >>> feature = get_environment_feature("debug", environment)
     """
 
-    # Retrieve all features with the given name
-    all_features = SwitchKeysFeature.objects.filter(name=name)
+    # A single lookup on the (environment, name) unique index.
+    return SwitchKeysFeature.objects.filter(environment=environment, name=name).first()
+
+
+def set_environment_user_features(
+    environment: ProjectEnvironment, items: List[Dict[str, str]]
+) -> Tuple[List[Dict[str, Any]], List[ProjectEnvironmentUser]]:
+    """
+    Set many user features on an environment in one transaction, the bulk version of
+    `SetEnvironmentUserFeaturesApiView`. A missing user feature overrides the environment feature
+    with the same name, or is created with its own feature.
+
+    ### Attributes
+        - environment (ProjectEnvironment): The environment of the users.
+        - items (List[Dict[str, str]]): The `{username, name, value}` items to set, the last value
+          wins when the same user feature is sent twice.
+
+    ### Returns
+        - A tuple of `(results, users)`, `results` holds every item with its `status`
+          (`created`, `updated` or `failed` with a `message`), `users` the changed users.
+    """
+    usernames = {item["username"] for item in items}
+    users = {
+        user.username: user for user in environment.users.filter(username__in=usernames)
+    }
+
+    values: Dict[Tuple[int, str], str] = {}
+    results: List[Dict[str, Any]] = []
+    for item in items:
+        user = users.get(item["username"])
+        result = dict(item)
+        if user is None:
+            result["status"] = BulkItemStatus.FAILED.value
+            result["message"] = "User not found."
+        else:
+            values[(user.id, item["name"])] = item["value"]
+        results.append(result)
+
+    if not values:
+        return results, []
+
+    batch_size = settings.SWITCHKEYS_BULK_BATCH_SIZE
+    with transaction.atomic():
+        revision = bump_environment_revision(environment)
+        now = timezone.now()
+
+        user_features = UserFeature.objects.filter(
+            user_id__in={user_id for user_id, _ in values},
+            feature__name__in={name for _, name in values},
+        ).select_related("feature")
+
+        updated: List[UserFeature] = []
+        found = set()
+        for user_feature in user_features:
+            key = (user_feature.user_id, user_feature.feature.name)
+            if key in values:
+                user_feature.feature_value = values[key]
+                user_feature.is_override = True
+                user_feature.revision = revision
+                user_feature.modified = now
+                updated.append(user_feature)
+                found.add(key)
+
+        UserFeature.objects.bulk_update(
+            updated,
+            ["feature_value", "is_override", "revision", "modified"],
+            batch_size=batch_size,
+        )
+
+        # A missing user feature overrides the environment feature with the same name, or
+        # gets its own feature when the environment has none.
+        missing = [key for key in values if key not in found]
+        environment_features = {
+            feature.name: feature
+            for feature in get_environment_features(environment).filter(
+                name__in={name for _, name in missing}
+            )
+        }
+        own = [key for key in missing if key[1] not in environment_features]
+        own_features = SwitchKeysFeature.objects.bulk_create(
+            (
+                SwitchKeysFeature(
+                    name=name,
+                    value=values[(user_id, name)],
+                    initial_value=values[(user_id, name)],
+                    is_default=False,
+                    revision=revision,
+                )
+                for user_id, name in own
+            ),
+            batch_size=batch_size,
+        )
+        features = dict(zip(own, own_features))
+        UserFeature.objects.bulk_create(
+            (
+                UserFeature(
+                    user_id=user_id,
+                    feature=features.get((user_id, name)) or environment_features[name],
+                    feature_value=values[(user_id, name)],
+                    is_override=True,
+                    revision=revision,
+                )
+                for user_id, name in missing
+            ),
+            batch_size=batch_size,
+        )
+
+    created = set(missing)
+    for result in results:
+        if "status" in result:
+            continue
+        key = (users[result["username"]].id, result["name"])
+        result["status"] = (
+            BulkItemStatus.CREATED.value
+            if key in created
+            else BulkItemStatus.UPDATED.value
+        )
+
+    changed = {user_id for user_id, _ in values}
+    return results, [user for user in users.values() if user.id in changed]
+
+
+def materialize_users_features(
+    environment: ProjectEnvironment, users: List[ProjectEnvironmentUser], revision: int
+) -> int:
+    """
+    Give the users a user feature for every environment feature they don't have yet, with the
+    environment value.
+
+    ### Attributes
+        - environment (ProjectEnvironment): The environment of the users.
+        - users (List[ProjectEnvironmentUser]): The environment users.
+        - revision (int): The environment revision stamped on the new user features.
+
+    ### Returns
+        - The number of created user features.
+    """
+    features = list(get_environment_features(environment))
+    existing = set(
+        UserFeature.objects.filter(user__in=users, feature__in=features).values_list(
+            "user_id", "feature_id"
+        )
+    )
 
-    # Filter environment features by environment and matching feature IDs
-    env_features = EnvironmentFeature.objects.get(
-        environment=environment, features__in=all_features
+    created = UserFeature.objects.bulk_create(
+        (
+            UserFeature(
+                user=user,
+                feature=feature,
+                feature_value=feature.value,
+                revision=revision,
+            )
+            for user in users
+            for feature in features
+            if (user.id, feature.id) not in existing
+        ),
+        batch_size=settings.SWITCHKEYS_BULK_BATCH_SIZE,
     )
+    return len(created)
+
+
+def compact_users_features() -> int:
+    """
+    Delete the user features following their environment feature, the users read it from the
+    environment with the sparse storage. The user overrides are kept.
+
+    ### Returns
+        - The number of deleted user features.
+    """
+    deleted, _ = UserFeature.objects.filter(is_override=False).delete()
+    return deleted
+
+
+def create_users_features(
+    environment: ProjectEnvironment, users: List[ProjectEnvironmentUser], revision: int
+) -> None:
+    """
+    Give the users that joined an environment its features, and stamp all their user features
+    with the revision. With the sparse storage the users read the environment values, only
+    their existing overrides are stamped.
+
+    ### Attributes
+        - environment (ProjectEnvironment): The environment the users have joined.
+        - users (List[ProjectEnvironmentUser]): The users that joined the environment.
+        - revision (int): The environment revision of the change.
+    """
+    if not is_sparse_feature_storage():
+        materialize_users_features(environment, users, revision)
 
-    return env_features
+    # The user features are new to the environment, even the ones created before.
+    UserFeature.objects.filter(user__in=users).update(revision=revision)
+
+
+def add_environment_users(
+    environment: ProjectEnvironment, items: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], List[ProjectEnvironmentUser]]:
+    """
+    Add many users to an environment in one transaction, the bulk version of
+    `AddEnvironmentUserAPIView`. Missing users are created on the environment with their device,
+    the users already on the environment keep their device.
+
+    ### Attributes
+        - environment (ProjectEnvironment): The environment to add the users to.
+        - items (List[Dict[str, Any]]): The `{username, device: {device_type, version}}` items.
+
+    ### Returns
+        - A tuple of `(results, users)`, `results` holds every item with its `status`
+          (`created` for new users, `updated` for the users already on the environment, or
+          `failed` with a `message`), `users` the added users.
+    """
+    valid_types = [str(DeviceType.ANDROID).lower(), str(DeviceType.IPHONE).lower()]
+    usernames = {item["username"] for item in items}
+    users = {
+        user.username: user for user in environment.users.filter(username__in=usernames)
+    }
+
+    results: List[Dict[str, Any]] = []
+    new_users: Dict[str, Tuple[str, str]] = {}
+    for item in items:
+        username = item["username"]
+        device_type = item["device"].get("device_type")
+        result = {"username": username}
+
+        if username in users:
+            result["status"] = BulkItemStatus.UPDATED.value
+        elif device_type not in valid_types:
+            result["status"] = BulkItemStatus.FAILED.value
+            result["message"] = (
+                f"You have sent an invalid device type. "
+                f"Only {', '.join(valid_types)} are allowed."
+            )
+        else:
+            result["status"] = BulkItemStatus.CREATED.value
+            new_users[username] = (device_type, item["device"].get("version"))
+        results.append(result)
+
+    if not users and not new_users:
+        return results, []
+
+    batch_size = settings.SWITCHKEYS_BULK_BATCH_SIZE
+    with transaction.atomic():
+        # Resolve all the devices in one pass, creating the missing ones.
+        pairs = set(new_users.values())
+        devices = {
+            (device.device_type, device.version): device
+            for device in UserDevice.objects.filter(
+                device_type__in={device_type for device_type, _ in pairs},
+                version__in={version for _, version in pairs},
+            )
+        }
+        UserDevice.objects.bulk_create(
+            [
+                UserDevice(device_type=device_type, version=version)
+                for device_type, version in pairs - devices.keys()
+            ],
+            ignore_conflicts=True,
+        )
+        if pairs - devices.keys():
+            devices = {
+                (device.device_type, device.version): device
+                for device in UserDevice.objects.filter(
+                    device_type__in={device_type for device_type, _ in pairs},
+                    version__in={version for _, version in pairs},
+                )
+            }
+
+        created = ProjectEnvironmentUser.objects.bulk_create(
+            (
+                ProjectEnvironmentUser(
+                    environment=environment, username=username, device=devices[device]
+                )
+                for username, device in new_users.items()
+            ),
+            batch_size=batch_size,
+        )
+        users.update((user.username, user) for user in created)
+        added = list(users.values())
+
+        revision = bump_environment_revision(environment)
+        create_users_features(environment, added, revision)
+
+    return results, added
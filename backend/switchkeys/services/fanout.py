@@ -0,0 +1,167 @@
+"""
+This file contains the fan-out of a new environment feature to the environment users.
+
+The large fan-outs run in a daemon thread of the web worker, nothing resumes them if the worker
+is recycled or killed meanwhile. Their progress is refreshed after each batch, a running
+progress not refreshed for `SWITCHKEYS_FAN_OUT_STALE_TIME` seconds is reported as failed, run
+`manage.py fan_out_feature` to complete it, the users who already got the feature are skipped.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from switchkeys.models.environments import SwitchKeysFeature, UserFeature
+from switchkeys.models.management import ProjectEnvironment
+from switchkeys.services.environments import bump_environment_revision
+from switchkeys.services.payloads import (
+    get_payload_cache,
+    invalidate_environment_payloads,
+)
+from switchkeys.services.snapshots import refresh_environment_snapshot
+from switchkeys.services.streams import publish_environment_event
+
+logger = logging.getLogger(__name__)
+
+# The progress outlives the payloads, a failed fan-out stays visible until it's completed.
+FAN_OUT_PROGRESS_TIMEOUT = 24 * 60 * 60
+
+
+class FanOutStatus(Enum):
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+def fan_out_key(feature_id: int) -> str:
+    """Build the cache key of the fan-out progress of a feature."""
+    return f"switchkeys:fan_out:{feature_id}"
+
+
+def get_fan_out_progress(feature: SwitchKeysFeature) -> Optional[Dict[str, Any]]:
+    """
+    Return the fan-out progress of a feature, e.g. `{"status": "running", "done": 2000,
+    "total": 50000, "updated": "2024-05-01T10:00:00+00:00"}`, or None if the feature was never
+    fanned out or its progress expired. A running fan-out whose worker stopped reporting for
+    `SWITCHKEYS_FAN_OUT_STALE_TIME` seconds is reported as failed.
+    """
+    progress = get_payload_cache().get(fan_out_key(feature.id))
+    if progress and progress["status"] == FanOutStatus.RUNNING.value:
+        stale_time = timedelta(seconds=settings.SWITCHKEYS_FAN_OUT_STALE_TIME)
+        if datetime.fromisoformat(progress["updated"]) < timezone.now() - stale_time:
+            progress = {**progress, "status": FanOutStatus.FAILED.value}
+    return progress
+
+
+def report_fan_out_progress(
+    feature: SwitchKeysFeature, status: FanOutStatus, done: int, total: int
+) -> Dict[str, Any]:
+    """Store the fan-out progress of a feature, shared by the workers through the cache."""
+    progress = {
+        "status": status.value,
+        "done": done,
+        "total": total,
+        "updated": timezone.now().isoformat(),
+    }
+    get_payload_cache().set(
+        fan_out_key(feature.id), progress, timeout=FAN_OUT_PROGRESS_TIMEOUT
+    )
+    return progress
+
+
+def fan_out_feature(
+    environment: ProjectEnvironment, feature: SwitchKeysFeature, revision: int
+) -> Dict[str, Any]:
+    """
+    Give every environment user a user feature with the feature value, the users are written
+    by chunks of `SWITCHKEYS_BULK_BATCH_SIZE` rows and the progress is reported after each one.
+    The users added to the environment meanwhile already got the feature, they're skipped.
+
+    ### Attributes
+        - environment (ProjectEnvironment): The environment of the feature.
+        - feature (SwitchKeysFeature): The new environment feature.
+        - revision (int): The environment revision stamped on the user features.
+
+    ### Returns
+        - The final progress of the fan-out.
+    """
+    user_ids = list(environment.users.order_by("id").values_list("id", flat=True))
+    total = len(user_ids)
+    batch_size = settings.SWITCHKEYS_BULK_BATCH_SIZE
+
+    report_fan_out_progress(feature, FanOutStatus.RUNNING, 0, total)
+    for start in range(0, total, batch_size):
+        end = min(start + batch_size, total)
+        UserFeature.objects.bulk_create(
+            [
+                UserFeature(
+                    user_id=user_id,
+                    feature=feature,
+                    feature_value=feature.value,
+                    revision=revision,
+                )
+                for user_id in user_ids[start:end]
+            ],
+            ignore_conflicts=True,
+        )
+        report_fan_out_progress(feature, FanOutStatus.RUNNING, end, total)
+
+    return report_fan_out_progress(feature, FanOutStatus.DONE, total, total)
+
+
+def complete_fan_out(
+    environment: ProjectEnvironment, feature: SwitchKeysFeature
+) -> Dict[str, Any]:
+    """
+    Fan the feature out, then stamp the user features with a new environment revision when
+    they are all written, refresh the snapshot and publish a `feature.fanned_out` event, so
+    clients never sync a partial fan-out. Run by `fan_out_feature_in_background` and by
+    `manage.py fan_out_feature` to complete a failed one.
+
+    ### Returns
+        - The final progress of the fan-out.
+    """
+    progress = fan_out_feature(environment, feature, environment.revision)
+    with transaction.atomic():
+        revision = bump_environment_revision(environment)
+        UserFeature.objects.filter(feature=feature).update(revision=revision)
+        refresh_environment_snapshot(environment)
+        invalidate_environment_payloads(environment)
+        publish_environment_event(environment, "feature.fanned_out", name=feature.name)
+    return progress
+
+
+def fan_out_feature_in_background(
+    environment: ProjectEnvironment, feature: SwitchKeysFeature
+) -> Dict[str, Any]:
+    """
+    Fan the feature out in a background thread once the current transaction is committed,
+    for the environments too large to do it inside the request, see `complete_fan_out`. The
+    thread is not resumed if the worker stops, see the module docstring.
+
+    ### Returns
+        - The initial progress of the fan-out.
+    """
+
+    def run():
+        try:
+            complete_fan_out(environment, feature)
+        except Exception:
+            logger.exception("The fan-out of the feature %s failed.", feature.id)
+            progress = get_fan_out_progress(feature) or {"done": 0, "total": 0}
+            report_fan_out_progress(
+                feature, FanOutStatus.FAILED, progress["done"], progress["total"]
+            )
+        finally:
+            # The thread has its own database connection.
+            connection.close()
+
+    total = environment.users.count()
+    transaction.on_commit(lambda: threading.Thread(target=run, daemon=True).start())
+    return report_fan_out_progress(feature, FanOutStatus.RUNNING, 0, total)
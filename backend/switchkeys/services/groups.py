@@ -1,5 +1,20 @@
-from typing import List
-from switchkeys.models.management import OrganizationProjectGroup, OrganizationProject
+from typing import Iterable, List, Tuple
+
+from django.db import transaction
+from django.db.models import F
+
+from switchkeys.models.environments import GroupSegment
+from switchkeys.models.management import (
+    OrganizationProject,
+    OrganizationProjectGroup,
+    ProjectEnvironment,
+)
+from switchkeys.models.users import ProjectEnvironmentUser
+from switchkeys.services.environments import bump_environment_revision
+from switchkeys.services.payloads import invalidate_environment_payloads
+from switchkeys.services.snapshots import refresh_environment_snapshot
+from switchkeys.services.streams import publish_environment_event
+from switchkeys.utils.bitmaps import Bitmap
 
 
 def get_all_groups() -> List[OrganizationProjectGroup]:
@@ -24,3 +39,79 @@ def get_group_by_id(id: str) -> OrganizationProjectGroup:
         return OrganizationProjectGroup.objects.get(id=int(id))
     except OrganizationProjectGroup.DoesNotExist:
         return None
+
+
+def get_group_segment(
+    group: OrganizationProjectGroup, environment: ProjectEnvironment
+) -> GroupSegment | None:
+    """Return the segment of a group on an environment, if it has ever had members."""
+    return GroupSegment.objects.filter(group=group, environment=environment).first()
+
+
+def update_segment_members(
+    group: OrganizationProjectGroup,
+    environment: ProjectEnvironment,
+    add: Iterable[str] = (),
+    remove: Iterable[str] = (),
+) -> Tuple[GroupSegment, List[str]]:
+    """
+    Add and remove members of the segment of a group on an environment, by their usernames.
+
+    The members bitmap is updated incrementally from the changed users only. A user gets its
+    ordinal on its first membership, the ordinals are never reused so the bit of a deleted user
+    can't match another one.
+
+    ### Returns
+        - The updated segment, and the usernames that are not users of the environment.
+    """
+    add, remove = set(add), set(remove) - set(add)
+    with transaction.atomic():
+        segment, _ = GroupSegment.objects.select_for_update().get_or_create(
+            group=group, environment=environment
+        )
+        users = {
+            user.username: user
+            for user in environment.users.filter(username__in=add | remove)
+        }
+
+        new_users = [
+            users[username]
+            for username in sorted(add)
+            if username in users and users[username].ordinal is None
+        ]
+        if new_users:
+            # Reserve the ordinals in one update, it locks the environment row.
+            ProjectEnvironment.objects.filter(id=environment.id).update(
+                user_ordinals=F("user_ordinals") + len(new_users)
+            )
+            environment.refresh_from_db(fields=["user_ordinals"])
+            first = environment.user_ordinals - len(new_users)
+            for ordinal, user in enumerate(new_users, start=first):
+                user.ordinal = ordinal
+            ProjectEnvironmentUser.objects.bulk_update(new_users, ["ordinal"])
+
+        members = Bitmap(segment.members)
+        added = [users[username] for username in add if username in users]
+        removed = [users[username] for username in remove if username in users]
+        for user in added:
+            members.add(user.ordinal)
+        for user in removed:
+            if user.ordinal is not None:
+                members.discard(user.ordinal)
+        segment.users.add(*added)
+        segment.users.remove(*removed)
+        segment.members = members.to_bytes()
+        segment.save(update_fields=["members", "modified"])
+
+        # The clients read the segments with the environment rules.
+        bump_environment_revision(environment)
+        refresh_environment_snapshot(environment)
+        invalidate_environment_payloads(environment)
+        publish_environment_event(
+            environment,
+            "group_segment.updated",
+            group=group.id,
+            members=len(members),
+        )
+
+    return segment, sorted((add | remove) - users.keys())
@@ -1,4 +1,5 @@
 from typing import List
+from django.db.models import Q, QuerySet
 from switchkeys.models.users import User
 from switchkeys.models.management import Organization, OrganizationProject
 
@@ -53,3 +54,19 @@ def filter_organization_by_owner(user: User) -> List[Organization]:
     """
 
     return Organization.objects.filter(owner__id=user.id)
+
+
+def filter_user_organizations(user: User) -> QuerySet:
+    """
+    Filter the organizations owned by the user or having the user as a member.
+
+    ### Attributes
+        - user (User): The user object to filter the organizations based on the user.
+
+    ### Returns
+        - a queryset of the organizations ids, usable as a subquery.
+    """
+
+    return Organization.objects.filter(
+        Q(owner__id=user.id) | Q(members__id=user.id)
+    ).values("id")
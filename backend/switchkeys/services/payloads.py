@@ -0,0 +1,102 @@
+"""This file contains the cache of the rendered environment payloads, shared by the workers."""
+
+from enum import Enum
+from typing import Any, Awaitable, Callable
+from urllib.parse import quote
+
+from django.core.cache import caches
+
+from switchkeys.models.management import ProjectEnvironment
+
+
+class PayloadKind(Enum):
+    ENVIRONMENT = "environment"
+    FEATURES = "features"
+    USER_FEATURES = "user_features"
+
+
+def get_payload_cache():
+    """Return the cache configured for the payloads, see `SWITCHKEYS_CACHE_BACKEND`."""
+    return caches["switchkeys"]
+
+
+def payload_key(kind: PayloadKind, environment_id: int, revision: int, *parts: str):
+    """
+    Build the cache key of a payload, every environment revision has its own keys.
+
+    Example:
+        >>> payload_key(PayloadKind.USER_FEATURES, 1, 12, "mahmoud")
+        'switchkeys:user_features:1:12:mahmoud'
+    """
+    return ":".join(
+        ["switchkeys", kind.value, str(environment_id), str(revision)]
+        + [quote(part, safe="") for part in parts]
+    )
+
+
+def get_or_render_payload(
+    kind: PayloadKind,
+    environment: ProjectEnvironment,
+    render: Callable[[], Any],
+    *parts: str,
+) -> Any:
+    """
+    Return the cached payload of the environment current revision, or render and cache it.
+
+    ### Attributes
+        - kind (PayloadKind): The rendered payload kind.
+        - environment (ProjectEnvironment): The environment the payload belongs to.
+        - render (Callable): Renders the payload on a cache miss.
+        - parts (str): Extra key parts, e.g. the username of the user features.
+    """
+    cache = get_payload_cache()
+    key = payload_key(kind, environment.id, environment.revision, *parts)
+
+    payload = cache.get(key)
+    if payload is None:
+        payload = render()
+        cache.set(key, payload)
+    return payload
+
+
+async def aget_or_render_payload(
+    kind: PayloadKind,
+    environment: ProjectEnvironment,
+    render: Callable[[], Awaitable[Any]],
+    *parts: str,
+) -> Any:
+    """The async `get_or_render_payload`, the payload is rendered by awaiting `render`."""
+    cache = get_payload_cache()
+    key = payload_key(kind, environment.id, environment.revision, *parts)
+
+    payload = await cache.aget(key)
+    if payload is None:
+        payload = await render()
+        await cache.aset(key, payload)
+    return payload
+
+
+def delete_environment_payloads(
+    environment_id: int, revision: int, *usernames: str
+) -> None:
+    """Delete the environment payloads of a revision, and the payloads of the given users."""
+    keys = [
+        payload_key(PayloadKind.ENVIRONMENT, environment_id, revision),
+        payload_key(PayloadKind.FEATURES, environment_id, revision),
+    ] + [
+        payload_key(PayloadKind.USER_FEATURES, environment_id, revision, username)
+        for username in usernames
+    ]
+    get_payload_cache().delete_many(keys)
+
+
+def invalidate_environment_payloads(
+    environment: ProjectEnvironment, *usernames: str
+) -> None:
+    """
+    Drop the payloads of the previous environment revision, call it after bumping the revision.
+
+    The new revision has its own keys, so this only frees the outdated entries; the user
+    payloads of users not given here expire with the cache timeout.
+    """
+    delete_environment_payloads(environment.id, environment.revision - 1, *usernames)
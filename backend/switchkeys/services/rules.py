@@ -0,0 +1,82 @@
+"""This file contains everything related to the feature targeting rules."""
+
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+
+from switchkeys.models.environments import FeatureRule, GroupSegment
+from switchkeys.models.management import ProjectEnvironment
+from switchkeys.serializers.environments import FeatureRuleSerializer
+from switchkeys.utils.bitmaps import Bitmap
+from switchkeys.utils.cache import LRUCache
+from switchkeys.utils.rules import CompiledRules
+
+# (Environment id, revision) -> the compiled rules of the environment, a change on the rules
+# or on the segments members bumps the revision so an entry never gets stale.
+compiled_rules_cache = LRUCache(
+    max_size=settings.SWITCHKEYS_RULES_CACHE_SIZE,
+    ttl=settings.SWITCHKEYS_RULES_CACHE_TTL,
+)
+
+
+def get_environment_rules(environment: ProjectEnvironment) -> Iterable[FeatureRule]:
+    """Return the rules of the environment, prefetched when serializing whole environments."""
+    return environment.rules.all()
+
+
+def get_rules_segments(
+    environment: ProjectEnvironment, rules: List[dict]
+) -> Iterable[GroupSegment]:
+    """Return the segments of the environment targeted by the serialized rules."""
+    groups = {rule["segment"] for rule in rules if rule["segment"] is not None}
+    if not groups:
+        return GroupSegment.objects.none()
+
+    return GroupSegment.objects.filter(environment=environment, group_id__in=groups)
+
+
+def compile_rules(
+    rules: List[dict], segments: Iterable[GroupSegment] = ()
+) -> CompiledRules:
+    """Compile the serialized rules, with the members of the segments they target."""
+    members: Dict[int, Bitmap] = {
+        segment.group_id: Bitmap(segment.members) for segment in segments
+    }
+    return CompiledRules(rules, members)
+
+
+def serialize_rules(rules: Iterable[FeatureRule]) -> List[dict]:
+    """Return the rules in their serialized form, the one served to the clients."""
+    return [dict(rule) for rule in FeatureRuleSerializer(rules, many=True).data]
+
+
+def serialize_segments(rules: CompiledRules) -> Dict[str, str]:
+    """Return the base64 encoded members of the segments targeted by the compiled rules."""
+    return {str(group): members.encode() for group, members in rules.segments.items()}
+
+
+def get_compiled_rules(environment: ProjectEnvironment) -> CompiledRules:
+    """Return the compiled rules of the environment current revision."""
+    key = (environment.id, environment.revision)
+    compiled = compiled_rules_cache.get(key)
+    if compiled is None:
+        rules = serialize_rules(get_environment_rules(environment))
+        compiled = compile_rules(rules, get_rules_segments(environment, rules))
+        compiled_rules_cache.set(key, compiled)
+    return compiled
+
+
+async def aget_compiled_rules(environment: ProjectEnvironment) -> CompiledRules:
+    """The async `get_compiled_rules`, sharing its cache."""
+    key = (environment.id, environment.revision)
+    compiled = compiled_rules_cache.get(key)
+    if compiled is None:
+        rules = serialize_rules(
+            [rule async for rule in get_environment_rules(environment)]
+        )
+        compiled = compile_rules(
+            rules,
+            [segment async for segment in get_rules_segments(environment, rules)],
+        )
+        compiled_rules_cache.set(key, compiled)
+    return compiled
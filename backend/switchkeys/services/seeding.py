@@ -0,0 +1,245 @@
+"""This file contains everything related to seeding a large synthetic dataset, used to test
+the endpoints at a realistic scale."""
+
+import random
+from itertools import islice
+from typing import Any, Iterable, List, Optional, Sequence, Type
+
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from switchkeys.models.environments import (
+    EnvironmentFeature,
+    SwitchKeysFeature,
+    UserFeature,
+)
+from switchkeys.models.management import (
+    Organization,
+    OrganizationProject,
+    ProjectEnvironment,
+)
+from switchkeys.models.users import (
+    DeviceType,
+    ProjectEnvironmentUser,
+    User,
+    UserDevice,
+)
+from switchkeys.services.environments import (
+    create_environments,
+    is_sparse_feature_storage,
+)
+
+SEED_BATCH_SIZE = 1000
+
+
+def insert_rows(
+    model: Type[models.Model],
+    fields: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    batch_size: int = SEED_BATCH_SIZE,
+) -> int:
+    """
+    Insert rows with `executemany`, for the tables seeded with millions of rows. It skips the
+    model instances `bulk_create` builds for every row, most of its time, so the values are
+    written as they are: give every field without a database default, ready for the database.
+
+    ### Returns
+        - The number of inserted rows.
+    """
+    quote_name = connection.ops.quote_name
+    columns = ", ".join(
+        quote_name(model._meta.get_field(name).column) for name in fields
+    )
+    placeholders = ", ".join(["%s"] * len(fields))
+    sql = f"INSERT INTO {quote_name(model._meta.db_table)} ({columns}) VALUES ({placeholders})"
+
+    count = 0
+    rows = iter(rows)
+    with connection.cursor() as cursor:
+        while batch := list(islice(rows, batch_size)):
+            cursor.executemany(sql, batch)
+            count += len(batch)
+    return count
+
+
+class SeededDataset:
+    """
+    The rows created by `seed_dataset`.
+
+    Attributes:
+        owner (User): The owner of the seeded organizations.
+        organizations (List[Organization]): The seeded organizations.
+        projects (List[OrganizationProject]): The seeded projects.
+        environments (List[ProjectEnvironment]): The three default environments of every project.
+        environment (ProjectEnvironment): The environment holding all the environment users.
+        users (List[ProjectEnvironmentUser]): The seeded environment users.
+    """
+
+    def __init__(
+        self,
+        owner: User,
+        organizations: List[Organization],
+        projects: List[OrganizationProject],
+        environments: List[ProjectEnvironment],
+        users: List[ProjectEnvironmentUser],
+    ):
+        self.owner = owner
+        self.organizations = organizations
+        self.projects = projects
+        self.environments = environments
+        self.environment = environments[0]
+        self.users = users
+
+
+def seed_dataset(
+    owner: User,
+    organizations: int = 1,
+    projects: int = 1,
+    members: int = 5,
+    users: int = 2000,
+    features: int = 200,
+    user_features: Optional[int] = None,
+    seed: Optional[int] = None,
+    batch_size: int = SEED_BATCH_SIZE,
+) -> SeededDataset:
+    """
+    Seed organizations, projects with their default environments, environment users and
+    features using bulk inserts.
+
+    Every environment gets its own features, the users join the first environment with a
+    user feature per environment feature, the way `AddEnvironmentUserAPIView` adds them.
+
+    ### Attributes
+        - owner (User): The owner of the seeded organizations.
+        - organizations (int): The organizations count.
+        - projects (int): The projects count of every organization.
+        - members (int): The members count of every organization.
+        - users (int): The environment users count.
+        - features (int): The features count of every environment.
+        - user_features (int | None): The user features count of every user, all the environment
+          features by default, none with the sparse storage where they are overrides.
+        - seed (int | None): The random seed, the same seed seeds the same values.
+        - batch_size (int): The rows inserted by each bulk query.
+    """
+    generator = random.Random(seed)
+    if user_features is None:
+        user_features = 0 if is_sparse_feature_storage() else features
+
+    with transaction.atomic():
+        seeded_organizations = Organization.objects.bulk_create(
+            Organization(owner=owner, name=f"organization-{index}")
+            for index in range(organizations)
+        )
+
+        seeded_members = User.objects.bulk_create(
+            (
+                User(
+                    email=f"member-{organization.id}-{index}@switchkeys.dev",
+                    first_name="Member",
+                    last_name=str(index),
+                )
+                for organization in seeded_organizations
+                for index in range(members)
+            ),
+            batch_size=batch_size,
+        )
+        Organization.members.through.objects.bulk_create(
+            (
+                Organization.members.through(
+                    organization_id=seeded_organizations[index // members].id,
+                    user_id=member.id,
+                )
+                for index, member in enumerate(seeded_members)
+            ),
+            batch_size=batch_size,
+        )
+
+        seeded_projects = OrganizationProject.objects.bulk_create(
+            OrganizationProject(organization=organization, name=f"project-{index}")
+            for organization in seeded_organizations
+            for index in range(projects)
+        )
+
+        seeded_environments: List[ProjectEnvironment] = []
+        for project in seeded_projects:
+            seeded_environments.extend(create_environments(project).order_by("id"))
+
+        environment_features = EnvironmentFeature.objects.bulk_create(
+            EnvironmentFeature(environment=environment)
+            for environment in seeded_environments
+        )
+
+        seeded_features = SwitchKeysFeature.objects.bulk_create(
+            (
+                SwitchKeysFeature(
+                    environment=environment,
+                    name=f"feature-{index}",
+                    value=value,
+                    initial_value=value,
+                )
+                for environment in seeded_environments
+                for index, value in enumerate(
+                    str(generator.choice([True, False])) for _ in range(features)
+                )
+            ),
+            batch_size=batch_size,
+        )
+        EnvironmentFeature.features.through.objects.bulk_create(
+            (
+                EnvironmentFeature.features.through(
+                    environmentfeature_id=environment_features[index // features].id,
+                    switchkeysfeature_id=feature.id,
+                )
+                for index, feature in enumerate(seeded_features)
+            ),
+            batch_size=batch_size,
+        )
+
+        # Stored lowercased, the way `AddEnvironmentUserAPIView` validates them.
+        devices = [
+            UserDevice.objects.get_or_create(
+                device_type=str(device_type).lower(), version=version
+            )[0]
+            for device_type in (DeviceType.ANDROID, DeviceType.IPHONE)
+            for version in ("1.0", "2.0", "3.0")
+        ]
+        environment = seeded_environments[0]
+        seeded_users = ProjectEnvironmentUser.objects.bulk_create(
+            (
+                ProjectEnvironmentUser(
+                    environment=environment,
+                    username=f"user-{index}",
+                    device=generator.choice(devices),
+                )
+                for index in range(users)
+            ),
+            batch_size=batch_size,
+        )
+        # The largest table by far, users * user features rows.
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        insert_rows(
+            UserFeature,
+            (
+                "user",
+                "feature",
+                "feature_value",
+                "is_override",
+                "revision",
+                "created",
+                "modified",
+            ),
+            (
+                (user.id, feature.id, feature.value, False, 0, now, now)
+                for user in seeded_users
+                for feature in seeded_features[: min(features, user_features)]
+            ),
+            batch_size=batch_size,
+        )
+
+    return SeededDataset(
+        owner=owner,
+        organizations=seeded_organizations,
+        projects=seeded_projects,
+        environments=seeded_environments,
+        users=seeded_users,
+    )
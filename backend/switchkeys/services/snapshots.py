@@ -0,0 +1,148 @@
+"""This file contains everything related to the precomputed environment snapshots."""
+
+from typing import Any, Dict, Optional
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+
+from switchkeys.api.fields import FieldSelection
+from switchkeys.models.environments import EnvironmentSnapshot
+from switchkeys.models.management import (
+    Organization,
+    OrganizationProject,
+    ProjectEnvironment,
+)
+from switchkeys.serializers.environments import ProjectEnvironmentSerializer
+from switchkeys.services.environments import (
+    bump_environments_revision,
+    with_environment_relations,
+)
+from switchkeys.services.payloads import (
+    PayloadKind,
+    aget_or_render_payload,
+    delete_environment_payloads,
+    get_or_render_payload,
+)
+
+
+def build_environment_snapshot(
+    environment: ProjectEnvironment, selection: Optional[FieldSelection] = None
+) -> Dict[str, Any]:
+    """
+    Render the environment document exactly as the `ProjectEnvironmentSerializer` does, or
+    only the fields of the given `?fields=`/`?expand=` selection.
+    """
+    selection = selection or FieldSelection()
+    # Reload the environment with its relations, the given instance may hold outdated ones.
+    environment = with_environment_relations(
+        ProjectEnvironment.objects.filter(id=environment.id), selection
+    ).get()
+    return ProjectEnvironmentSerializer(environment, selection=selection).data
+
+
+def refresh_environment_snapshot(
+    environment: ProjectEnvironment,
+) -> EnvironmentSnapshot:
+    """
+    Regenerate the snapshot of an environment, call it after every write that touches
+    the environment features, the user overrides, or the environment membership.
+
+    ### Attributes
+        - environment (ProjectEnvironment): The environment to regenerate its snapshot.
+
+    ### Returns
+        - The updated `EnvironmentSnapshot` object.
+    """
+    snapshot, _ = EnvironmentSnapshot.objects.update_or_create(
+        environment=environment,
+        defaults={
+            "document": build_environment_snapshot(environment),
+            "revision": environment.revision,
+        },
+    )
+    return snapshot
+
+
+def get_environment_snapshot(environment: ProjectEnvironment) -> Dict[str, Any]:
+    """
+    Return the snapshot document of the environment, the snapshot is (re)built first when it's
+    missing or older than the environment revision.
+    """
+    snapshot = (
+        EnvironmentSnapshot.objects.filter(environment=environment)
+        .values_list("revision", "document")
+        .first()
+    )
+
+    if snapshot is None or snapshot[0] < environment.revision:
+        return refresh_environment_snapshot(environment).document
+    return snapshot[1]
+
+
+async def aget_environment_snapshot(environment: ProjectEnvironment) -> Dict[str, Any]:
+    """
+    The async `get_environment_snapshot`, the snapshot is (re)built in a worker thread since the
+    serializers use the sync ORM.
+    """
+    snapshot = (
+        await EnvironmentSnapshot.objects.filter(environment=environment)
+        .values_list("revision", "document")
+        .afirst()
+    )
+
+    if snapshot is None or snapshot[0] < environment.revision:
+        return (await sync_to_async(refresh_environment_snapshot)(environment)).document
+    return snapshot[1]
+
+
+def get_environment_document(
+    environment: ProjectEnvironment, selection: FieldSelection
+) -> Dict[str, Any]:
+    """
+    Return the environment document of a request, the whole document is served from the payload
+    cache and the snapshot, the documents with selected fields are rendered on demand.
+    """
+    if selection.is_default:
+        return get_or_render_payload(
+            PayloadKind.ENVIRONMENT,
+            environment,
+            lambda: get_environment_snapshot(environment),
+        )
+    return build_environment_snapshot(environment, selection)
+
+
+async def aget_environment_document(
+    environment: ProjectEnvironment, selection: FieldSelection
+) -> Dict[str, Any]:
+    """The async `get_environment_document`."""
+    if selection.is_default:
+        return await aget_or_render_payload(
+            PayloadKind.ENVIRONMENT,
+            environment,
+            lambda: aget_environment_snapshot(environment),
+        )
+    return await sync_to_async(build_environment_snapshot)(environment, selection)
+
+
+def invalidate_environment_snapshots(environments: QuerySet) -> None:
+    """
+    Drop the snapshots of the given environments and bump their revision, they will be
+    regenerated on the next read. Used when a change outside of the environment (e.g. the
+    project or the organization) is embedded in the environment document.
+    """
+    for environment_id, revision in environments.values_list("id", "revision"):
+        delete_environment_payloads(environment_id, revision)
+
+    EnvironmentSnapshot.objects.filter(environment__in=environments).delete()
+    bump_environments_revision(environments)
+
+
+def invalidate_project_snapshots(project: OrganizationProject) -> None:
+    """Drop the snapshots of all environments of a project."""
+    invalidate_environment_snapshots(ProjectEnvironment.objects.filter(project=project))
+
+
+def invalidate_organization_snapshots(organization: Organization) -> None:
+    """Drop the snapshots of all environments of all projects of an organization."""
+    invalidate_environment_snapshots(
+        ProjectEnvironment.objects.filter(project__organization=organization)
+    )
@@ -0,0 +1,173 @@
+"""This file contains everything related to streaming the environment changes to the clients."""
+
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from switchkeys.models.management import ProjectEnvironment
+from switchkeys.services.changes import (
+    record_environment_change_event,
+    record_environments_change_events,
+)
+
+
+class EnvironmentEvent:
+    """
+    Represents a change on an environment pushed to the stream subscribers.
+
+    Attributes:
+        id (int): The environment revision of the change, used as the SSE event id.
+        event (str): The event name, e.g. `feature.updated`.
+        data (Dict[str, Any]): The compact event payload.
+    """
+
+    def __init__(self, id: int, event: str, data: Dict[str, Any]):
+        self.id = id
+        self.event = event
+        self.data = data
+
+    def encode(self) -> str:
+        """Encode the event in the Server-Sent Events format."""
+        return f"id: {self.id}\nevent: {self.event}\ndata: {json.dumps(self.data, separators=(',', ':'))}\n\n"
+
+
+class EnvironmentBroadcaster:
+    """
+    In-process broadcaster of the environment events.
+
+    Publishers may run in any thread (the sync views), each subscriber receives the events on the
+    asyncio loop it subscribed from. The last events of each environment are kept, so a client
+    reconnecting with its last event id can resume without missing any change.
+    """
+
+    def __init__(self, backlog: int):
+        self.__backlog = backlog
+        self.__lock = threading.Lock()
+        self.__events: Dict[str, Deque[EnvironmentEvent]] = {}
+        self.__subscribers: Dict[
+            str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]
+        ] = {}
+
+    def publish(self, environment_key: str, event: EnvironmentEvent) -> None:
+        """Store the event in the environment backlog and push it to its subscribers."""
+        with self.__lock:
+            self.__events.setdefault(
+                environment_key, deque(maxlen=self.__backlog)
+            ).append(event)
+            subscribers = list(self.__subscribers.get(environment_key, ()))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # The subscriber loop is closed, the connection is already gone.
+                self.unsubscribe(environment_key, (loop, queue))
+
+    def subscribe(
+        self, environment_key: str
+    ) -> Tuple[asyncio.AbstractEventLoop, asyncio.Queue]:
+        """Subscribe the running loop to the environment events."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self.__lock:
+            self.__subscribers.setdefault(environment_key, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(
+        self,
+        environment_key: str,
+        subscriber: Tuple[asyncio.AbstractEventLoop, asyncio.Queue],
+    ) -> None:
+        """Stop pushing the environment events to the subscriber."""
+        with self.__lock:
+            subscribers = self.__subscribers.get(environment_key, set())
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self.__subscribers.pop(environment_key, None)
+
+    def events_after(
+        self, environment_key: str, last_event_id: int
+    ) -> Tuple[bool, List[EnvironmentEvent]]:
+        """
+        Return the backlog events newer than the last event id, only called when the environment
+        revision is newer than the last event id.
+
+        ### Returns
+            - A tuple of `(complete, events)`, `complete` is False when the backlog doesn't hold
+              the event following the last one, e.g. it has been dropped or published by another
+              process, and the client has to resync.
+        """
+        with self.__lock:
+            events = list(self.__events.get(environment_key, ()))
+
+        newer = [event for event in events if event.id > last_event_id]
+        complete = bool(newer) and newer[0].id == last_event_id + 1
+        return complete, newer
+
+
+broadcaster = EnvironmentBroadcaster(backlog=settings.SWITCHKEYS_STREAM_BACKLOG)
+
+
+def publish_environment_event(
+    environment: ProjectEnvironment, event: str, **data: Any
+) -> None:
+    """
+    Record a change on an environment in the change feed, and publish it to the streams once
+    the current transaction is committed.
+
+    ### Attributes
+        - environment (ProjectEnvironment): The changed environment, with its new revision.
+        - event (str): The event name, e.g. `feature.updated`.
+        - data (Any): The event payload, keep it small.
+    """
+    environment_key = str(environment.environment_key)
+    payload = {"revision": environment.revision, **data}
+    environment_event = EnvironmentEvent(environment.revision, event, payload)
+    record_environment_change_event(environment, event, **payload)
+    transaction.on_commit(
+        lambda: broadcaster.publish(environment_key, environment_event)
+    )
+
+
+def publish_environments_deleted(
+    environments: Iterable[ProjectEnvironment], organization_id: int
+) -> None:
+    """
+    Record the deletion of the environments of a deleted project or organization, one event per
+    environment, and close their streams once the current transaction is committed.
+
+    ### Attributes
+        - environments (Iterable[ProjectEnvironment]): The environments being deleted.
+        - organization_id (int): The organization of the environments.
+    """
+    environments = list(environments)
+    if not environments:
+        return
+
+    # The rows are deleted, the next revision is only seen by the deletion events.
+    for environment in environments:
+        environment.revision += 1
+    record_environments_change_events(
+        environments, organization_id, "environment.deleted"
+    )
+    events = [
+        (
+            str(environment.environment_key),
+            EnvironmentEvent(
+                environment.revision,
+                "environment.deleted",
+                {"revision": environment.revision},
+            ),
+        )
+        for environment in environments
+    ]
+
+    def publish():
+        for environment_key, environment_event in events:
+            broadcaster.publish(environment_key, environment_event)
+
+    transaction.on_commit(publish)
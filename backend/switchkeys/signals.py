@@ -0,0 +1,14 @@
+"""Signal receivers keeping the process-local caches in sync with the database."""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from switchkeys.models.management import ProjectEnvironment
+from switchkeys.services.environments import environment_key_cache
+
+
+@receiver(post_save, sender=ProjectEnvironment)
+@receiver(post_delete, sender=ProjectEnvironment)
+def evict_environment_key(sender, instance: ProjectEnvironment, **kwargs) -> None:
+    """Drop the environment from the key resolution cache when it's saved or deleted."""
+    environment_key_cache.delete(str(instance.environment_key))
@@ -0,0 +1,76 @@
+from typing import Any, Dict, Optional
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from switchkeys.models.users import User
+from switchkeys.services.environments import environment_key_cache
+from switchkeys.services.rules import compiled_rules_cache
+from switchkeys.services.seeding import SeededDataset, seed_dataset
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Base test case asserting the maximum number of SQL queries of the endpoints, on a dataset
+    seeded once per test case.
+
+    The budgets are measured with cold caches, lower a budget when a change removes queries and
+    never raise it to make a test pass without understanding where the new queries come from.
+    """
+
+    ORGANIZATIONS = 2
+    PROJECTS = 2
+    MEMBERS = 10
+    USERS = 2000
+    FEATURES = 100
+    USER_FEATURES = 5
+
+    dataset: SeededDataset
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_superuser("owner@switchkeys.dev", "password")
+        cls.dataset = seed_dataset(
+            owner,
+            organizations=cls.ORGANIZATIONS,
+            projects=cls.PROJECTS,
+            members=cls.MEMBERS,
+            users=cls.USERS,
+            features=cls.FEATURES,
+            user_features=cls.USER_FEATURES,
+            seed=1,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.dataset.owner)
+
+        # Every request is measured cold, the caches must not hide the queries.
+        environment_key_cache.clear()
+        compiled_rules_cache.clear()
+        caches["switchkeys"].clear()
+
+    def assertQueryBudget(
+        self,
+        budget: int,
+        method: str,
+        path: str,
+        data: Optional[Dict[str, Any]] = None,
+        status_code: int = 200,
+    ) -> Response:
+        """Send the request and assert it succeeded within the queries budget."""
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(path, data, format="json")
+
+        self.assertEqual(response.status_code, status_code, response.content[:500])
+        self.assertLessEqual(
+            len(context),
+            budget,
+            f"{method.upper()} {path} ran {len(context)} queries, the budget is {budget}:\n"
+            + "\n".join(query["sql"] for query in context.captured_queries),
+        )
+        return response
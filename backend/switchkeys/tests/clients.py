@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+from typing import Any
+
+from django.conf import settings
+
+# The Python client, its package has the same name as the backend app.
+CLIENT_PATH = settings.BASE_DIR / "clients" / "python"
+
+
+def run_client(script: str, data: Any) -> Any:
+    """
+    Run a script on the Python client in a subprocess, to check it evaluates the same way as the
+    backend. The script reads the `data` and sets the `result`, both sent as JSON.
+    """
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import json, sys\ndata = json.load(sys.stdin)\n{script}\n"
+            "json.dump(result, sys.stdout)",
+        ],
+        input=json.dumps(data),
+        capture_output=True,
+        text=True,
+        cwd=CLIENT_PATH,
+        env={**os.environ, "PYTHONPATH": str(CLIENT_PATH)},
+    )
+    if completed.returncode:
+        raise AssertionError(f"The Python client failed:\n{completed.stderr}")
+    return json.loads(completed.stdout)
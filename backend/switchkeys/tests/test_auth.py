@@ -0,0 +1,44 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from switchkeys.tests.base import QueryBudgetTestCase
+
+
+class AuthQueryBudgetTests(QueryBudgetTestCase):
+    """Query budgets of the `switchkeys/urls/auth.py` endpoints."""
+
+    def test_signup(self):
+        self.assertQueryBudget(
+            2,
+            "post",
+            "/api/auth/signup/",
+            {
+                "first_name": "New",
+                "last_name": "User",
+                "email": "new-user@switchkeys.dev",
+                "password": "password",
+            },
+            status_code=201,
+        )
+
+    def test_login(self):
+        self.client.force_authenticate(None)
+        self.assertQueryBudget(
+            3,
+            "post",
+            "/api/auth/login/",
+            {"email": "owner@switchkeys.dev", "password": "password"},
+        )
+
+    def test_token_refresh(self):
+        refresh = RefreshToken.for_user(self.dataset.owner)
+        self.assertQueryBudget(
+            2, "post", "/api/auth/token/refresh/", {"refresh": str(refresh)}
+        )
+
+    def test_change_password(self):
+        self.assertQueryBudget(
+            1,
+            "put",
+            "/api/auth/change-password/",
+            {"old_password": "password", "new_password": "new-password"},
+        )
@@ -0,0 +1,96 @@
+import base64
+
+from django.test import SimpleTestCase
+
+from switchkeys.tests.clients import run_client
+from switchkeys.utils.bitmaps import Bitmap
+
+# The bits around the byte boundaries, and a sparse one far away.
+ORDINALS = [0, 7, 8, 15, 16, 63, 64, 1000]
+
+
+def build_bitmap(ordinals):
+    """Return a bitmap holding the ordinals."""
+    members = Bitmap()
+    for ordinal in ordinals:
+        members.add(ordinal)
+    return members
+
+
+class BitmapTests(SimpleTestCase):
+    """The segments members bitmap of `switchkeys/utils/bitmaps.py`."""
+
+    def test_add(self):
+        members = build_bitmap(ORDINALS)
+        self.assertEqual(
+            [ordinal for ordinal in range(1100) if ordinal in members], ORDINALS
+        )
+        self.assertEqual(len(members), len(ORDINALS))
+        # The bit `n % 8` of the byte `n // 8`.
+        self.assertEqual(members.to_bytes()[:3], bytes([0b10000001, 0b10000001, 1]))
+        self.assertEqual(len(members.to_bytes()), 1000 // 8 + 1)
+
+        members.add(8)
+        self.assertEqual(len(members), len(ORDINALS))
+
+    def test_discard(self):
+        members = build_bitmap(ORDINALS)
+        members.discard(8)
+        members.discard(9)
+        members.discard(5000)
+        self.assertNotIn(8, members)
+        self.assertIn(7, members)
+        self.assertIn(15, members)
+        self.assertEqual(len(members), len(ORDINALS) - 1)
+
+        # The trailing empty bytes are not kept.
+        members.discard(1000)
+        self.assertEqual(len(members.to_bytes()), 64 // 8 + 1)
+        for ordinal in ORDINALS:
+            members.discard(ordinal)
+        self.assertEqual(members.to_bytes(), b"")
+        self.assertEqual(len(members), 0)
+
+    def test_contains_out_of_range(self):
+        members = build_bitmap([3])
+        self.assertNotIn(8, members)
+        self.assertNotIn(10_000, members)
+        self.assertNotIn(0, Bitmap())
+
+    def test_encode(self):
+        members = build_bitmap(ORDINALS)
+        self.assertEqual(base64.b64decode(members.encode()), members.to_bytes())
+        decoded = Bitmap.decode(members.encode())
+        self.assertEqual(
+            [ordinal for ordinal in range(1100) if ordinal in decoded], ORDINALS
+        )
+        self.assertEqual(Bitmap().encode(), "")
+        self.assertEqual(len(Bitmap.decode("")), 0)
+        self.assertIn(10, Bitmap.decode("AAQ="))
+
+
+class BitmapClientParityTests(SimpleTestCase):
+    """The Python client decodes the bitmaps encoded by the backend the same way."""
+
+    def test_decode_parity(self):
+        segments = {
+            "1": build_bitmap(ORDINALS).encode(),
+            "2": build_bitmap(range(0, 300, 3)).encode(),
+            "3": Bitmap().encode(),
+        }
+        result = run_client(
+            "from switchkeys.utils.bitmaps import decode_segments\n"
+            "result = {\n"
+            "    group: [len(members), [n for n in range(1100) if n in members]]\n"
+            "    for group, members in decode_segments(data).items()\n"
+            "}",
+            segments,
+        )
+        expected = {}
+        for group, value in segments.items():
+            members = Bitmap.decode(value)
+            expected[group] = [
+                len(members),
+                [ordinal for ordinal in range(1100) if ordinal in members],
+            ]
+        self.assertEqual(result, expected)
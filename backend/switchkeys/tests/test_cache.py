@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from switchkeys.utils.cache import LRUCache
+
+
+class LRUCacheTests(SimpleTestCase):
+    """The process-local cache of `switchkeys/utils/cache.py`."""
+
+    def test_get(self):
+        cache = LRUCache(max_size=2, ttl=60)
+        self.assertIsNone(cache.get("first"))
+        cache.set("first", 1)
+        self.assertEqual(cache.get("first"), 1)
+        self.assertEqual(cache.stats(), {"size": 1, "hits": 1, "misses": 1})
+
+    def test_evict_least_recently_used(self):
+        cache = LRUCache(max_size=2, ttl=60)
+        cache.set("first", 1)
+        cache.set("second", 2)
+        # Read last, the first entry is now the most recently used.
+        cache.get("first")
+        cache.set("third", 3)
+        self.assertIsNone(cache.get("second"))
+        self.assertEqual(cache.get("first"), 1)
+        self.assertEqual(cache.get("third"), 3)
+
+    def test_expire(self):
+        cache = LRUCache(max_size=2, ttl=5)
+        with mock.patch("switchkeys.utils.cache.time.monotonic", return_value=100):
+            cache.set("first", 1)
+        with mock.patch("switchkeys.utils.cache.time.monotonic", return_value=104):
+            self.assertEqual(cache.get("first"), 1)
+        with mock.patch("switchkeys.utils.cache.time.monotonic", return_value=106):
+            self.assertIsNone(cache.get("first"))
+        self.assertEqual(cache.stats(), {"size": 0, "hits": 1, "misses": 1})
+
+    def test_delete_and_clear(self):
+        cache = LRUCache(max_size=2, ttl=60)
+        cache.set("first", 1)
+        cache.set("second", 2)
+        cache.delete("first")
+        cache.delete("missing")
+        self.assertIsNone(cache.get("first"))
+        cache.clear()
+        self.assertIsNone(cache.get("second"))
+        # The counters are kept.
+        self.assertEqual(cache.stats(), {"size": 0, "hits": 0, "misses": 2})
+
+    def test_disabled(self):
+        cache = LRUCache(max_size=0, ttl=60)
+        cache.set("first", 1)
+        self.assertIsNone(cache.get("first"))
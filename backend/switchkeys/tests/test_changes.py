@@ -0,0 +1,205 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from switchkeys.models.changes import ChangeEvent
+from switchkeys.models.management import Organization
+from switchkeys.models.users import User
+from switchkeys.services.changes import record_change_event
+from switchkeys.tests.base import QueryBudgetTestCase
+
+
+class ChangesQueryBudgetTests(QueryBudgetTestCase):
+    """Query budgets of the `switchkeys/urls/changes.py` endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.project = cls.dataset.projects[0]
+        ChangeEvent.objects.bulk_create(
+            ChangeEvent(
+                sequence=sequence,
+                event="feature.updated",
+                organization_id=cls.project.organization_id,
+                project_id=cls.project.id,
+                data={"name": f"feature-{sequence}"},
+            )
+            for sequence in range(1, 2501)
+        )
+
+    def record_event(self, sequence):
+        ChangeEvent.objects.create(
+            sequence=sequence,
+            event="feature.updated",
+            organization_id=self.project.organization_id,
+        )
+
+    def test_get_changes(self):
+        # The feed is read by pages of two queries, the recent sequences then the page,
+        # whatever their size.
+        response = self.assertQueryBudget(2, "get", "/api/changes/?limit=2000")
+        results = response.json()["results"]
+        self.assertEqual(len(results["events"]), 2000)
+        self.assertEqual(results["next"], 2000)
+        self.assertTrue(results["has_more"])
+
+        response = self.assertQueryBudget(
+            2, "get", f"/api/changes/?after={results['next']}&limit=2000"
+        )
+        results = response.json()["results"]
+        self.assertEqual(
+            [event["sequence"] for event in results["events"]],
+            list(range(2001, 2501)),
+        )
+        self.assertFalse(results["has_more"])
+
+    def test_get_changes_of_mutation(self):
+        self.client.put(
+            f"/api/projects/{self.project.id}/",
+            {
+                "name": "renamed-project",
+                "organization_id": self.project.organization_id,
+            },
+            format="json",
+        )
+        # And the check of the project filter.
+        response = self.assertQueryBudget(
+            3, "get", f"/api/changes/?after=2500&project={self.project.id}"
+        )
+        events = response.json()["results"]["events"]
+        self.assertEqual(
+            [(event["sequence"], event["event"]) for event in events],
+            [(2501, "project.updated")],
+        )
+
+    def test_get_changes_after_uncommitted(self):
+        # 2501 is still written by a transaction, or has been rolled back.
+        self.record_event(2502)
+        response = self.client.get("/api/changes/?after=2500")
+        results = response.json()["results"]
+        self.assertEqual(results["events"], [])
+        self.assertEqual(results["next"], 2500)
+
+        # Committed after the later one.
+        self.record_event(2501)
+        response = self.client.get("/api/changes/?after=2500")
+        self.assertEqual(
+            [event["sequence"] for event in response.json()["results"]["events"]],
+            [2501, 2502],
+        )
+
+    def test_get_changes_after_rolled_back(self):
+        self.record_event(2502)
+        ChangeEvent.objects.filter(sequence=2502).update(
+            created=timezone.now() - timedelta(minutes=5)
+        )
+
+        # The missing sequence is older than the settle time, it's skipped.
+        response = self.client.get("/api/changes/?after=2500")
+        self.assertEqual(
+            [event["sequence"] for event in response.json()["results"]["events"]],
+            [2502],
+        )
+
+    def test_get_changes_of_project_deletion(self):
+        environments = {
+            str(environment.environment_key)
+            for environment in self.dataset.environments
+            if environment.project_id == self.project.id
+        }
+        self.client.delete(f"/api/projects/{self.project.id}/")
+
+        # The project is gone, its changes are read from the organization ones.
+        response = self.client.get(
+            f"/api/changes/?after=2500&project={self.project.id}"
+        )
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(
+            f"/api/changes/?after=2500&organization={self.project.organization_id}"
+        )
+        events = response.json()["results"]["events"]
+        self.assertEqual(events[0]["event"], "project.deleted")
+        # One event per environment, read by the environment feeds.
+        self.assertEqual(
+            {event["environment_key"] for event in events[1:]}, environments
+        )
+        self.assertEqual(
+            {event["event"] for event in events[1:]}, {"environment.deleted"}
+        )
+
+    def test_get_changes_of_organization_deletion(self):
+        organization = self.dataset.organizations[1]
+        environments = {
+            str(environment.environment_key)
+            for environment in self.dataset.environments
+            if environment.project.organization_id == organization.id
+        }
+        self.client.delete(f"/api/organizations/{organization.id}/")
+
+        events = list(
+            ChangeEvent.objects.filter(organization_id=organization.id)
+            .order_by("sequence")
+            .values("event", "environment_key")
+        )
+        self.assertEqual(
+            [event["event"] for event in events],
+            ["organization.deleted"] + ["environment.deleted"] * len(environments),
+        )
+        self.assertEqual(
+            {str(event["environment_key"]) for event in events[1:]}, environments
+        )
+
+        # Nobody owns the organization anymore, its changes are not readable.
+        response = self.client.get(
+            f"/api/changes/?after=2500&organization={organization.id}"
+        )
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get("/api/changes/?after=2500")
+        self.assertEqual(response.json()["results"]["events"], [])
+
+    def test_get_changes_of_other_organizations(self):
+        other = User.objects.create_user("other@switchkeys.dev", "password")
+        organization = Organization.objects.create(owner=other, name="other")
+        self.client.post("/api/organizations/", {"name": "owned"}, format="json")
+        record_change_event(
+            "organization.created",
+            organization_id=organization.id,
+            name=organization.name,
+        )
+
+        # The events of an organization the user neither owns nor is a member of.
+        response = self.client.get("/api/changes/?after=2500")
+        self.assertEqual(
+            [event["event"] for event in response.json()["results"]["events"]],
+            ["organization.created"],
+        )
+        self.assertNotEqual(
+            response.json()["results"]["events"][0]["organization_id"],
+            organization.id,
+        )
+        response = self.client.get(f"/api/changes/?organization={organization.id}")
+        self.assertEqual(response.status_code, 404)
+
+        client = APIClient()
+        client.force_authenticate(other)
+        response = client.get("/api/changes/")
+        self.assertEqual(
+            [
+                (event["event"], event["organization_id"])
+                for event in response.json()["results"]["events"]
+            ],
+            [("organization.created", organization.id)],
+        )
+        for filters in (
+            f"organization={self.project.organization_id}",
+            f"project={self.project.id}",
+            f"environment={self.dataset.environment.environment_key}",
+        ):
+            response = client.get(f"/api/changes/?{filters}")
+            self.assertEqual(response.status_code, 404, filters)
+
+        # A member reads the events of the organization.
+        organization.members.add(self.dataset.owner)
+        response = self.client.get(f"/api/changes/?organization={organization.id}")
+        self.assertEqual(len(response.json()["results"]["events"]), 1)
@@ -0,0 +1,1251 @@
+import asyncio
+import json
+from io import StringIO
+
+import msgpack
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management import call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.test import AsyncRequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from switchkeys.models.environments import EnvironmentSnapshot, UserFeature
+from switchkeys.models.management import ProjectEnvironment
+from switchkeys.services.environments import (
+    bump_environment_revision,
+    environment_key_cache,
+    get_environment_by_key,
+    get_environment_feature,
+    get_environment_features,
+)
+from switchkeys.services.fanout import complete_fan_out
+from switchkeys.services.payloads import PayloadKind, get_payload_cache, payload_key
+from switchkeys.services.rules import compiled_rules_cache
+from switchkeys.services.snapshots import build_environment_snapshot
+from switchkeys.tests.base import QueryBudgetTestCase
+from switchkeys.tests.clients import run_client
+from switchkeys.utils.rollouts import is_in_rollout
+from switchkeys.views.sdk import AsyncEnvironmentUserFeaturesView
+from switchkeys.views.streams import EnvironmentStreamView
+
+
+class EnvironmentsQueryBudgetTests(QueryBudgetTestCase):
+    """Query budgets of the `switchkeys/urls/environments.py` endpoints."""
+
+    def setUp(self):
+        super().setUp()
+        self.environment = self.dataset.environment
+        self.key = self.environment.environment_key
+        self.username = self.dataset.users[0].username
+        self.url = f"/api/environments/key/{self.key}"
+
+    def test_list_environments(self):
+        self.assertQueryBudget(8, "get", "/api/environments/")
+
+    def test_create_environment(self):
+        self.assertQueryBudget(
+            16,
+            "post",
+            "/api/environments/",
+            {"name": "qa", "project_id": self.environment.project_id},
+        )
+
+    def test_get_environment(self):
+        self.assertQueryBudget(15, "get", f"/api/environments/{self.environment.id}/")
+
+    def test_update_environment(self):
+        self.assertQueryBudget(
+            23,
+            "put",
+            f"/api/environments/{self.environment.id}/",
+            {"name": "qa", "project_id": self.environment.project_id},
+            status_code=201,
+        )
+
+    def test_delete_environment(self):
+        # The environment users are deleted with it, by batches of 100 rows on SQLite.
+        self.assertQueryBudget(
+            54,
+            "delete",
+            f"/api/environments/{self.environment.id}/",
+            status_code=204,
+        )
+
+    def test_get_environment_by_key(self):
+        self.assertQueryBudget(15, "get", f"{self.url}/")
+
+    def test_get_environment_by_key_cached(self):
+        key = str(self.key)
+        self.assertEqual(get_environment_by_key(key).id, self.environment.id)
+        hits = environment_key_cache.stats()["hits"]
+        with self.assertNumQueries(0):
+            environment = get_environment_by_key(key)
+        self.assertEqual(environment_key_cache.stats()["hits"], hits + 1)
+
+        # Every call gets its own copy, the cached row can't be altered.
+        environment.name = "altered"
+        self.assertEqual(get_environment_by_key(key).name, self.environment.name)
+
+        # Saving or deleting the environment evicts it.
+        self.environment.name = "renamed"
+        self.environment.save()
+        self.assertEqual(get_environment_by_key(key).name, "renamed")
+        self.environment.delete()
+        self.assertIsNone(get_environment_by_key(key))
+
+    def test_serialize_environment_queries(self):
+        other = self.dataset.environments[1]
+        self.client.put(
+            f"/api/environments/key/{other.environment_key}/add-users/",
+            {
+                "users": [
+                    {
+                        "username": f"new-user-{index}",
+                        "device": {"device_type": "iphone", "version": "4.0"},
+                    }
+                    for index in range(2)
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(other.users.count(), 2)
+
+        def count_queries(render, environment):
+            # Rendered from scratch, not from the snapshot or the cached payload.
+            EnvironmentSnapshot.objects.all().delete()
+            compiled_rules_cache.clear()
+            get_payload_cache().clear()
+            with CaptureQueriesContext(connection) as context:
+                render(environment)
+            return len(context)
+
+        # The same queries for 2 users and for 2000 users with their features.
+        for render in (
+            build_environment_snapshot,
+            lambda environment: self.client.get(f"/api/environments/{environment.id}/"),
+        ):
+            self.assertEqual(
+                count_queries(render, other), count_queries(render, self.environment)
+            )
+
+    def test_get_environment_by_key_snapshot(self):
+        self.client.get(f"{self.url}/")
+        snapshot = EnvironmentSnapshot.objects.get(environment=self.environment)
+        self.assertEqual(snapshot.revision, self.environment.revision)
+
+        # A write rebuilds the snapshot, the key endpoint serves it as it is.
+        self.client.put(
+            f"{self.url}/users/{self.username}/features/set/",
+            {"name": "feature-0", "value": "snapshot"},
+            format="json",
+        )
+        self.environment.refresh_from_db()
+        snapshot.refresh_from_db()
+        self.assertEqual(snapshot.revision, self.environment.revision)
+        self.assertEqual(
+            snapshot.document,
+            json.loads(
+                json.dumps(
+                    build_environment_snapshot(self.environment), cls=DjangoJSONEncoder
+                )
+            ),
+        )
+        # Only the environment and its snapshot row, nothing is serialized again.
+        response = self.assertQueryBudget(3, "get", f"{self.url}/")
+        self.assertEqual(response.json()["results"], snapshot.document)
+
+        [user] = [
+            user
+            for user in snapshot.document["users"]
+            if user["username"] == self.username
+        ]
+        self.assertIn(
+            ("feature-0", "snapshot"),
+            [(feature["name"], feature["value"]) for feature in user["features"]],
+        )
+
+    def test_get_environment_by_key_msgpack(self):
+        # Rendered from the same cached document as the JSON response.
+        expected = self.client.get(f"{self.url}/").json()
+        self.client.credentials(HTTP_ACCEPT="application/msgpack")
+        response = self.assertQueryBudget(1, "get", f"{self.url}/")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content), expected)
+
+    def test_get_environment_by_key_not_modified(self):
+        etag = self.client.get(f"{self.url}/")["ETag"]
+        self.client.credentials(HTTP_IF_NONE_MATCH=etag)
+        # At most the environment lookup, the document is neither read nor rendered.
+        response = self.assertQueryBudget(1, "get", f"{self.url}/", status_code=304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertIn("Accept", response["Vary"])
+
+        # A new revision is a new representation.
+        bump_environment_revision(self.environment)
+        response = self.client.get(f"{self.url}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_get_user_features_not_modified(self):
+        url = f"{self.url}/users/{self.username}/features/"
+        etag = self.client.get(url)["ETag"]
+        # The client may send the tags of several representations it has.
+        for if_none_match in (etag, f'"0", {etag}', "*"):
+            self.client.credentials(HTTP_IF_NONE_MATCH=if_none_match)
+            response = self.assertQueryBudget(1, "get", url, status_code=304)
+            self.assertEqual(response["ETag"], etag)
+            self.assertFalse(response.content)
+
+        # Any write on the environment is a new representation, even for another user.
+        self.client.credentials(HTTP_IF_NONE_MATCH=etag)
+        self.client.put(
+            f"{self.url}/users/{self.dataset.users[1].username}/features/set/",
+            {"name": "feature-0", "value": "false"},
+            format="json",
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_writes_bump_revision(self):
+        username = self.dataset.users[1].username
+        writes = [
+            ("post", "features/", {"name": "new-feature", "value": "true"}),
+            (
+                "put",
+                "features/update/new-feature/",
+                {"name": "new-feature", "value": "false"},
+            ),
+            ("delete", "features/delete/new-feature/", None),
+            (
+                "put",
+                "add-user/",
+                {
+                    "username": "new-user",
+                    "device": {"device_type": "android", "version": "1.0"},
+                },
+            ),
+            ("put", "remove-user/", {"username": "new-user"}),
+            (
+                "put",
+                f"users/{username}/features/set/",
+                {"name": "feature-0", "value": "false"},
+            ),
+            ("delete", f"users/{username}/features/delete/feature-0/", None),
+        ]
+        for method, path, data in writes:
+            revision = self.environment.revision
+            response = getattr(self.client, method)(
+                f"{self.url}/{path}", data, format="json"
+            )
+            self.assertLess(response.status_code, 300, path)
+            self.environment.refresh_from_db()
+            self.assertEqual(self.environment.revision, revision + 1, path)
+
+    def test_get_environment_by_key_etag_variants(self):
+        etag = self.client.get(f"{self.url}/")["ETag"]
+        self.client.credentials(HTTP_IF_NONE_MATCH=etag)
+
+        # The other representations of the same revision are not the cached one.
+        response = self.client.get(f"{self.url}/?fields=environment_key")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        self.client.credentials(
+            HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT="application/msgpack"
+        )
+        response = self.client.get(f"{self.url}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_get_environment_fields(self):
+        # Only the environment row, the project and the users are never loaded.
+        response = self.assertQueryBudget(
+            2, "get", f"{self.url}/?fields=environment_key,project.name"
+        )
+        self.assertEqual(
+            response.json()["results"],
+            {
+                "environment_key": str(self.key),
+                "project": {"name": self.environment.project.name},
+            },
+        )
+
+    def test_get_environment_collapsed(self):
+        response = self.assertQueryBudget(5, "get", f"{self.url}/?expand=")
+        self.assertEqual(
+            response.json()["results"]["project"], self.environment.project_id
+        )
+
+    def test_list_environments_fields(self):
+        # The page and its count.
+        response = self.assertQueryBudget(
+            2, "get", "/api/environments/?fields=id,environment_key"
+        )
+        self.assertEqual(set(response.json()["results"][0]), {"id", "environment_key"})
+        self.assertEqual(response.json()["count"], len(self.dataset.environments))
+
+    def test_get_environment_by_malformed_key(self):
+        # Rejected before any query.
+        self.assertQueryBudget(
+            0, "get", "/api/environments/key/not-a-key/", status_code=400
+        )
+
+    def test_delete_environment_by_key(self):
+        # The environment users are deleted with it, by batches of 100 rows on SQLite.
+        self.assertQueryBudget(54, "delete", f"{self.url}/", status_code=204)
+
+    def test_add_user(self):
+        self.assertQueryBudget(
+            29,
+            "put",
+            f"{self.url}/add-user/",
+            {
+                "username": "new-user",
+                "device": {"device_type": "android", "version": "1.0"},
+            },
+        )
+
+    def test_add_users(self):
+        users = [
+            {
+                "username": f"new-user-{index}",
+                "device": {"device_type": "iphone", "version": "4.0"},
+            }
+            for index in range(500)
+        ] + [
+            {
+                "username": self.dataset.users[0].username,
+                "device": {"device_type": "android", "version": "1.0"},
+            }
+        ]
+        users += [
+            {
+                "username": "new-user-0",
+                "device": {"device_type": "android", "version": "5.0"},
+            },
+            {
+                "username": "invalid-device",
+                "device": {"device_type": "windows", "version": "1.0"},
+            },
+        ]
+        # The user features are inserted by batches, SQLite caps their size to 999 parameters.
+        response = self.assertQueryBudget(
+            385, "put", f"{self.url}/add-users/", {"users": users}
+        )
+
+        results = response.json()["results"]
+        self.environment.refresh_from_db()
+        self.assertEqual(results["revision"], self.environment.revision)
+        self.assertEqual(results["revision"], 1)
+        self.assertEqual(
+            [result["status"] for result in results["results"]],
+            ["created"] * 500 + ["updated", "created", "failed"],
+        )
+        self.assertIn("invalid device type", results["results"][-1]["message"])
+        self.assertFalse(self.environment.users.filter(username="invalid-device"))
+
+        # A username sent twice is created once, with its last device.
+        added = self.environment.users.filter(username__startswith="new-user-")
+        self.assertEqual(added.count(), 500)
+        device = added.get(username="new-user-0").device
+        self.assertEqual((device.device_type, device.version), ("android", "5.0"))
+        # The user already on the environment keeps its device.
+        user = self.environment.users.get(username=self.dataset.users[0].username)
+        self.assertEqual(user.device_id, self.dataset.users[0].device_id)
+
+        # The new users get the environment features with the environment values.
+        features = dict(
+            get_environment_features(self.environment).values_list("name", "value")
+        )
+        user_features = UserFeature.objects.filter(user__in=added)
+        self.assertEqual(user_features.count(), 500 * len(features))
+        self.assertEqual(set(user_features.values_list("revision", flat=True)), {1})
+        self.assertEqual(
+            {
+                (name, value)
+                for name, value in user_features.values_list(
+                    "feature__name", "feature_value"
+                )
+            },
+            set(features.items()),
+        )
+
+    def test_remove_user(self):
+        self.assertQueryBudget(
+            25, "put", f"{self.url}/remove-user/", {"username": self.username}
+        )
+
+    def test_prune_tombstones(self):
+        self.client.delete(f"{self.url}/features/delete/feature-1/")
+        self.environment.refresh_from_db()
+        since = self.environment.revision
+        self.client.delete(f"{self.url}/features/delete/feature-2/")
+        self.environment.refresh_from_db()
+        revision = self.environment.revision
+
+        call_command("prune_tombstones", "--days", "0", stdout=StringIO())
+        self.assertFalse(self.environment.tombstones.exists())
+
+        # The deletion can't be sent anymore, the client has to sync it all again.
+        response = self.client.get(f"{self.url}/changes/?since={since}")
+        self.assertEqual(response.status_code, 410)
+        response = self.client.get(f"{self.url}/changes/?since=0")
+        self.assertNotIn(
+            "feature-2",
+            [feature["name"] for feature in response.json()["results"]["features"]],
+        )
+        response = self.client.get(f"{self.url}/changes/?since={revision}")
+        self.assertEqual(response.status_code, 200)
+
+    def test_remove_user_features(self):
+        self.client.put(
+            f"{self.url}/users/{self.username}/features/set/",
+            {"name": "feature-1", "value": "override"},
+            format="json",
+        )
+        response = self.client.put(
+            f"{self.url}/remove-user/", {"username": self.username}, format="json"
+        )
+        features = response.json()["results"]["features"]
+        self.assertEqual(len(features), 5)
+        self.assertIn({"name": "feature-1", "value": "override"}, features)
+        self.assertFalse(
+            UserFeature.objects.filter(user__username=self.username).exists()
+        )
+
+    def test_get_changes(self):
+        self.assertQueryBudget(4, "get", f"{self.url}/changes/?since=0")
+
+    def test_get_changes_since(self):
+        users = [user.username for user in self.dataset.users[:6]]
+        # Already synced by the client.
+        self.client.put(
+            f"{self.url}/users/{users[5]}/features/set/",
+            {"name": "feature-5", "value": "synced"},
+            format="json",
+        )
+        self.environment.refresh_from_db()
+        since = self.environment.revision
+
+        self.client.put(
+            f"{self.url}/users/{users[3]}/features/set/",
+            {"name": "feature-4", "value": "changed"},
+            format="json",
+        )
+        self.client.put(
+            f"{self.url}/features/update/feature-1/",
+            {"name": "feature-1", "value": "updated"},
+            format="json",
+        )
+        self.client.delete(f"{self.url}/features/delete/feature-2/")
+        self.client.put(
+            f"{self.url}/remove-user/", {"username": users[1]}, format="json"
+        )
+        self.client.delete(f"{self.url}/users/{users[2]}/features/delete/feature-3/")
+
+        response = self.client.get(f"{self.url}/changes/?since={since}")
+        results = response.json()["results"]
+        self.environment.refresh_from_db()
+        self.assertEqual(results["revision"], self.environment.revision)
+        self.assertEqual(results["revision"], since + 5)
+        self.assertEqual(results["since"], since)
+        self.assertEqual(
+            [(feature["name"], feature["value"]) for feature in results["features"]],
+            [("feature-1", "updated")],
+        )
+        self.assertEqual(
+            {
+                feature["name"]: feature["value"]
+                for feature in results["users"][users[3]]
+            },
+            {"feature-4": "changed", "feature-1": "updated"},
+        )
+        # The users follow the updated feature, the synced override is left out.
+        self.assertEqual(
+            {
+                feature["name"]: feature["value"]
+                for feature in results["users"][users[5]]
+            },
+            {"feature-1": "updated"},
+        )
+        self.assertEqual(
+            results["deleted"],
+            {
+                "features": ["feature-2"],
+                "users": [users[1]],
+                "user_features": {users[2]: ["feature-3"]},
+            },
+        )
+
+        # Nothing changed since the last revision.
+        response = self.client.get(f"{self.url}/changes/?since={results['revision']}")
+        results = response.json()["results"]
+        self.assertEqual(results["features"], [])
+        self.assertEqual(results["users"], {})
+        self.assertEqual(
+            results["deleted"], {"features": [], "users": [], "user_features": {}}
+        )
+
+    def get_user_changes(self, since):
+        """Return the changes of the test user since the revision."""
+        response = self.client.get(
+            f"{self.url}/changes/?since={since}&username={self.username}"
+        )
+        return response.json()["results"]
+
+    def test_python_client_apply_changes(self):
+        bump_environment_revision(self.environment)
+        synced = self.get_user_changes(0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(
+                f"{self.url}/users/{self.username}/features/set/",
+                {"name": "feature-0", "value": "override"},
+                format="json",
+            )
+            self.client.put(
+                f"{self.url}/features/update/feature-1/",
+                {"name": "feature-1", "value": "updated"},
+                format="json",
+            )
+            self.client.delete(
+                f"{self.url}/users/{self.username}/features/delete/feature-2/"
+            )
+            self.client.delete(f"{self.url}/features/delete/feature-3/")
+            self.client.post(
+                f"{self.url}/features/", {"name": "new-feature", "value": "true"}
+            )
+
+        # Patched with the changes, the client gets the features of a full sync.
+        result = run_client(
+            "from switchkeys.api.types import SwitchKeysFeatureType\n"
+            "features = SwitchKeysFeatureType(\n"
+            "    {feature['name']: feature for feature in data['features']},\n"
+            "    None, None, data['username'], data['revision'],\n"
+            ")\n"
+            "features.apply_changes(data['changes'])\n"
+            "result = [features.revision, {\n"
+            "    name: features.get(name)['value']\n"
+            "    for name in data['names'] if features.has(name)\n"
+            "}]",
+            {
+                "features": synced["users"][self.username],
+                "username": self.username,
+                "revision": synced["revision"],
+                "changes": self.get_user_changes(synced["revision"]),
+                "names": [f"feature-{index}" for index in range(6)] + ["new-feature"],
+            },
+        )
+
+        expected = self.get_user_changes(0)
+        self.assertEqual(result[0], expected["revision"])
+        self.assertEqual(
+            result[1],
+            {
+                feature["name"]: feature["value"]
+                for feature in expected["users"][self.username]
+            },
+        )
+        self.assertEqual(result[1]["feature-0"], "override")
+        self.assertNotIn("feature-2", result[1])
+        self.assertNotIn("feature-3", result[1])
+
+        # The changes since the revision 0 are the whole features, they replace the old ones.
+        result = run_client(
+            "from switchkeys.api.types import SwitchKeysFeatureType\n"
+            "features = SwitchKeysFeatureType(\n"
+            "    {'feature-3': {'name': 'feature-3', 'value': 'true'}},\n"
+            "    None, None, data['username'],\n"
+            ")\n"
+            "features.apply_changes(data['changes'])\n"
+            "result = features.has('feature-3')",
+            {"username": self.username, "changes": expected},
+        )
+        self.assertFalse(result)
+
+    def test_stream(self):
+        request = AsyncRequestFactory().get(f"{self.url}/stream/")
+        view = EnvironmentStreamView.as_view()
+
+        async def open_stream():
+            response = await view(request, environment_key=str(self.key))
+            stream = response.streaming_content
+            await stream.__anext__()
+            await stream.aclose()
+            return response
+
+        with CaptureQueriesContext(connection) as context:
+            response = async_to_sync(open_stream)()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(context), 1)
+
+    def read_stream(self, key, last_event_id=None, count=1, write=None):
+        """Open the stream of an environment, run the write and return the next events."""
+        query = "" if last_event_id is None else f"?last_event_id={last_event_id}"
+        request = AsyncRequestFactory().get(
+            f"/api/environments/key/{key}/stream/{query}"
+        )
+        view = EnvironmentStreamView.as_view()
+
+        def run_write():
+            # The events are published once the write is committed.
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+
+        async def receive():
+            response = await view(request, environment_key=key)
+            stream = response.streaming_content
+            # The retry delay, sent once subscribed.
+            await stream.__anext__()
+            if write is not None:
+                await sync_to_async(run_write)()
+            events = [await stream.__anext__() for _ in range(count)]
+            await stream.aclose()
+            return events
+
+        return [
+            dict(line.split(": ", 1) for line in event.decode().strip().split("\n"))
+            for event in async_to_sync(receive)()
+        ]
+
+    def test_stream_events(self):
+        # Only the stream tests publish events, each on its own environment backlog.
+        key = str(self.dataset.environments[1].environment_key)
+        [event] = self.read_stream(
+            key,
+            write=lambda: self.client.post(
+                f"/api/environments/key/{key}/features/",
+                {"name": "streamed", "value": "true"},
+            ),
+        )
+
+        revision = ProjectEnvironment.objects.get(environment_key=key).revision
+        self.assertEqual(event["id"], str(revision))
+        self.assertEqual(event["event"], "feature.created")
+        self.assertEqual(json.loads(event["data"])["revision"], revision)
+
+    def test_stream_other_environment(self):
+        key, other_key = [
+            str(environment.environment_key)
+            for environment in self.dataset.environments[3:5]
+        ]
+
+        def write():
+            for environment_key in (other_key, key):
+                self.client.post(
+                    f"/api/environments/key/{environment_key}/features/",
+                    {"name": "streamed", "value": "true"},
+                )
+
+        # The events of the other environments are not sent.
+        [event] = self.read_stream(key, write=write)
+        revision = ProjectEnvironment.objects.get(environment_key=key).revision
+        self.assertEqual(event["id"], str(revision))
+        self.assertEqual(event["event"], "feature.created")
+
+    @override_settings(SWITCHKEYS_STREAM_HEARTBEAT=0.01)
+    def test_stream_heartbeat(self):
+        key = str(self.dataset.environments[5].environment_key)
+        # An idle stream is kept open by comments, ignored by the clients.
+        events = self.read_stream(key, count=2)
+        self.assertEqual(events, [{"": "heartbeat"}, {"": "heartbeat"}])
+
+    def test_stream_resume(self):
+        key = str(self.dataset.environments[2].environment_key)
+        url = f"/api/environments/key/{key}"
+        # Not in the backlog, e.g. published by another process.
+        self.client.post(f"{url}/features/", {"name": "streamed", "value": "true"})
+        missed = ProjectEnvironment.objects.get(environment_key=key).revision
+
+        # Nothing in the backlog, e.g. the process has restarted.
+        [event] = self.read_stream(key, last_event_id=missed - 1)
+        self.assertEqual(event["event"], "sync")
+        self.assertEqual(event["id"], str(missed))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for value in ("false", "true"):
+                self.client.put(
+                    f"{url}/features/update/streamed/",
+                    {"name": "streamed", "value": value},
+                )
+        revision = ProjectEnvironment.objects.get(environment_key=key).revision
+        self.assertEqual(revision, missed + 2)
+
+        # The backlog doesn't follow the last event, the client has to fetch the changes.
+        [event] = self.read_stream(key, last_event_id=missed - 1)
+        self.assertEqual(event["event"], "sync")
+        self.assertEqual(event["id"], str(revision))
+        self.assertEqual(
+            json.loads(event["data"]), {"since": missed - 1, "revision": revision}
+        )
+
+        # The backlog follows the last event, the missed events are replayed.
+        events = self.read_stream(key, last_event_id=missed, count=2)
+        self.assertEqual(
+            [(event["id"], event["event"]) for event in events],
+            [
+                (str(missed + 1), "feature.updated"),
+                (str(missed + 2), "feature.updated"),
+            ],
+        )
+
+    def test_get_users_features_concurrently(self):
+        # Served on a single event loop, the way `asgi.py` serves them.
+        view = AsyncEnvironmentUserFeaturesView.as_view()
+        usernames = [user.username for user in self.dataset.users[:10]]
+
+        async def get_users_features():
+            return await asyncio.gather(
+                *(
+                    view(
+                        AsyncRequestFactory().get(
+                            f"{self.url}/users/{username}/features/"
+                        ),
+                        environment_key=str(self.key),
+                        username=username,
+                    )
+                    for username in usernames
+                )
+            )
+
+        with CaptureQueriesContext(connection) as context:
+            responses = async_to_sync(get_users_features)()
+
+        self.assertEqual([response.status_code for response in responses], [200] * 10)
+        # The environment and its rules, not cached yet when they all start, the user and its
+        # features.
+        self.assertLessEqual(len(context), 4 * len(usernames))
+
+    def test_list_features(self):
+        self.assertQueryBudget(3, "get", f"{self.url}/features/")
+
+    def test_create_feature(self):
+        # The user features are inserted by batches, SQLite caps their size to 999 parameters.
+        self.assertQueryBudget(
+            43,
+            "post",
+            f"{self.url}/features/",
+            {"name": "new-feature", "value": "true"},
+        )
+
+    def test_get_feature_fan_out(self):
+        self.client.post(
+            f"{self.url}/features/", {"name": "new-feature", "value": "true"}
+        )
+        self.assertQueryBudget(2, "get", f"{self.url}/features/fan-out/new-feature/")
+
+    @override_settings(SWITCHKEYS_FAN_OUT_ASYNC_THRESHOLD=1000)
+    def test_fan_out_feature_in_background(self):
+        response = self.client.post(
+            f"{self.url}/features/", {"name": "new-feature", "value": "true"}
+        )
+        fan_out = response.json()["results"]["fan_out"]
+        del fan_out["updated"]
+        self.assertEqual(fan_out, {"status": "running", "done": 0, "total": 2000})
+        feature = get_environment_feature("new-feature", self.environment)
+        self.assertFalse(UserFeature.objects.filter(feature=feature).exists())
+
+        # A user added while the feature is fanned out already gets it.
+        self.client.put(
+            f"{self.url}/add-user/",
+            {
+                "username": "new-user",
+                "device": {"device_type": "android", "version": "1.0"},
+            },
+            format="json",
+        )
+
+        # The background thread can't see the test transaction, run its work here.
+        self.environment.refresh_from_db()
+        complete_fan_out(self.environment, feature)
+
+        response = self.client.get(f"{self.url}/features/fan-out/new-feature/")
+        progress = response.json()["results"]
+        del progress["updated"]
+        self.assertEqual(progress, {"status": "done", "done": 2001, "total": 2001})
+        self.environment.refresh_from_db()
+        revisions = UserFeature.objects.filter(feature=feature).values_list(
+            "revision", flat=True
+        )
+        self.assertEqual(len(revisions), 2001)
+        self.assertEqual(set(revisions), {self.environment.revision})
+
+    @override_settings(SWITCHKEYS_FAN_OUT_ASYNC_THRESHOLD=1000)
+    def test_stale_fan_out(self):
+        self.client.post(
+            f"{self.url}/features/", {"name": "new-feature", "value": "true"}
+        )
+        url = f"{self.url}/features/fan-out/new-feature/"
+        self.assertEqual(self.client.get(url).json()["results"]["status"], "running")
+
+        # The worker stopped reporting, e.g. it was killed with the thread.
+        with override_settings(SWITCHKEYS_FAN_OUT_STALE_TIME=-1):
+            self.assertEqual(self.client.get(url).json()["results"]["status"], "failed")
+
+        # The management command completes it, skipping the users who got the feature.
+        feature = get_environment_feature("new-feature", self.environment)
+        UserFeature.objects.create(
+            user=self.dataset.users[0], feature=feature, feature_value="true"
+        )
+        call_command("fan_out_feature", str(self.key), "new-feature", stdout=StringIO())
+        self.assertEqual(UserFeature.objects.filter(feature=feature).count(), 2000)
+        with override_settings(SWITCHKEYS_FAN_OUT_STALE_TIME=-1):
+            self.assertEqual(self.client.get(url).json()["results"]["status"], "done")
+
+    def test_delete_feature(self):
+        self.assertQueryBudget(
+            25, "delete", f"{self.url}/features/delete/feature-0/", status_code=204
+        )
+
+    def test_update_feature(self):
+        self.assertQueryBudget(
+            22,
+            "put",
+            f"{self.url}/features/update/feature-0/",
+            {"name": "feature-0", "value": "false"},
+        )
+
+    def test_update_feature_keeps_overrides(self):
+        value = get_environment_feature("feature-0", self.environment).value
+        overriding, following = self.dataset.users[:2]
+        # An override set to the environment value is still an override.
+        self.client.put(
+            f"{self.url}/users/{overriding.username}/features/set/",
+            {"name": "feature-0", "value": value},
+            format="json",
+        )
+        self.client.put(
+            f"{self.url}/features/update/feature-0/",
+            {"name": "feature-0", "value": "updated"},
+            format="json",
+        )
+
+        for user, expected in ((overriding, value), (following, "updated")):
+            response = self.client.get(f"{self.url}/users/{user.username}/features/")
+            values = {
+                feature["name"]: feature["value"]
+                for feature in response.json()["results"]
+            }
+            self.assertEqual(values["feature-0"], expected, user.username)
+        self.assertEqual(
+            UserFeature.objects.filter(
+                feature__name="feature-0",
+                user__environment=self.environment,
+                is_override=True,
+            ).count(),
+            1,
+        )
+        self.assertQueryBudget(
+            24,
+            "post",
+            f"{self.url}/features/rules/feature-0/",
+            {"device_type": "Android", "min_version": "2.0", "value": "targeted"},
+            status_code=201,
+        )
+
+    def test_get_user_features(self):
+        self.assertQueryBudget(4, "get", f"{self.url}/users/{self.username}/features/")
+
+    def test_get_user_features_cached(self):
+        url = f"{self.url}/users/{self.username}/features/"
+        features = self.client.get(url).json()["results"]
+        revision = self.environment.revision
+        key = payload_key(
+            PayloadKind.USER_FEATURES, self.environment.id, revision, self.username
+        )
+        self.assertIsNotNone(get_payload_cache().get(key))
+        self.client.get(f"{self.url}/features/")
+        features_key = payload_key(PayloadKind.FEATURES, self.environment.id, revision)
+        self.assertIsNotNone(get_payload_cache().get(features_key))
+
+        # Another worker, with its own process-local caches, reads the shared payload.
+        environment_key_cache.clear()
+        compiled_rules_cache.clear()
+        response = self.assertQueryBudget(1, "get", url)
+        self.assertEqual(response.json()["results"], features)
+
+        # A feature update is a new revision with its own keys, the outdated environment
+        # payloads are dropped, the user ones expire with the cache timeout.
+        name = features[0]["name"]
+        self.client.put(
+            f"{self.url}/features/update/{name}/",
+            {"name": name, "value": "updated"},
+            format="json",
+        )
+        self.assertIsNone(get_payload_cache().get(features_key))
+        features = self.client.get(url).json()["results"]
+        self.assertEqual(features[0]["value"], "updated")
+        response = self.client.get(f"{self.url}/features/")
+        self.assertIn(
+            ("updated", name),
+            [
+                (feature["value"], feature["name"])
+                for environment_feature in response.json()["results"]
+                for feature in environment_feature["features"]
+            ],
+        )
+
+    def test_get_users_features(self):
+        # The environment, its rules, the users, then all their features in one query.
+        usernames = [user.username for user in self.dataset.users[:50]]
+        response = self.assertQueryBudget(
+            4,
+            "post",
+            f"{self.url}/users/features/",
+            {"usernames": usernames + ["missing-user"]},
+        )
+        results = response.json()["results"]
+        self.assertEqual(list(results["users"]), usernames)
+        self.assertEqual(results["missing"], ["missing-user"])
+        self.assertEqual(len(results["users"][self.username]), self.USER_FEATURES)
+
+    def test_get_users_features_rollout(self):
+        usernames = [user.username for user in self.dataset.users[:200]]
+        # An override is served as it is, even out of the rollout.
+        overridden = next(
+            username
+            for username in usernames
+            if not is_in_rollout("feature-0", username, 30)
+        )
+        response = self.client.put(
+            f"{self.url}/users/{overridden}/features/set/",
+            {"name": "feature-0", "value": "explicit"},
+        )
+        self.assertEqual(response.json()["results"]["value"], "explicit")
+        self.environment.refresh_from_db()
+        since = self.environment.revision
+
+        initial_value = get_environment_feature(
+            "feature-0", self.environment
+        ).initial_value
+        self.client.put(
+            f"{self.url}/features/update/feature-0/",
+            {"name": "feature-0", "value": "rolled-out", "rollout_percentage": 30},
+        )
+        response = self.assertQueryBudget(
+            4, "post", f"{self.url}/users/features/", {"usernames": usernames}
+        )
+
+        # The materialized user features follow the updated feature and its rollout.
+        expected = {
+            username: (
+                "rolled-out"
+                if is_in_rollout("feature-0", username, 30)
+                else initial_value
+            )
+            for username in usernames
+        }
+        expected[overridden] = "explicit"
+        users = response.json()["results"]["users"]
+        self.assertEqual(
+            {username: users[username]["feature-0"] for username in usernames},
+            expected,
+        )
+        self.assertIn(initial_value, expected.values())
+        self.assertIn("rolled-out", expected.values())
+
+        # The changes serve the same values, without the unchanged override.
+        response = self.client.get(f"{self.url}/changes/?since={since}")
+        changed = {
+            username: {feature["name"]: feature["value"] for feature in features}
+            for username, features in response.json()["results"]["users"].items()
+        }
+        self.assertNotIn(overridden, changed)
+        del expected[overridden]
+        self.assertEqual(
+            {username: changed[username]["feature-0"] for username in expected},
+            expected,
+        )
+
+    def test_get_users_features_rule_override(self):
+        users = self.dataset.users[:200]
+        targeted = {
+            user.username
+            for user in users
+            if user.device.device_type == "android"
+            and user.device.version in ("2.0", "3.0")
+        }
+        # An explicit override is kept on the targeted devices.
+        overridden = sorted(targeted)[0]
+        self.client.put(
+            f"{self.url}/users/{overridden}/features/set/",
+            {"name": "feature-0", "value": "explicit"},
+        )
+        self.client.post(
+            f"{self.url}/features/rules/feature-0/",
+            {"device_type": "Android", "min_version": "2.0", "value": "targeted"},
+        )
+        response = self.client.post(
+            f"{self.url}/users/features/",
+            {"usernames": [user.username for user in users]},
+        )
+
+        results = response.json()["results"]["users"]
+        self.assertEqual(results[overridden]["feature-0"], "explicit")
+        self.assertEqual(
+            {
+                user.username
+                for user in users
+                if results[user.username]["feature-0"] == "targeted"
+            },
+            targeted - {overridden},
+        )
+
+        # The changes serve the same values.
+        response = self.client.get(f"{self.url}/changes/?since=0")
+        changes = {
+            username: {feature["name"]: feature["value"] for feature in features}
+            for username, features in response.json()["results"]["users"].items()
+        }
+        self.assertEqual(changes[overridden]["feature-0"], "explicit")
+        self.assertEqual(
+            {
+                user.username
+                for user in users
+                if changes[user.username]["feature-0"] == "targeted"
+            },
+            targeted - {overridden},
+        )
+
+        # The clients evaluating the rules locally skip the served overrides.
+        overrides = {
+            username: {
+                feature["name"] for feature in features if feature["is_override"]
+            }
+            for username, features in response.json()["results"]["users"].items()
+        }
+        self.assertEqual(overrides[overridden], {"feature-0"})
+        self.assertEqual(overrides[sorted(targeted)[1]], set())
+
+    def test_python_client_values(self):
+        users = [user.username for user in self.dataset.users[:200]]
+        targeted = next(
+            user.username
+            for user in self.dataset.users[:200]
+            if user.device.device_type == "android" and user.device.version == "2.0"
+        )
+        self.client.put(
+            f"{self.url}/users/{targeted}/features/set/",
+            {"name": "feature-0", "value": "explicit"},
+        )
+        self.client.put(
+            f"{self.url}/features/update/feature-0/",
+            {"name": "feature-0", "value": "rolled-out", "rollout_percentage": 30},
+        )
+        self.client.post(
+            f"{self.url}/features/rules/feature-0/",
+            {"device_type": "Android", "min_version": "2.0", "value": "targeted"},
+        )
+        response = self.client.post(f"{self.url}/users/features/", {"usernames": users})
+        expected = {
+            username: features["feature-0"]
+            for username, features in response.json()["results"]["users"].items()
+        }
+
+        # The client evaluates the rules and rollouts of the environment document locally.
+        document = self.client.get(f"{self.url}/").json()["results"]
+        result = run_client(
+            "from switchkeys.utils.parser import parse_environment\n"
+            "environment = parse_environment(data['document'])\n"
+            "result = {\n"
+            "    username: environment.get_user(username).features.value_of('feature-0')\n"
+            "    for username in data['usernames']\n"
+            "}",
+            {"document": document, "usernames": users},
+        )
+        self.assertEqual(result, expected)
+        self.assertEqual(result[targeted], "explicit")
+        self.assertIn("targeted", result.values())
+
+    def test_set_user_feature(self):
+        self.assertQueryBudget(
+            24,
+            "put",
+            f"{self.url}/users/{self.username}/features/set/",
+            {"name": "feature-0", "value": "false"},
+        )
+
+    def test_set_users_features(self):
+        users = self.dataset.users[:500]
+        features = [
+            {"username": user.username, "name": name, "value": "false"}
+            for user in users
+            for name in ("feature-0", "new-feature")
+        ] + [
+            {"username": "missing-user", "name": "feature-0", "value": "false"},
+            # Sent twice, the last value wins.
+            {"username": users[0].username, "name": "feature-0", "value": "last"},
+        ]
+        response = self.assertQueryBudget(
+            37, "put", f"{self.url}/users/features/set/", {"features": features}
+        )
+
+        results = response.json()["results"]
+        self.environment.refresh_from_db()
+        self.assertEqual(results["revision"], self.environment.revision)
+        self.assertEqual(results["revision"], 1)
+        self.assertEqual(
+            [result["status"] for result in results["results"]],
+            ["updated", "created"] * 500 + ["failed", "updated"],
+        )
+        self.assertEqual(results["results"][-2]["message"], "User not found.")
+
+        # The existing user features are updated, the new ones get their own feature.
+        user_features = UserFeature.objects.filter(
+            user__in=users, feature__name__in=("feature-0", "new-feature")
+        )
+        self.assertEqual(
+            {
+                (username, name, value, revision)
+                for username, name, value, revision in user_features.values_list(
+                    "user__username", "feature__name", "feature_value", "revision"
+                )
+            },
+            {
+                (user.username, name, "false", 1)
+                for user in users[1:]
+                for name in ("feature-0", "new-feature")
+            }
+            | {
+                (users[0].username, "feature-0", "last", 1),
+                (users[0].username, "new-feature", "false", 1),
+            },
+        )
+        self.assertFalse(
+            user_features.filter(feature__name="new-feature", feature__is_default=True)
+        )
+        self.assertFalse(
+            UserFeature.objects.filter(
+                user__username="missing-user", user__environment=self.environment
+            )
+        )
+
+    def test_delete_user_feature(self):
+        self.assertQueryBudget(
+            24,
+            "delete",
+            f"{self.url}/users/{self.username}/features/delete/feature-0/",
+            status_code=204,
+        )
+
+
+@override_settings(SWITCHKEYS_FEATURE_STORAGE="sparse")
+class SparseStorageQueryBudgetTests(QueryBudgetTestCase):
+    """Query budgets of the endpoints reading or writing the user features, sparse storage."""
+
+    # The users only hold their overrides, every user reads all the environment features.
+    FEATURES = 10
+    USER_FEATURES = None
+
+    def setUp(self):
+        super().setUp()
+        self.environment = self.dataset.environment
+        self.username = self.dataset.users[0].username
+        self.url = f"/api/environments/key/{self.environment.environment_key}"
+
+    def test_get_environment_by_key(self):
+        response = self.assertQueryBudget(15, "get", f"{self.url}/")
+        users = response.json()["results"]["users"]
+        self.assertEqual(len(users[0]["features"]), self.FEATURES)
+
+    def test_add_user(self):
+        self.assertQueryBudget(
+            27,
+            "put",
+            f"{self.url}/add-user/",
+            {
+                "username": "new-user",
+                "device": {"device_type": "android", "version": "1.0"},
+            },
+        )
+
+    def test_create_feature(self):
+        response = self.assertQueryBudget(
+            25,
+            "post",
+            f"{self.url}/features/",
+            {"name": "new-feature", "value": "true"},
+        )
+        self.assertIsNone(response.json()["results"]["fan_out"])
+
+    def test_get_user_features(self):
+        response = self.assertQueryBudget(
+            5, "get", f"{self.url}/users/{self.username}/features/"
+        )
+        self.assertEqual(len(response.json()["results"]), self.FEATURES)
+
+    def test_set_user_feature(self):
+        self.assertQueryBudget(
+            26,
+            "put",
+            f"{self.url}/users/{self.username}/features/set/",
+            {"name": "feature-0", "value": "false"},
+        )
+
+    def test_get_user_changes(self):
+        response = self.assertQueryBudget(
+            6, "get", f"{self.url}/changes/?since=0&username={self.username}"
+        )
+        self.assertEqual(
+            len(response.json()["results"]["users"][self.username]), self.FEATURES
+        )
+
+    def test_get_users_features_rollout(self):
+        self.client.put(
+            f"{self.url}/features/update/feature-0/",
+            {"name": "feature-0", "value": "rolled-out", "rollout_percentage": 30},
+        )
+        usernames = [user.username for user in self.dataset.users[:200]]
+        response = self.assertQueryBudget(
+            4, "post", f"{self.url}/users/features/", {"usernames": usernames}
+        )
+
+        # The users out of the rollout get the initial value, without any user feature.
+        users = response.json()["results"]["users"]
+        rolled_out = {
+            username
+            for username in usernames
+            if users[username]["feature-0"] == "rolled-out"
+        }
+        self.assertEqual(
+            rolled_out,
+            {
+                username
+                for username in usernames
+                if is_in_rollout("feature-0", username, 30)
+            },
+        )
+        self.assertTrue(0 < len(rolled_out) < len(usernames))
+
+    def test_get_users_features_rule(self):
+        self.client.post(
+            f"{self.url}/features/rules/feature-0/",
+            {"device_type": "Android", "min_version": "2.0", "value": "targeted"},
+        )
+        compiled_rules_cache.clear()
+        users = self.dataset.users[:200]
+        response = self.assertQueryBudget(
+            5,
+            "post",
+            f"{self.url}/users/features/",
+            {"usernames": [user.username for user in users]},
+        )
+
+        # The rule is evaluated on the user devices, without any user feature.
+        results = response.json()["results"]["users"]
+        self.assertEqual(
+            {
+                user.username
+                for user in users
+                if results[user.username]["feature-0"] == "targeted"
+            },
+            {
+                user.username
+                for user in users
+                if user.device.device_type == "android"
+                and user.device.version in ("2.0", "3.0")
+            },
+        )
@@ -0,0 +1,82 @@
+from switchkeys.models.management import OrganizationProjectGroup
+from switchkeys.tests.base import QueryBudgetTestCase
+
+
+class GroupsQueryBudgetTests(QueryBudgetTestCase):
+    """Query budgets of the `switchkeys/urls/groups.py` endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        project = cls.dataset.projects[0]
+        cls.members = list(project.organization.members.values_list("id", flat=True))
+        cls.group = OrganizationProjectGroup.objects.create(
+            project=project, name="group"
+        )
+        cls.group.members.set(cls.members)
+
+    def test_list_groups(self):
+        self.assertQueryBudget(3, "get", "/api/groups/")
+
+    def test_create_group(self):
+        self.assertQueryBudget(
+            18,
+            "post",
+            "/api/groups/",
+            {
+                "name": "new-group",
+                "project": self.group.project_id,
+                "members": self.members,
+            },
+        )
+
+    def test_get_group(self):
+        self.assertQueryBudget(2, "get", f"/api/groups/{self.group.id}/")
+
+    def test_update_group(self):
+        self.assertQueryBudget(
+            19,
+            "put",
+            f"/api/groups/{self.group.id}/",
+            {
+                "name": "renamed-group",
+                "project": self.group.project_id,
+                "members": self.members,
+            },
+            status_code=201,
+        )
+
+    def test_delete_group(self):
+        self.assertQueryBudget(
+            8, "delete", f"/api/groups/{self.group.id}/", status_code=204
+        )
+
+    def test_update_group_segment(self):
+        environment = self.dataset.environment
+        self.client.post(
+            f"/api/environments/key/{environment.environment_key}/features/rules/feature-0/",
+            {"segment": self.group.id, "value": "targeted"},
+        )
+        url = f"/api/groups/{self.group.id}/segments/{environment.environment_key}/"
+        members = [user.username for user in self.dataset.users[:500]]
+        # The new members ordinals are updated by batches on SQLite, with the snapshot refresh
+        # and the change event.
+        self.assertQueryBudget(33, "put", url, {"add": members})
+        self.client.put(url, {"remove": members[:100]}, format="json")
+
+        # The members get the segment value, by a bit test on their ordinal.
+        users = self.dataset.users[:600]
+        response = self.client.post(
+            f"/api/environments/key/{environment.environment_key}/users/features/",
+            {"usernames": [user.username for user in users]},
+            format="json",
+        )
+        results = response.json()["results"]["users"]
+        self.assertEqual(
+            [
+                user.username
+                for user in users
+                if results[user.username]["feature-0"] == "targeted"
+            ],
+            members[100:],
+        )
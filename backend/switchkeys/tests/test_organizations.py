@@ -0,0 +1,72 @@
+from switchkeys.tests.base import QueryBudgetTestCase
+
+
+class OrganizationsQueryBudgetTests(QueryBudgetTestCase):
+    """Query budgets of the `switchkeys/urls/organizations.py` endpoints."""
+
+    def setUp(self):
+        super().setUp()
+        self.organization = self.dataset.organizations[0]
+        self.member = self.organization.members.first()
+
+    def test_list_organizations(self):
+        self.assertQueryBudget(6, "get", "/api/organizations/")
+
+    def test_create_organization(self):
+        self.assertQueryBudget(
+            6, "post", "/api/organizations/", {"name": "new-organization"}
+        )
+
+    def test_get_organization_projects(self):
+        self.assertQueryBudget(
+            10, "get", f"/api/organizations/{self.organization.id}/projects/"
+        )
+
+    def test_get_organization(self):
+        self.assertQueryBudget(3, "get", f"/api/organizations/{self.organization.id}/")
+
+    def test_get_organization_fields(self):
+        # The members are never loaded.
+        self.assertQueryBudget(
+            1, "get", f"/api/organizations/{self.organization.id}/?fields=id,name"
+        )
+
+    def test_update_organization(self):
+        self.assertQueryBudget(
+            10,
+            "put",
+            f"/api/organizations/{self.organization.id}/",
+            {"name": "renamed-organization"},
+            status_code=201,
+        )
+
+    def test_delete_organization(self):
+        # The environments users are deleted with them, by batches of 100 rows on SQLite.
+        self.assertQueryBudget(
+            62,
+            "delete",
+            f"/api/organizations/{self.organization.id}/",
+            status_code=204,
+        )
+
+    def test_get_organization_by_name(self):
+        self.assertQueryBudget(
+            3, "get", f"/api/organizations/name/{self.organization.name}/"
+        )
+
+    def test_add_member(self):
+        member = self.dataset.organizations[1].members.first()
+        self.assertQueryBudget(
+            12,
+            "put",
+            f"/api/organizations/{self.organization.id}/add-member/",
+            {"member_id": member.id},
+        )
+
+    def test_remove_member(self):
+        self.assertQueryBudget(
+            13,
+            "put",
+            f"/api/organizations/{self.organization.id}/remove-member/",
+            {"member_id": self.member.id},
+        )
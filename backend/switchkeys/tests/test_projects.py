@@ -0,0 +1,44 @@
+from switchkeys.tests.base import QueryBudgetTestCase
+
+
+class ProjectsQueryBudgetTests(QueryBudgetTestCase):
+    """Query budgets of the `switchkeys/urls/projects.py` endpoints."""
+
+    def setUp(self):
+        super().setUp()
+        self.project = self.dataset.projects[0]
+
+    def test_list_projects(self):
+        self.assertQueryBudget(18, "get", "/api/projects/")
+
+    def test_create_project(self):
+        self.assertQueryBudget(
+            21,
+            "post",
+            "/api/projects/",
+            {
+                "name": "new-project",
+                "organization_id": self.project.organization_id,
+            },
+        )
+
+    def test_get_project(self):
+        self.assertQueryBudget(5, "get", f"/api/projects/{self.project.id}/")
+
+    def test_update_project(self):
+        self.assertQueryBudget(
+            12,
+            "put",
+            f"/api/projects/{self.project.id}/",
+            {
+                "name": "renamed-project",
+                "organization_id": self.project.organization_id,
+            },
+            status_code=201,
+        )
+
+    def test_delete_project(self):
+        # The environments users are deleted with them, by batches of 100 rows on SQLite.
+        self.assertQueryBudget(
+            53, "delete", f"/api/projects/{self.project.id}/", status_code=204
+        )
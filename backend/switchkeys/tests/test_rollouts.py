@@ -0,0 +1,119 @@
+from django.test import SimpleTestCase
+
+from switchkeys.models.environments import SwitchKeysFeature
+from switchkeys.tests.clients import run_client
+from switchkeys.utils.rollouts import (
+    ROLLOUT_BUCKETS,
+    get_rollout_value,
+    is_in_rollout,
+    rollout_bucket,
+)
+
+USERNAMES = [f"user-{index}" for index in range(2000)]
+
+
+class RolloutsTests(SimpleTestCase):
+    """The percentage rollouts of `switchkeys/utils/rollouts.py`."""
+
+    def test_rollout_bucket(self):
+        self.assertEqual(rollout_bucket("debug", "mahmoud"), 729)
+        buckets = [rollout_bucket("debug", username) for username in USERNAMES]
+        self.assertTrue(all(0 <= bucket < ROLLOUT_BUCKETS for bucket in buckets))
+        # Stable, and another feature buckets the users differently.
+        self.assertEqual(buckets[0], rollout_bucket("debug", USERNAMES[0]))
+        self.assertNotEqual(
+            buckets, [rollout_bucket("version", username) for username in USERNAMES]
+        )
+
+    def test_is_in_rollout_bounds(self):
+        for username in USERNAMES:
+            self.assertTrue(is_in_rollout("debug", username, None))
+            self.assertTrue(is_in_rollout("debug", username, 100))
+            self.assertFalse(is_in_rollout("debug", username, 0))
+
+    def test_is_in_rollout_boundary(self):
+        for username in USERNAMES[:100]:
+            bucket = rollout_bucket("debug", username)
+            # The first percentage covering the bucket, the user stays in while it grows.
+            first = bucket * 100 // ROLLOUT_BUCKETS + 1
+            self.assertEqual(
+                [
+                    is_in_rollout("debug", username, percentage)
+                    for percentage in range(101)
+                ],
+                [percentage >= first for percentage in range(101)],
+                username,
+            )
+
+    def test_is_in_rollout_distribution(self):
+        rolled_out = sum(is_in_rollout("debug", username, 30) for username in USERNAMES)
+        self.assertAlmostEqual(rolled_out / len(USERNAMES), 0.3, delta=0.03)
+
+    def test_get_rollout_value(self):
+        feature = SwitchKeysFeature(
+            name="debug", value="true", initial_value="false", rollout_percentage=50
+        )
+        for username in USERNAMES[:100]:
+            expected = "on" if is_in_rollout("debug", username, 50) else "false"
+            self.assertEqual(get_rollout_value(feature, username, "on"), expected)
+
+        feature.rollout_percentage = None
+        self.assertEqual(get_rollout_value(feature, USERNAMES[0], "on"), "on")
+        feature.rollout_percentage = 0
+        self.assertEqual(get_rollout_value(feature, USERNAMES[0], "on"), "false")
+
+
+class RolloutsClientParityTests(SimpleTestCase):
+    """The Python client evaluates the rollouts to the same users."""
+
+    def test_rollouts_parity(self):
+        cases = [
+            [feature, username, percentage]
+            for feature in ("debug", "version", "new-checkout")
+            for username in USERNAMES[:500]
+            for percentage in (None, 0, 1, 33, 50, 99, 100)
+        ]
+        result = run_client(
+            "from switchkeys.utils.rollouts import is_in_rollout, rollout_bucket\n"
+            "result = [\n"
+            "    [rollout_bucket(feature, username), is_in_rollout(feature, username, percentage)]\n"
+            "    for feature, username, percentage in data\n"
+            "]",
+            cases,
+        )
+        self.assertEqual(
+            result,
+            [
+                [
+                    rollout_bucket(feature, username),
+                    is_in_rollout(feature, username, percentage),
+                ]
+                for feature, username, percentage in cases
+            ],
+        )
+
+    def test_rollout_value_parity(self):
+        features = [
+            {
+                "name": "debug",
+                "initial_value": "false",
+                "rollout_percentage": percentage,
+            }
+            for percentage in (None, 0, 25, 100)
+        ]
+        result = run_client(
+            "from switchkeys.utils.rollouts import get_rollout_value\n"
+            "result = [\n"
+            "    get_rollout_value(feature, username, 'on')\n"
+            "    for feature in data['features'] for username in data['usernames']\n"
+            "]",
+            {"features": features, "usernames": USERNAMES[:200]},
+        )
+        self.assertEqual(
+            result,
+            [
+                get_rollout_value(SwitchKeysFeature(**feature), username, "on")
+                for feature in features
+                for username in USERNAMES[:200]
+            ],
+        )
@@ -0,0 +1,163 @@
+from django.test import SimpleTestCase
+
+from switchkeys.tests.clients import run_client
+from switchkeys.utils.bitmaps import Bitmap
+from switchkeys.utils.rules import CompiledRules, parse_version
+
+
+def rule(feature, value, device_type="", min_version="", max_version="", segment=None):
+    """Return a rule the way it's serialized to the clients."""
+    return {
+        "feature": feature,
+        "device_type": device_type,
+        "min_version": min_version,
+        "max_version": max_version,
+        "segment": segment,
+        "value": value,
+    }
+
+
+# Ordered by priority, with the members of the segments 1 and 2.
+RULES = [
+    rule("checkout", "android-5", "Android", "5.2", "6.0"),
+    rule("checkout", "android", "Android"),
+    rule("checkout", "any"),
+    rule("theme", "beta", segment=1),
+    rule("theme", "staff", segment=2),
+    rule("theme", "iphone", "IPhone"),
+    rule("banner", "segment", segment=2, min_version="2"),
+]
+MEMBERS = {1: [0, 7, 8], 2: [8, 100]}
+DEVICES = [
+    [device_type, version, ordinal]
+    for device_type in ("android", "ANDROID", "iphone", "", None)
+    for version in ("5.1.9", "5.2", "5.2.0", "5.10", "6", "6.0.1", "1.0", "", None)
+    for ordinal in (None, 0, 8, 9, 100)
+]
+
+
+def build_segments():
+    """Return the members bitmaps of the segments, by group id."""
+    segments = {}
+    for group, ordinals in MEMBERS.items():
+        members = segments[group] = Bitmap()
+        for ordinal in ordinals:
+            members.add(ordinal)
+    return segments
+
+
+class RulesTests(SimpleTestCase):
+    """The targeting rules of `switchkeys/utils/rules.py`."""
+
+    def setUp(self):
+        self.rules = CompiledRules(RULES, build_segments())
+
+    def test_parse_version(self):
+        self.assertEqual(parse_version("5.2.0-beta"), (5, 2))
+        self.assertEqual(parse_version("5.2"), parse_version("5.2.0"))
+        self.assertGreater(parse_version("5.10"), parse_version("5.2"))
+        self.assertEqual(parse_version(" 6 "), (6,))
+        self.assertIsNone(parse_version(""))
+        self.assertIsNone(parse_version(None))
+
+    def test_min_version_inclusive(self):
+        self.assertEqual(self.rules.evaluate("android", "5.2")["checkout"], "android-5")
+        self.assertEqual(
+            self.rules.evaluate("android", "5.2.0")["checkout"], "android-5"
+        )
+        self.assertEqual(self.rules.evaluate("android", "5.1.9")["checkout"], "android")
+
+    def test_max_version_exclusive(self):
+        self.assertEqual(
+            self.rules.evaluate("android", "5.10")["checkout"], "android-5"
+        )
+        self.assertEqual(self.rules.evaluate("android", "6")["checkout"], "android")
+        self.assertEqual(self.rules.evaluate("android", "6.0.1")["checkout"], "android")
+
+    def test_empty_bounds(self):
+        # Any version matches a rule without bounds, even none, not a bounded rule.
+        self.assertEqual(self.rules.evaluate("android", None)["checkout"], "android")
+        self.assertEqual(self.rules.evaluate("android", "")["checkout"], "android")
+        self.assertEqual(self.rules.evaluate(None, None)["checkout"], "any")
+
+    def test_device_type_case(self):
+        for device_type in ("android", "Android", "ANDROID"):
+            self.assertEqual(
+                self.rules.evaluate(device_type, "5.3")["checkout"], "android-5"
+            )
+        self.assertEqual(self.rules.evaluate("iphone", "5.3")["checkout"], "any")
+        self.assertEqual(self.rules.evaluate("IPHONE", "1.0")["theme"], "iphone")
+
+    def test_priority(self):
+        # The first matching rule of a feature wins, the later ones are not evaluated.
+        rules = CompiledRules([rule("checkout", "first"), rule("checkout", "second")])
+        self.assertEqual(rules.evaluate("android", "1.0"), {"checkout": "first"})
+        rules = CompiledRules(
+            [rule("checkout", "first", "iphone"), rule("checkout", "second")]
+        )
+        self.assertEqual(rules.evaluate("android", "1.0"), {"checkout": "second"})
+
+    def test_segments(self):
+        # The first segment of the user wins, the users out of them get the next rule.
+        self.assertEqual(self.rules.evaluate("iphone", "1.0", 8)["theme"], "beta")
+        self.assertEqual(self.rules.evaluate("iphone", "1.0", 100)["theme"], "staff")
+        self.assertEqual(self.rules.evaluate("iphone", "1.0", 9)["theme"], "iphone")
+        self.assertEqual(self.rules.evaluate("iphone", "1.0")["theme"], "iphone")
+        # Without a rule after the segments, the users out of them get no value.
+        self.assertNotIn("theme", self.rules.evaluate("android", "1.0", 9))
+        self.assertEqual(
+            self.rules.evaluate("android", "2.0", 100)["banner"], "segment"
+        )
+        self.assertNotIn("banner", self.rules.evaluate("android", "1.0", 100))
+
+    def test_max_decisions(self):
+        rules = CompiledRules(RULES, max_decisions=2)
+        for _ in range(3):
+            for version in ("5.1", "5.2", "6.0"):
+                self.assertEqual(
+                    rules.evaluate("android", version)["checkout"],
+                    "android-5" if version == "5.2" else "android",
+                )
+
+    def test_no_rules(self):
+        rules = CompiledRules([])
+        self.assertFalse(rules)
+        self.assertEqual(rules.evaluate("android", "1.0", 0), {})
+
+
+class RulesClientParityTests(SimpleTestCase):
+    """The Python client compiles and evaluates the rules the same way."""
+
+    def test_parse_version_parity(self):
+        versions = ["5.2.0-beta", "5.2", "5.10", " 6 ", "v2", "1..2", "", None]
+        result = run_client(
+            "from switchkeys.utils.rules import parse_version\n"
+            "result = [parse_version(version) for version in data]",
+            versions,
+        )
+        self.assertEqual(
+            result,
+            [
+                list(version) if version is not None else None
+                for version in map(parse_version, versions)
+            ],
+        )
+
+    def test_evaluate_parity(self):
+        segments = build_segments()
+        rules = CompiledRules(RULES, segments)
+
+        result = run_client(
+            "from switchkeys.utils.bitmaps import decode_segments\n"
+            "from switchkeys.utils.rules import CompiledRules\n"
+            "rules = CompiledRules(data['rules'], decode_segments(data['segments']))\n"
+            "result = [rules.evaluate(*device) for device in data['devices']]",
+            {
+                "rules": RULES,
+                "segments": {
+                    str(group): members.encode() for group, members in segments.items()
+                },
+                "devices": DEVICES,
+            },
+        )
+        self.assertEqual(result, [rules.evaluate(*device) for device in DEVICES])
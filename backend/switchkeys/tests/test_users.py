@@ -0,0 +1,27 @@
+from switchkeys.tests.base import QueryBudgetTestCase
+
+
+class UsersQueryBudgetTests(QueryBudgetTestCase):
+    """Query budgets of the `switchkeys/urls/users.py` endpoints."""
+
+    def test_list_users(self):
+        self.assertQueryBudget(1, "get", "/api/users/")
+
+    def test_list_users_next_page(self):
+        # A deep page costs the same as the first one.
+        next_page = self.client.get("/api/users/?page_size=5").json()["next"]
+        self.assertQueryBudget(1, "get", next_page)
+
+    def test_list_users_with_total(self):
+        response = self.assertQueryBudget(
+            2, "get", "/api/users/?total=true&page_size=100"
+        )
+        self.assertEqual(response.json()["total"], len(response.json()["results"]))
+
+    def test_get_user_by_email(self):
+        self.assertQueryBudget(
+            1, "get", f"/api/users/email/{self.dataset.owner.email}/"
+        )
+
+    def test_get_user(self):
+        self.assertQueryBudget(1, "get", f"/api/users/{self.dataset.owner.id}/")
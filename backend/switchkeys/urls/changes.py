@@ -0,0 +1,7 @@
+from django.urls import path
+
+from switchkeys.views.changes import ChangeFeedApiView
+
+urlpatterns = [
+    path("", ChangeFeedApiView.as_view()),
+]
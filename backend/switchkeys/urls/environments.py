@@ -2,28 +2,58 @@ from django.urls import path
 
 from switchkeys.views.environments import (
     AddEnvironmentUserAPIView,
+    AddEnvironmentUsersAPIView,
     RemoveEnvironmentUserAPIView,
     BaseProjectEnvironmentApiView,
     DeleteEnvironmentFeatureAPIView,
     ProjectEnvironmentApiView,
     ProjectEnvironmentKeyApiView,
     BaseEnvironmentFeatureAPIView,
+    EnvironmentFeatureFanOutAPIView,
     UpdateEnvironmentFeatureAPIView,
-    EnvironmentUserFeaturesApiView,
     SetEnvironmentUserFeaturesApiView,
+    SetEnvironmentUsersFeaturesApiView,
     DeleteEnvironmentUserFeature,
+    EnvironmentChangesApiView,
+    EnvironmentFeatureRulesAPIView,
+    DeleteEnvironmentFeatureRuleAPIView,
 )
+from switchkeys.views.sdk import (
+    AsyncEnvironmentFeaturesView,
+    AsyncEnvironmentUserFeaturesView,
+    AsyncEnvironmentUsersFeaturesView,
+    AsyncProjectEnvironmentKeyView,
+)
+from switchkeys.views.streams import EnvironmentStreamView
+from switchkeys.api.views import split_view_by_method
 
 urlpatterns = [
     path("", BaseProjectEnvironmentApiView.as_view()),
     path("<str:environment_id>/", ProjectEnvironmentApiView.as_view()),
-    path("key/<str:environment_key>/", ProjectEnvironmentKeyApiView.as_view()),
+    path(
+        "key/<str:environment_key>/",
+        split_view_by_method(
+            AsyncProjectEnvironmentKeyView.as_view(),
+            ProjectEnvironmentKeyApiView.as_view(),
+        ),
+    ),
     path("key/<str:environment_key>/add-user/", AddEnvironmentUserAPIView.as_view()),
+    path("key/<str:environment_key>/add-users/", AddEnvironmentUsersAPIView.as_view()),
     path(
         "key/<str:environment_key>/remove-user/", RemoveEnvironmentUserAPIView.as_view()
     ),
+    path("key/<str:environment_key>/changes/", EnvironmentChangesApiView.as_view()),
+    path("key/<str:environment_key>/stream/", EnvironmentStreamView.as_view()),
     path(
-        "key/<str:environment_key>/features/", BaseEnvironmentFeatureAPIView.as_view()
+        "key/<str:environment_key>/features/",
+        split_view_by_method(
+            AsyncEnvironmentFeaturesView.as_view(),
+            BaseEnvironmentFeatureAPIView.as_view(),
+        ),
+    ),
+    path(
+        "key/<str:environment_key>/features/fan-out/<str:feature_name>/",
+        EnvironmentFeatureFanOutAPIView.as_view(),
     ),
     path(
         "key/<str:environment_key>/features/delete/<str:feature_name>/",
@@ -33,9 +63,25 @@ urlpatterns = [
         "key/<str:environment_key>/features/update/<str:feature_name>/",
         UpdateEnvironmentFeatureAPIView.as_view(),
     ),
+    path(
+        "key/<str:environment_key>/features/rules/<str:feature_name>/",
+        EnvironmentFeatureRulesAPIView.as_view(),
+    ),
+    path(
+        "key/<str:environment_key>/features/rules/<str:feature_name>/delete/<int:rule_id>/",
+        DeleteEnvironmentFeatureRuleAPIView.as_view(),
+    ),
+    path(
+        "key/<str:environment_key>/users/features/",
+        AsyncEnvironmentUsersFeaturesView.as_view(),
+    ),
+    path(
+        "key/<str:environment_key>/users/features/set/",
+        SetEnvironmentUsersFeaturesApiView.as_view(),
+    ),
     path(
         "key/<str:environment_key>/users/<str:username>/features/",
-        EnvironmentUserFeaturesApiView.as_view(),
+        AsyncEnvironmentUserFeaturesView.as_view(),
     ),
     path(
         "key/<str:environment_key>/users/<str:username>/features/set/",
@@ -2,10 +2,15 @@ from django.urls import path
 
 from switchkeys.views.groups import (
     BaseOrganizationProjectGroupApiView,
+    GroupSegmentApiView,
     OrganizationProjectGroupApiView,
 )
 
 urlpatterns = [
     path("", BaseOrganizationProjectGroupApiView.as_view()),
     path("<str:group_id>/", OrganizationProjectGroupApiView.as_view()),
+    path(
+        "<str:group_id>/segments/<str:environment_key>/",
+        GroupSegmentApiView.as_view(),
+    ),
 ]
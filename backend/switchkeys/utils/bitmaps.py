@@ -0,0 +1,58 @@
+"""
+This file contains the bitmap indexing the members of the segments by their user ordinal.
+
+The bit of the ordinal `n` is the bit `n % 8` of the byte `n // 8`. The bitmaps are served
+base64 encoded, the Python client decodes them the same way, keep both in sync.
+"""
+
+import base64
+
+
+class Bitmap:
+    """
+    A set of user ordinals, one bit per ordinal, checking an ordinal is a single bit test.
+
+    Example:
+        >>> members = Bitmap()
+        >>> members.add(10)
+        >>> 10 in members, 11 in members
+        (True, False)
+    """
+
+    def __init__(self, data: bytes = b""):
+        self.__data = bytearray(data)
+
+    @classmethod
+    def decode(cls, value: str) -> "Bitmap":
+        """Load a bitmap from its base64 encoded bytes."""
+        return cls(base64.b64decode(value))
+
+    def add(self, ordinal: int) -> None:
+        """Add the ordinal to the set, the bitmap grows to hold it."""
+        index = ordinal >> 3
+        if index >= len(self.__data):
+            self.__data.extend(bytes(index + 1 - len(self.__data)))
+        self.__data[index] |= 1 << (ordinal & 7)
+
+    def discard(self, ordinal: int) -> None:
+        """Remove the ordinal from the set, if present."""
+        index = ordinal >> 3
+        if index < len(self.__data):
+            self.__data[index] &= ~(1 << (ordinal & 7)) & 0xFF
+
+    def __contains__(self, ordinal: int) -> bool:
+        index = ordinal >> 3
+        return index < len(self.__data) and bool(
+            self.__data[index] >> (ordinal & 7) & 1
+        )
+
+    def __len__(self) -> int:
+        return int.from_bytes(self.__data, "little").bit_count()
+
+    def to_bytes(self) -> bytes:
+        """Return the bitmap bytes, without the trailing empty bytes."""
+        return bytes(self.__data).rstrip(b"\0")
+
+    def encode(self) -> str:
+        """Return the base64 encoded bytes of the bitmap."""
+        return base64.b64encode(self.to_bytes()).decode()
@@ -0,0 +1,69 @@
+"""This file contains the process-local caches."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe, least recently used cache with a time to live on every entry.
+
+    Attributes:
+        max_size (int): The maximum number of entries, the least recently used one is evicted first.
+        ttl (float): The number of seconds an entry is valid for.
+        hits (int): The number of lookups served from the cache.
+        misses (int): The number of lookups not found in the cache, or found expired.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.__entries: OrderedDict = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value of the key, or None if it's missing or expired."""
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.__entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self.__entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Cache the value of the key, evicting the least recently used entry when full."""
+        if self.max_size <= 0:
+            return
+
+        with self.__lock:
+            self.__entries[key] = (time.monotonic() + self.ttl, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Drop the key from the cache."""
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all the entries, the counters are kept."""
+        with self.__lock:
+            self.__entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the size and the hit/miss counters of the cache."""
+        with self.__lock:
+            return {
+                "size": len(self.__entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,39 @@
+"""This file contains the helpers to answer conditional (``If-None-Match``) requests."""
+
+import hashlib
+
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.request import Request
+
+
+def environment_etag(revision: int, *variants: str) -> str:
+    """
+    Build the strong ETag of a representation of an environment revision.
+
+    The variants tell apart the representations of the same revision, e.g. the negotiated media
+    type and the `?fields=` selection, they are hashed into the tag.
+
+    Example:
+        >>> environment_etag(5)
+        '"5"'
+        >>> environment_etag(5, "application/json", "", "")
+        '"5-cb2c9e3bc2aa"'
+    """
+    if not variants:
+        return quote_etag(str(revision))
+
+    digest = hashlib.sha1("\0".join(variants).encode()).hexdigest()[:12]
+    return quote_etag(f"{revision}-{digest}")
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Check if the client already has the representation identified by the given ETag,
+    based on the ``If-None-Match`` request header.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+
+    etags = parse_etags(if_none_match)
+    return "*" in etags or etag in etags
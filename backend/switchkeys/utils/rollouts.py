@@ -0,0 +1,46 @@
+"""
+This file contains the evaluation of the percentage rollouts of the features.
+
+A user is in the rollout of a feature when its bucket, a stable hash of the feature name and the
+username, is below the rollout percentage. The same user stays in the rollout while it grows, and
+the Python client evaluates it locally with the same hash, keep both in sync.
+"""
+
+import hashlib
+from typing import Optional
+
+from switchkeys.models.environments import SwitchKeysFeature
+
+# A rollout percentage covers `percentage * ROLLOUT_BUCKETS / 100` buckets.
+ROLLOUT_BUCKETS = 10_000
+
+
+def rollout_bucket(feature_name: str, username: str) -> int:
+    """
+    Return the bucket of a user in the rollouts of a feature, from 0 to `ROLLOUT_BUCKETS - 1`.
+
+    Example:
+        >>> rollout_bucket("debug", "mahmoud")
+        729
+    """
+    digest = hashlib.sha256(f"{feature_name}:{username}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") % ROLLOUT_BUCKETS
+
+
+def is_in_rollout(feature_name: str, username: str, percentage: Optional[int]) -> bool:
+    """Check if a user is in the rollout of a feature, every user is when there's no rollout."""
+    if percentage is None:
+        return True
+
+    return rollout_bucket(feature_name, username) < percentage * ROLLOUT_BUCKETS // 100
+
+
+def get_rollout_value(feature: SwitchKeysFeature, username: str, value: str) -> str:
+    """
+    Return the value of a feature for a user, the user value when it's in the rollout of the
+    feature, else the initial value of the feature.
+    """
+    if is_in_rollout(feature.name, username, feature.rollout_percentage):
+        return value
+
+    return feature.initial_value
@@ -22,6 +22,10 @@ def is_valid_uuid(uuid_to_test, version=4):
     False
     """
 
+    # The canonical form is always 36 characters, reject anything else without parsing it.
+    if not isinstance(uuid_to_test, str) or len(uuid_to_test) != 36:
+        return False
+
     try:
         uuid_obj = UUID(uuid_to_test, version=version)
     except ValueError:
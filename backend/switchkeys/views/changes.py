@@ -0,0 +1,105 @@
+"""
+This module contains the API view of the change feed.
+
+Endpoints:
+- `ChangeFeedApiView`: Reads the changes on the organizations, projects and environments in
+  their commit order, resuming from the sequence number of the last read change.
+"""
+
+from django.conf import settings
+from rest_framework.generics import GenericAPIView
+from rest_framework.request import Request
+
+from switchkeys.api.custom_response import CustomResponse
+from switchkeys.api.permissions import UserIsAuthenticated
+from switchkeys.models.management import OrganizationProject, ProjectEnvironment
+from switchkeys.services.changes import get_change_events
+from switchkeys.services.organizations import filter_user_organizations
+from switchkeys.utils.validators import is_valid_uuid
+
+
+class ChangeFeedApiView(GenericAPIView):
+    """
+    API endpoint for reading the change feed, page by page, limited to the organizations the
+    user owns or is a member of.
+    """
+
+    permission_classes = [UserIsAuthenticated]
+
+    def get(self, request: Request) -> CustomResponse:
+        """
+        Get the changes recorded after the `after` sequence number, in their sequence order.
+        Pass the returned `next` as the `after` of the next call to resume the feed, it's the
+        same `after` when there's no new change.
+
+        Args:
+            request (Request): HTTP request object, accepts the `after`, `limit`, `organization`,
+                `project` and `environment` query params.
+
+        Returns:
+            CustomResponse: Response object containing the changes, with `next` and `has_more`,
+                not found when a filter is outside of the user organizations.
+        """
+        params = {}
+        for name in ("after", "limit", "organization", "project"):
+            value = request.query_params.get(name)
+            if value is None:
+                continue
+            if not value.isdigit():
+                return CustomResponse.bad_request(
+                    message=f"The `{name}` param must be a positive number, got '{value}'."
+                )
+            params[name] = int(value)
+
+        environment_key = request.query_params.get("environment")
+        if environment_key is not None and not is_valid_uuid(environment_key):
+            return CustomResponse.bad_request(
+                message=f"{environment_key} is not a valid UUID."
+            )
+
+        # Only the changes of the caller organizations are readable, so are the filters.
+        organizations = filter_user_organizations(request.user)
+        if (
+            "organization" in params
+            and not organizations.filter(id=params["organization"]).exists()
+        ):
+            return CustomResponse.not_found(message="The organization does not exist.")
+        if (
+            "project" in params
+            and not OrganizationProject.objects.filter(
+                id=params["project"], organization_id__in=organizations
+            ).exists()
+        ):
+            return CustomResponse.not_found(message="Project not found.")
+        if (
+            environment_key is not None
+            and not ProjectEnvironment.objects.filter(
+                environment_key=environment_key,
+                project__organization_id__in=organizations,
+            ).exists()
+        ):
+            return CustomResponse.not_found(
+                message="The project environment does not exist."
+            )
+
+        after = params.get("after", 0)
+        limit = min(
+            params.get("limit") or settings.SWITCHKEYS_CHANGE_FEED_LIMIT,
+            settings.SWITCHKEYS_CHANGE_FEED_MAX_LIMIT,
+        )
+        events, has_more = get_change_events(
+            after,
+            limit,
+            organizations,
+            organization_id=params.get("organization"),
+            project_id=params.get("project"),
+            environment_key=environment_key,
+        )
+        return CustomResponse.success(
+            message="Changes found.",
+            data={
+                "events": events,
+                "next": events[-1]["sequence"] if events else after,
+                "has_more": has_more,
+            },
+        )
@@ -2,27 +2,36 @@
 This module contains API views for managing project environments and related features.
 
 Endpoints:
-- `ProjectEnvironmentKeyApiView`: Retrieves an environment by its key, also can delete it.
+- `ProjectEnvironmentKeyApiView`: Deletes an environment by its key.
 - `BaseProjectEnvironmentApiView`: Lists and creates project environments.
 - `ProjectEnvironmentApiView`: Retrieves, updates, and deletes project environments.
 - `AddEnvironmentUserAPIView`: Adds a user to an environment.
-- `EnvironmentUserFeaturesApiView`: Retrieves user features from an environment.
+- `AddEnvironmentUsersAPIView`: Adds many users to an environment in one call.
 - `DeleteEnvironmentUserFeature`: Deletes a user feature on an environment.
 - `SetEnvironmentUserFeaturesApiView`: Sets user feature on an environment.
+- `SetEnvironmentUsersFeaturesApiView`: Sets many user features on an environment in one call.
 - `RemoveEnvironmentUserAPIView`: Removes a user from an environment.
-- `BaseEnvironmentFeatureAPIView`: Lists and creates environment features.
+- `BaseEnvironmentFeatureAPIView`: Creates environment features.
+- `EnvironmentFeatureFanOutAPIView`: Retrieves the progress of assigning a feature to the users.
 - `DeleteEnvironmentFeatureAPIView`: Deletes an environment feature.
 - `UpdateEnvironmentFeatureAPIView`: Updates an environment feature.
+- `EnvironmentChangesApiView`: Retrieves the environment changes since a revision.
+
+The environments, features and user features are read by the async views of `views/sdk.py`.
 """
 
 from uuid import UUID
+from django.conf import settings
+from django.db import transaction
 from rest_framework.generics import ListAPIView, GenericAPIView
 from rest_framework.request import Request
+from switchkeys.api.fields import FieldSelection
 from switchkeys.api.permissions import IsAdminUser, UserIsAuthenticated
 from switchkeys.utils.validators import is_valid_uuid
 from switchkeys.models.environments import (
     EnvironmentFeature,
     SwitchKeysFeature,
+    TombstoneType,
     UserFeature,
 )
 from switchkeys.models.users import DeviceType
@@ -31,55 +40,64 @@ from switchkeys.services.projects import get_project_by_id
 from switchkeys.models.management import OrganizationProject
 from switchkeys.api.custom_response import CustomResponse
 from switchkeys.services.environments import (
+    add_environment_users,
+    bump_environment_revision,
     create_environment_user,
-    get_all_environment_features,
+    create_users_features,
     get_all_environments,
     get_environment_by_id,
     get_environment_by_key,
     get_environment_feature,
+    get_environment_features,
     get_environment_user_username,
+    get_user_feature_as_feature,
+    get_user_feature_value,
     is_feature_created,
+    is_sparse_feature_storage,
+    set_environment_user_features,
     validate_unique_environment_name,
 )
+from switchkeys.services.deltas import (
+    add_environment_tombstone,
+    get_environment_changes,
+    is_full_sync_required,
+)
+from switchkeys.services.changes import record_environment_change_event
+from switchkeys.services.streams import publish_environment_event
+from switchkeys.services.fanout import (
+    FanOutStatus,
+    fan_out_feature,
+    fan_out_feature_in_background,
+    get_fan_out_progress,
+)
+from switchkeys.services.payloads import invalidate_environment_payloads
+from switchkeys.services.snapshots import (
+    build_environment_snapshot,
+    get_environment_document,
+    invalidate_project_snapshots,
+    refresh_environment_snapshot,
+)
 from switchkeys.serializers.environments import (
+    FeatureRuleSerializer,
     AddEnvironmentUserSerializer,
+    AddEnvironmentUsersSerializer,
     EnvironmentFeatureSerialize,
     ProjectEnvironmentSerializer,
     RemoveEnvironmentUserSerializer,
+    SetEnvironmentUsersFeaturesSerializer,
     SwitchKeysFeatureSerializer,
     EnvironmentFeatureSerializer,
-    UserFeatureSerializers,
 )
 
 
-class ProjectEnvironmentKeyApiView(ListAPIView):
+class ProjectEnvironmentKeyApiView(GenericAPIView):
     """
-    API endpoint for retrieving an environment by its key.
+    API endpoint for deleting an environment by its key, it's read by `AsyncProjectEnvironmentKeyView`.
     """
 
     serializer_class = ProjectEnvironmentSerializer
 
-    def get(self, request: Request, environment_key: UUID):
-        """Get the queryset of projects for the specified organization"""
-        environment_key = self.kwargs.get("environment_key")
-
-        if not is_valid_uuid(environment_key):
-            return CustomResponse.bad_request(
-                message=f"{environment_key} is not valid UUID."
-            )
-
-        environment = get_environment_by_key(environment_key)
-
-        if environment is None:
-            return CustomResponse.not_found(
-                message="The project environment does not exist."
-            )
-
-        return CustomResponse.success(
-            message="Environment found.",
-            data=self.serializer_class(environment).data,
-        )
-
+    @transaction.atomic
     def delete(self, request: Request, environment_key: UUID):
         """Delete an environment by it's key."""
         environment_key = self.kwargs.get("environment_key")
@@ -102,7 +120,11 @@ class ProjectEnvironmentKeyApiView(ListAPIView):
                 message="You do not have permission to access this resource because you are not the creator of the organization that owns this project."
             )
 
+        bump_environment_revision(environment)
+        invalidate_environment_payloads(environment)
+        publish_environment_event(environment, "environment.deleted")
         environment.delete()
+        invalidate_project_snapshots(project)
         return CustomResponse.success(
             message="Project has been updated successfully.",
             status_code=204,
@@ -132,9 +154,10 @@ class BaseProjectEnvironmentApiView(ListAPIView):
         """
         Retrieves all environments in the system.
         """
-        get_queryset = get_all_environments()
+        get_queryset = get_all_environments(FieldSelection.from_request(self.request))
         return get_queryset
 
+    @transaction.atomic
     def post(self, request: Request) -> CustomResponse:
         """
         Creates a new project environment.
@@ -164,7 +187,11 @@ class BaseProjectEnvironmentApiView(ListAPIView):
                     message=f"It seems you've already created a '{environment_name}' environment for this project. Please remove the existing one before creating a new one, or consider changing the name to avoid duplication.",
                 )
 
-            serializer.save(project=project)
+            environment = serializer.save(project=project)
+            invalidate_project_snapshots(project)
+            record_environment_change_event(
+                environment, "environment.created", name=environment.name
+            )
             return CustomResponse.success(
                 data=serializer.data,
                 message="Project environment has been created successfully.",
@@ -207,10 +234,13 @@ class ProjectEnvironmentApiView(GenericAPIView):
                 message="The project environment does not exist."
             )
         return CustomResponse.success(
-            data=ProjectEnvironmentSerializer(environment).data,
+            data=get_environment_document(
+                environment, FieldSelection.from_request(request)
+            ),
             message="The project environment found.",
         )
 
+    @transaction.atomic
     def put(self, request: Request, environment_id: str) -> CustomResponse:
         """
         Updates a project environment by its ID.
@@ -247,19 +277,29 @@ class ProjectEnvironmentApiView(GenericAPIView):
                     message=f"It seems you've already created a '{environment_name}' environment for this project. Please remove the existing one before creating a new one, or consider changing the name to avoid duplication.",
                 )
 
+            previous_project = environment.project
             serializer.save()
+            invalidate_project_snapshots(previous_project)
+            invalidate_project_snapshots(project)
+            record_environment_change_event(
+                environment,
+                "environment.updated",
+                name=environment.name,
+                previous_project_id=previous_project.id,
+            )
             return CustomResponse.success(
-                data=serializer.data,
+                data=build_environment_snapshot(environment),
                 message="Organization project environment has been updated successfully.",
                 status_code=201,
             )
 
         return CustomResponse.bad_request(
-            data=ProjectEnvironmentSerializer(environment).data,
+            data=build_environment_snapshot(environment),
             message="Please make sure that you entered a valid data..",
             error=serializer.errors,
         )
 
+    @transaction.atomic
     def delete(self, request: Request, environment_id: str) -> CustomResponse:
         """
         Deletes a project environment by its ID.
@@ -277,7 +317,11 @@ class ProjectEnvironmentApiView(GenericAPIView):
                 message="You do not have permission to access this resource because you are not the creator of the organization that owns this project."
             )
 
+        bump_environment_revision(environment)
+        invalidate_environment_payloads(environment)
+        publish_environment_event(environment, "environment.deleted")
         environment.delete()
+        invalidate_project_snapshots(project)
         return CustomResponse.success(
             message="Project has been updated successfully.",
             status_code=204,
@@ -291,6 +335,7 @@ class AddEnvironmentUserAPIView(GenericAPIView):
 
     serializer_class = AddEnvironmentUserSerializer
 
+    @transaction.atomic
     def put(self, request: Request, environment_key: UUID) -> CustomResponse:
         """
         Adds a user to the specified environment.
@@ -309,10 +354,14 @@ class AddEnvironmentUserAPIView(GenericAPIView):
                 message="The project environment does not exist."
             )
 
-        serializer = self.get_serializer(data=request.data)
+        # The serializer reads the user and its features from the environment.
+        serializer = self.get_serializer(
+            data=request.data,
+            context={**self.get_serializer_context(), "environment": environment},
+        )
         if serializer.is_valid():
             username = serializer.validated_data.get("username")
-            user = get_environment_user_username(username)
+            user = get_environment_user_username(environment, username)
             if user is None:
                 device_data = serializer.validated_data.get("device")
                 device_type = device_data.get("device_type")
@@ -332,31 +381,18 @@ class AddEnvironmentUserAPIView(GenericAPIView):
                     )
 
                 user = create_environment_user(
+                    environment=environment,
                     username=username,
                     device_type=device_type,
                     device_version=device_version,
                 )
 
-            environment.users.add(user)
-            environment_features = EnvironmentFeature.objects.get_or_create(
-                environment=environment
-            )[0]
-
-            for feature in environment_features.features.all():
-                switchkey_feature = SwitchKeysFeature.objects.get(id=feature.id)
-                created = UserFeature.objects.filter(
-                    user=user,
-                    feature=switchkey_feature,
-                )
-
-                if len(created) == 0:
-                    UserFeature.objects.create(
-                        user=user,
-                        feature=switchkey_feature,
-                        feature_value=feature.value,
-                    )
+            revision = bump_environment_revision(environment)
+            create_users_features(environment, [user], revision)
 
-            environment.save()
+            refresh_environment_snapshot(environment)
+            invalidate_environment_payloads(environment, user.username)
+            publish_environment_event(environment, "user.added", username=user.username)
             return CustomResponse.success(
                 message="User added successfully.", data=serializer.data
             )
@@ -366,27 +402,26 @@ class AddEnvironmentUserAPIView(GenericAPIView):
         )
 
 
-class EnvironmentUserFeaturesApiView(GenericAPIView):
+class AddEnvironmentUsersAPIView(GenericAPIView):
     """
-    API endpoint for getting user features from an environment.
+    API endpoint for adding many users to an environment in one call.
     """
 
-    serializer_class = UserFeatureSerializers
+    serializer_class = AddEnvironmentUsersSerializer
 
-    def get_queryset(self):
+    @transaction.atomic
+    def put(self, request: Request, environment_key: UUID) -> CustomResponse:
         """
-        Get user features from the specified environment.
+        Adds many users with their devices to the specified environment in one transaction.
 
         Args:
-            request (Request): HTTP request object.
-            environment_key (UUID): The key of the environment to remove the user from.
-            username (str): the enviroment user username.
+            request (Request): HTTP request object, holds the `users` list of
+                `{username, device: {device_type, version}}` items.
+            environment_key (UUID): The key of the environment to add the users to.
 
         Returns:
-            CustomResponse: Response object containing the result of the operation.
+            CustomResponse: Response object containing the result of every item.
         """
-        environment_key = self.kwargs.get("environment_key")
-        username = self.kwargs.get("username")
 
         # Validate environment key
         environment_key = self.kwargs.get("environment_key")
@@ -395,47 +430,33 @@ class EnvironmentUserFeaturesApiView(GenericAPIView):
                 message=f"{environment_key} is not a valid UUID."
             )
 
-        # Get the environment by key
         environment = get_environment_by_key(environment_key)
         if environment is None:
-            # Return 404 if the environment does not exist
             return CustomResponse.not_found(
                 message="The project environment does not exist."
             )
 
-        # Get the user from the environment by username
-        user = get_environment_user_username(username)
-        if user is None:
-            # Return 404 if the user does not exist
-            return CustomResponse.not_found(message="User not found.")
-
-        if user not in environment.users.all():
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
             return CustomResponse.bad_request(
-                message=f"User `{user.username}` is not on the `{environment.name}` environment, try to add the user first to the environment."
+                message="Please make sure that you entered a valid data.",
+                error=serializer.errors,
             )
 
-        user_features = UserFeature.objects.filter(user=user)
-        return user_features
-
-    def get(
-        self, request: Request, environment_key: UUID, username: str
-    ) -> CustomResponse:
-        """
-        Get user features from the specified environment.
-
-        Args:
-            request (Request): HTTP request object.
-            environment_key (UUID): The key of the environment to remove the user from.
-            username (str): the enviroment user username.
+        results, users = add_environment_users(
+            environment, serializer.validated_data.get("users")
+        )
 
-        Returns:
-            CustomResponse: Response object containing the result of the operation.
-        """
+        if users:
+            refresh_environment_snapshot(environment)
+            invalidate_environment_payloads(
+                environment, *[user.username for user in users]
+            )
+            publish_environment_event(environment, "users.added", count=len(users))
 
-        user_features = self.get_queryset()
         return CustomResponse.success(
-            message="User features found.",
-            data=self.serializer_class(user_features, many=True).data,
+            message="Users added successfully.",
+            data={"revision": environment.revision, "results": results},
         )
 
 
@@ -444,6 +465,7 @@ class DeleteEnvironmentUserFeature(GenericAPIView):
     API endpoint for deleting user feature on an environment.
     """
 
+    @transaction.atomic
     def delete(
         self, request: Request, environment_key: UUID, username: str, feature_name: str
     ):
@@ -476,17 +498,11 @@ class DeleteEnvironmentUserFeature(GenericAPIView):
             )
 
         # Get the user from the environment by username
-        user = get_environment_user_username(username)
+        user = get_environment_user_username(environment, username)
         if user is None:
             # Return 404 if the user does not exist
             return CustomResponse.not_found(message="User not found.")
 
-        # Validate if the user exist on the environment
-        if user not in environment.users.all():
-            return CustomResponse.bad_request(
-                message=f"User `{user.username}` is not on the `{environment.name}` environment, try to add the user first to the environment."
-            )
-
         # Get and validate the feature, check if the feature exist on the user
         user_features = UserFeature.objects.filter(user=user).filter(
             feature__name=feature_name
@@ -500,6 +516,22 @@ class DeleteEnvironmentUserFeature(GenericAPIView):
             feature__name=feature_name
         )
         user_feature.delete()
+        revision = bump_environment_revision(environment)
+        add_environment_tombstone(
+            environment,
+            revision,
+            TombstoneType.USER_FEATURE,
+            name=feature_name,
+            username=user.username,
+        )
+        refresh_environment_snapshot(environment)
+        invalidate_environment_payloads(environment, user.username)
+        publish_environment_event(
+            environment,
+            "user_feature.deleted",
+            username=user.username,
+            name=feature_name,
+        )
         return CustomResponse.success(status_code=204, message="Feature deleted.")
 
 
@@ -510,6 +542,7 @@ class SetEnvironmentUserFeaturesApiView(GenericAPIView):
 
     serializer_class = EnvironmentFeatureSerializer
 
+    @transaction.atomic
     def put(
         self, request: Request, environment_key: UUID, username: str
     ) -> CustomResponse:
@@ -541,17 +574,11 @@ class SetEnvironmentUserFeaturesApiView(GenericAPIView):
             )
 
         # Get the user from the environment by username
-        user = get_environment_user_username(username)
+        user = get_environment_user_username(environment, username)
         if user is None:
             # Return 404 if the user does not exist
             return CustomResponse.not_found(message="User not found.")
 
-        # Validate if the user exist on the environment
-        if user not in environment.users.all():
-            return CustomResponse.bad_request(
-                message=f"User `{user.username}` is not on the `{environment.name}` environment, try to add the user first to the environment."
-            )
-
         serializer = self.get_serializer(data=request.data)
         if not serializer.is_valid():
             return CustomResponse.bad_request(
@@ -567,12 +594,17 @@ class SetEnvironmentUserFeaturesApiView(GenericAPIView):
         )
 
         if len(user_features) == 0:
-            # Create new user feature
-            feature = SwitchKeysFeature.objects.create(
-                name=feature_name,
-                value=feature_value,
-                initial_value=feature_value,
+            # Override the environment feature, or create the user own feature.
+            feature = (
+                get_environment_features(environment).filter(name=feature_name).first()
             )
+            if feature is None:
+                feature = SwitchKeysFeature.objects.create(
+                    name=feature_name,
+                    value=feature_value,
+                    initial_value=feature_value,
+                    is_default=False,
+                )
 
             UserFeature.objects.create(user=user, feature=feature)
 
@@ -580,13 +612,90 @@ class SetEnvironmentUserFeaturesApiView(GenericAPIView):
             feature__name=feature_name
         )
         user_feature.feature_value = feature_value
+        user_feature.is_override = True
+        user_feature.revision = bump_environment_revision(environment)
         user_feature.save()
+        refresh_environment_snapshot(environment)
+        invalidate_environment_payloads(environment, user.username)
+        publish_environment_event(
+            environment,
+            "user_feature.set",
+            username=user.username,
+            name=feature_name,
+            value=feature_value,
+        )
 
-        # Change the value for the user.
-        user_feature.feature.value = user_feature.feature_value
+        # Change the value for the user, an override is served as it is.
+        user_feature.feature_value = get_user_feature_value(user_feature, user.username)
         return CustomResponse.success(
             message="User features found.",
-            data=SwitchKeysFeatureSerializer(user_feature.feature).data,
+            data=SwitchKeysFeatureSerializer(
+                get_user_feature_as_feature(user_feature)
+            ).data,
+        )
+
+
+class SetEnvironmentUsersFeaturesApiView(GenericAPIView):
+    """
+    API endpoint for setting many user features on an environment in one call.
+    """
+
+    serializer_class = SetEnvironmentUsersFeaturesSerializer
+
+    @transaction.atomic
+    def put(self, request: Request, environment_key: UUID) -> CustomResponse:
+        """
+        Set many user features on the specified environment in one transaction.
+
+        Args:
+            request (Request): HTTP request object, holds the `features` list of
+                `{username, name, value}` items.
+            environment_key (UUID): The key of the environment of the users.
+
+        Returns:
+            CustomResponse: Response object containing the result of every item.
+        """
+
+        # Validate environment key
+        environment_key = self.kwargs.get("environment_key")
+        if not is_valid_uuid(environment_key):
+            return CustomResponse.bad_request(
+                message=f"{environment_key} is not a valid UUID."
+            )
+
+        # Get the environment by key
+        environment = get_environment_by_key(environment_key)
+        if environment is None:
+            # Return 404 if the environment does not exist
+            return CustomResponse.not_found(
+                message="The project environment does not exist."
+            )
+
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return CustomResponse.bad_request(
+                message="Please make sure that you entered a valid data.",
+                error=serializer.errors,
+            )
+
+        results, users = set_environment_user_features(
+            environment, serializer.validated_data.get("features")
+        )
+
+        if users:
+            refresh_environment_snapshot(environment)
+            invalidate_environment_payloads(
+                environment, *[user.username for user in users]
+            )
+            publish_environment_event(
+                environment,
+                "user_features.set",
+                count=len(users),
+            )
+
+        return CustomResponse.success(
+            message="User features have been set.",
+            data={"revision": environment.revision, "results": results},
         )
 
 
@@ -597,6 +706,7 @@ class RemoveEnvironmentUserAPIView(GenericAPIView):
 
     serializer_class = RemoveEnvironmentUserSerializer
 
+    @transaction.atomic
     def put(self, request: Request, environment_key: UUID) -> CustomResponse:
         """
         Remove a user from the specified environment.
@@ -630,21 +740,32 @@ class RemoveEnvironmentUserAPIView(GenericAPIView):
             # Get the username from the serializer data
             username = serializer.validated_data.get("username")
             # Get the user from the environment by username
-            user = get_environment_user_username(username)
+            user = get_environment_user_username(environment, username)
             if user is None:
                 # Return 404 if the user does not exist
                 return CustomResponse.not_found(message="User not found.")
 
-            # Delete user features associated with the user
-            user_features = UserFeature.objects.filter(user=user).all()
-            user_features.delete()
-
-            # Remove the user from the environment
-            environment.users.remove(user)
-            environment.save()
+            # Delete the user with its user features, the user only exists on the environment.
+            # The features are read first, the deletion cascades to them.
+            user_features = [
+                {"name": name, "value": value}
+                for name, value in UserFeature.objects.filter(user=user)
+                .order_by("feature__name")
+                .values_list("feature__name", "feature_value")
+            ]
+            user.delete()
+            revision = bump_environment_revision(environment)
+            add_environment_tombstone(
+                environment, revision, TombstoneType.USER, username=user.username
+            )
+            refresh_environment_snapshot(environment)
+            invalidate_environment_payloads(environment, user.username)
+            publish_environment_event(
+                environment, "user.removed", username=user.username
+            )
 
             data = serializer.data
-            data["featrues"] = user_features
+            data["features"] = user_features
 
             return CustomResponse.success(
                 message="User removed successfully.", data=data
@@ -657,43 +778,14 @@ class RemoveEnvironmentUserAPIView(GenericAPIView):
 
 
 class BaseEnvironmentFeatureAPIView(GenericAPIView):
+    """
+    API endpoint for creating environment features, they're read by `AsyncEnvironmentFeaturesView`.
+    """
 
     serializer_class = EnvironmentFeatureSerialize
-    permission_classes = []
-
-    def get_permissions(self):
-        if self.request.method == "GET":
-            self.permission_classes = []
-        else:
-            self.permission_classes = [UserIsAuthenticated]
-
-        return super(BaseEnvironmentFeatureAPIView, self).get_permissions()
-
-    def get_queryset(self):
-        """Get all ``environment features`` in the system."""
-        environment_key = self.kwargs.get("environment_key")
-        environment = get_environment_by_key(environment_key)
-        if environment is None:
-            return CustomResponse.not_found(
-                message="The project environment does not exist."
-            )
-
-        if not is_valid_uuid(environment_key):
-            return CustomResponse.bad_request(
-                message=f"{environment_key} is not valid UUID."
-            )
-
-        get_queryset = get_all_environment_features(environment)
-        return get_queryset
-
-    def get(self, request: Request, environment_key: UUID):
-        """Get all features exists on the environment"""
-        environment = self.get_queryset()
-        return CustomResponse.success(
-            message="Environment features found.",
-            data=self.serializer_class(environment, many=True).data,
-        )
+    permission_classes = [UserIsAuthenticated]
 
+    @transaction.atomic
     def post(self, request: Request, environment_key: UUID) -> CustomResponse:
         """
         Create a new environment feature.
@@ -732,6 +824,7 @@ class BaseEnvironmentFeatureAPIView(GenericAPIView):
         # Extract feature name and value from serializer
         feature_name = serializer.validated_data.get("name")
         feature_value = serializer.validated_data.get("value")
+        rollout_percentage = serializer.validated_data.get("rollout_percentage")
 
         # Check if the feature with the same name already exists in the environment
         if is_feature_created(feature_name, environment):
@@ -740,27 +833,89 @@ class BaseEnvironmentFeatureAPIView(GenericAPIView):
                 error=unique_field_error("name"),
             )
 
-        # Create the new feature
-        feature = SwitchKeysFeature.objects.create(
-            name=feature_name,
-            value=feature_value,
-            initial_value=feature_value,
+        with transaction.atomic():
+            # Create the new feature
+            revision = bump_environment_revision(environment)
+            feature = SwitchKeysFeature.objects.create(
+                environment=environment,
+                name=feature_name,
+                value=feature_value,
+                initial_value=feature_value,
+                rollout_percentage=rollout_percentage,
+                revision=revision,
+            )
+
+            # Get and add the feature to the environment
+            env_feature = EnvironmentFeature.objects.get(environment=environment)
+            env_feature.features.add(feature)
+
+            # Assign the new feature to all users in the environment, large environments are
+            # fanned out once the transaction is committed. The sparse storage has nothing to
+            # assign, the users read the environment value.
+            if is_sparse_feature_storage():
+                fan_out = None
+            elif (
+                environment.users.count() > settings.SWITCHKEYS_FAN_OUT_ASYNC_THRESHOLD
+            ):
+                fan_out = fan_out_feature_in_background(environment, feature)
+            else:
+                fan_out = fan_out_feature(environment, feature, revision)
+
+            refresh_environment_snapshot(environment)
+            invalidate_environment_payloads(environment)
+            publish_environment_event(
+                environment,
+                "feature.created",
+                name=feature_name,
+                value=feature_value,
+                rollout_percentage=rollout_percentage,
+            )
+
+        data = SwitchKeysFeatureSerializer(feature).data
+        data["fan_out"] = fan_out
+        return CustomResponse.success(
+            data=data,
+            message="Project environment has been created successfully.",
+            status_code=(
+                202
+                if fan_out and fan_out["status"] == FanOutStatus.RUNNING.value
+                else None
+            ),
         )
 
-        # Get and add the feature to the environment
-        env_feature = EnvironmentFeature.objects.get(environment=environment)
-        env_feature.features.add(feature)
-        environment.save()
 
-        # Assign the new feature to all users in the environment
-        for user in environment.users.all():
-            UserFeature.objects.create(
-                user=user, feature=feature, feature_value=feature_value
+class EnvironmentFeatureFanOutAPIView(GenericAPIView):
+    permission_classes = []
+
+    def get(self, request: Request, environment_key: UUID, feature_name: str):
+        """Get the progress of assigning an environment feature to the environment users."""
+        # Validate environment key
+        environment_key = self.kwargs.get("environment_key")
+        if not is_valid_uuid(environment_key):
+            return CustomResponse.bad_request(
+                message=f"{environment_key} is not a valid UUID."
+            )
+
+        # Get the environment
+        environment = get_environment_by_key(environment_key)
+        if environment is None:
+            return CustomResponse.not_found(
+                message="The project environment does not exist."
+            )
+
+        feature = get_environment_feature(feature_name, environment)
+        if feature is None:
+            return CustomResponse.not_found(
+                message=f"Feature '{feature_name}' does not exist on the '{environment.name}' environment.",
+            )
+        progress = get_fan_out_progress(feature)
+        if progress is None:
+            return CustomResponse.not_found(
+                message=f"There is no fan-out progress for the '{feature_name}' feature.",
             )
 
         return CustomResponse.success(
-            data=SwitchKeysFeatureSerializer(feature).data,
-            message="Project environment has been created successfully.",
+            message="Feature fan-out progress found.", data=progress
         )
 
 
@@ -768,6 +923,7 @@ class DeleteEnvironmentFeatureAPIView(GenericAPIView):
     # Update the permission later.
     permission_classes = []
 
+    @transaction.atomic
     def delete(self, request: Request, environment_key: UUID, feature_name: str):
         """Delete an environment feature from the environment and from all environment users"""
         # Validate environment key
@@ -784,15 +940,20 @@ class DeleteEnvironmentFeatureAPIView(GenericAPIView):
                 message="The project environment does not exist."
             )
 
-        # Check if the feature with the same name already exists in the environment
-        if not is_feature_created(feature_name, environment):
+        # Get the feature, it must exist on the environment
+        feature = get_environment_feature(feature_name, environment)
+        if feature is None:
             return CustomResponse.not_found(
                 message=f"Feature '{feature_name}' does not exist on the '{environment.name}' environment.",
             )
-
-        env_feature = get_environment_feature(feature_name, environment)
-        feature = env_feature.features.get(name=feature_name)
         feature.delete()
+        revision = bump_environment_revision(environment)
+        add_environment_tombstone(
+            environment, revision, TombstoneType.FEATURE, name=feature_name
+        )
+        refresh_environment_snapshot(environment)
+        invalidate_environment_payloads(environment)
+        publish_environment_event(environment, "feature.deleted", name=feature_name)
 
         return CustomResponse.success(
             status_code=204,
@@ -805,6 +966,7 @@ class UpdateEnvironmentFeatureAPIView(GenericAPIView):
     # Update the permission later.
     permission_classes = []
 
+    @transaction.atomic
     def put(self, request: Request, environment_key: UUID, feature_name: str):
         """Update an environment feature"""
         # Validate environment key
@@ -821,15 +983,13 @@ class UpdateEnvironmentFeatureAPIView(GenericAPIView):
                 message="The project environment does not exist."
             )
 
-        # Check if the feature with the same name already exists in the environment
-        if not is_feature_created(feature_name, environment):
+        # Get the feature, it must exist on the environment
+        feature = get_environment_feature(feature_name, environment)
+        if feature is None:
             return CustomResponse.not_found(
                 message=f"Feature '{feature_name}' does not exist on the '{environment.name}' environment.",
             )
 
-        env_feature = get_environment_feature(feature_name, environment)
-        feature = env_feature.features.get(name=feature_name)
-
         serializer = self.get_serializer(data=request.data)
         if not serializer.is_valid():
             return CustomResponse.bad_request(
@@ -841,6 +1001,10 @@ class UpdateEnvironmentFeatureAPIView(GenericAPIView):
         # Extract feature name and value from serializer
         new_feature_name = serializer.validated_data.get("name")
         new_feature_value = serializer.validated_data.get("value")
+        # The rollout is kept when it's not given, and removed when it's null.
+        rollout_percentage = serializer.validated_data.get(
+            "rollout_percentage", feature.rollout_percentage
+        )
 
         # Check if the feature with the same name already exists in the environment
         if new_feature_name != feature_name and is_feature_created(
@@ -851,11 +1015,231 @@ class UpdateEnvironmentFeatureAPIView(GenericAPIView):
                 error=unique_field_error("name"),
             )
 
+        revision = bump_environment_revision(environment)
+        if new_feature_name != feature_name:
+            # Renaming drops the old name from the clients, and changes every user feature.
+            add_environment_tombstone(
+                environment, revision, TombstoneType.FEATURE, name=feature_name
+            )
+            UserFeature.objects.filter(feature=feature).update(revision=revision)
+
+        if new_feature_value != feature.value and not is_sparse_feature_storage():
+            # The materialized user features without an override follow the new value.
+            UserFeature.objects.filter(feature=feature, is_override=False).update(
+                feature_value=new_feature_value, revision=revision
+            )
+
         feature.name = new_feature_name
         feature.value = new_feature_value
+        feature.rollout_percentage = rollout_percentage
+        feature.revision = revision
         feature.save()
+        refresh_environment_snapshot(environment)
+        invalidate_environment_payloads(environment)
+        publish_environment_event(
+            environment,
+            "feature.updated",
+            name=new_feature_name,
+            value=new_feature_value,
+            rollout_percentage=rollout_percentage,
+            previous_name=feature_name,
+        )
 
         return CustomResponse.success(
             message="The environment feature has been deleted successfully.",
             data=SwitchKeysFeatureSerializer(feature).data,
         )
+
+
+class EnvironmentFeatureRulesAPIView(GenericAPIView):
+    """
+    API endpoint for listing and creating the targeting rules of an environment feature.
+    """
+
+    serializer_class = FeatureRuleSerializer
+    permission_classes = [UserIsAuthenticated]
+
+    def get(self, request: Request, environment_key: UUID, feature_name: str):
+        """Get the rules of an environment feature, by priority."""
+        environment_key = self.kwargs.get("environment_key")
+        if not is_valid_uuid(environment_key):
+            return CustomResponse.bad_request(
+                message=f"{environment_key} is not a valid UUID."
+            )
+
+        environment = get_environment_by_key(environment_key)
+        if environment is None:
+            return CustomResponse.not_found(
+                message="The project environment does not exist."
+            )
+
+        feature = get_environment_feature(feature_name, environment)
+        if feature is None:
+            return CustomResponse.not_found(
+                message=f"Feature '{feature_name}' does not exist on the '{environment.name}' environment.",
+            )
+
+        return CustomResponse.success(
+            message="Feature rules found.",
+            data=self.get_serializer(feature.rules.all(), many=True).data,
+        )
+
+    @transaction.atomic
+    def post(self, request: Request, environment_key: UUID, feature_name: str):
+        """
+        Create a targeting rule on an environment feature, e.g. the Android users from the
+        version 5.2 get another value. The users of the targeted devices need no user feature.
+        """
+        environment_key = self.kwargs.get("environment_key")
+        if not is_valid_uuid(environment_key):
+            return CustomResponse.bad_request(
+                message=f"{environment_key} is not a valid UUID."
+            )
+
+        environment = get_environment_by_key(environment_key)
+        if environment is None:
+            return CustomResponse.not_found(
+                message="The project environment does not exist."
+            )
+
+        feature = get_environment_feature(feature_name, environment)
+        if feature is None:
+            return CustomResponse.not_found(
+                message=f"Feature '{feature_name}' does not exist on the '{environment.name}' environment.",
+            )
+
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return CustomResponse.bad_request(
+                message="Please make sure that you entered valid data.",
+                error=serializer.errors,
+                data=request.data,
+            )
+
+        segment = serializer.validated_data.get("segment")
+        if segment is not None and segment.project_id != environment.project_id:
+            return CustomResponse.bad_request(
+                message=f"The group '{segment.name}' is not a group of the environment project.",
+            )
+
+        with transaction.atomic():
+            # The clients read the new rules with the changed feature.
+            revision = bump_environment_revision(environment)
+            feature.revision = revision
+            feature.save(update_fields=["revision"])
+            rule = serializer.save(environment=environment, feature=feature)
+            refresh_environment_snapshot(environment)
+            invalidate_environment_payloads(environment)
+            publish_environment_event(
+                environment, "feature_rule.created", name=feature_name, rule=rule.id
+            )
+
+        return CustomResponse.success(
+            message="The feature rule has been created successfully.",
+            data=self.get_serializer(rule).data,
+            status_code=201,
+        )
+
+
+class DeleteEnvironmentFeatureRuleAPIView(GenericAPIView):
+    permission_classes = [UserIsAuthenticated]
+
+    @transaction.atomic
+    def delete(
+        self, request: Request, environment_key: UUID, feature_name: str, rule_id: int
+    ):
+        """Delete a targeting rule of an environment feature."""
+        environment_key = self.kwargs.get("environment_key")
+        if not is_valid_uuid(environment_key):
+            return CustomResponse.bad_request(
+                message=f"{environment_key} is not a valid UUID."
+            )
+
+        environment = get_environment_by_key(environment_key)
+        if environment is None:
+            return CustomResponse.not_found(
+                message="The project environment does not exist."
+            )
+
+        feature = get_environment_feature(feature_name, environment)
+        if feature is None:
+            return CustomResponse.not_found(
+                message=f"Feature '{feature_name}' does not exist on the '{environment.name}' environment.",
+            )
+
+        with transaction.atomic():
+            if not feature.rules.filter(id=rule_id).delete()[0]:
+                return CustomResponse.not_found(
+                    message=f"The rule {rule_id} does not exist on the '{feature_name}' feature.",
+                )
+
+            revision = bump_environment_revision(environment)
+            feature.revision = revision
+            feature.save(update_fields=["revision"])
+            refresh_environment_snapshot(environment)
+            invalidate_environment_payloads(environment)
+            publish_environment_event(
+                environment, "feature_rule.deleted", name=feature_name, rule=rule_id
+            )
+
+        return CustomResponse.success(
+            status_code=204,
+            message="The feature rule has been deleted successfully.",
+        )
+
+
+class EnvironmentChangesApiView(GenericAPIView):
+    """
+    API endpoint for getting the changes of an environment since a given revision.
+    """
+
+    def get(self, request: Request, environment_key: UUID) -> CustomResponse:
+        """
+        Get the features and user features that changed after the `since` revision, with the
+        deletions that happened after it.
+
+        Args:
+            request (Request): HTTP request object, accepts the `since` and `username` query params.
+            environment_key (UUID): The key of the environment to get its changes.
+
+        Returns:
+            CustomResponse: Response object containing the environment changes.
+        """
+
+        # Validate environment key
+        environment_key = self.kwargs.get("environment_key")
+        if not is_valid_uuid(environment_key):
+            return CustomResponse.bad_request(
+                message=f"{environment_key} is not a valid UUID."
+            )
+
+        since = request.query_params.get("since", "0")
+        if not since.isdigit():
+            return CustomResponse.bad_request(
+                message=f"The `since` revision must be a positive number, got '{since}'."
+            )
+
+        # Get the environment by key
+        environment = get_environment_by_key(environment_key)
+        if environment is None:
+            return CustomResponse.not_found(
+                message="The project environment does not exist."
+            )
+
+        # The deletions after the revision were pruned, they can't be sent anymore.
+        if is_full_sync_required(environment, int(since)):
+            return CustomResponse.gone(
+                message=(
+                    f"The changes since the revision {since} were pruned, "
+                    "a full sync from the revision 0 is required."
+                )
+            )
+
+        return CustomResponse.success(
+            message="Environment changes found.",
+            data=get_environment_changes(
+                environment,
+                since=int(since),
+                username=request.query_params.get("username"),
+            ),
+        )
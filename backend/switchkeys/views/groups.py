@@ -3,10 +3,21 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 
 from switchkeys.models.management import OrganizationProject
-from switchkeys.serializers.groups import OrganizationProjectGroupSerializer
+from switchkeys.serializers.groups import (
+    GroupSegmentSerializer,
+    OrganizationProjectGroupSerializer,
+    UpdateGroupSegmentSerializer,
+)
 from switchkeys.api.permissions import UserIsAuthenticated, IsAdminUser
-from switchkeys.services.groups import get_all_groups, get_group_by_id
+from switchkeys.services.environments import get_environment_by_key
+from switchkeys.services.groups import (
+    get_all_groups,
+    get_group_by_id,
+    get_group_segment,
+    update_segment_members,
+)
 from switchkeys.api.custom_response import CustomResponse
+from switchkeys.utils.validators import is_valid_uuid
 
 
 class BaseOrganizationProjectGroupApiView(ListAPIView):
@@ -79,7 +90,7 @@ class OrganizationProjectGroupApiView(GenericAPIView):
                 message="The organization project group does not exist."
             )
         return CustomResponse.success(
-            data=OrganizationProjectGroupSerializer(group).data,
+            data=self.get_serializer(group).data,
             message="The organization project found.",
         )
 
@@ -135,3 +146,95 @@ class OrganizationProjectGroupApiView(GenericAPIView):
             message="Organization project has been updated successfully.",
             status_code=204,
         )
+
+
+class GroupSegmentApiView(GenericAPIView):
+    serializer_class = UpdateGroupSegmentSerializer
+    permission_classes = []
+
+    def get_permissions(self):
+        if self.request.method == "GET":
+            self.permission_classes = [
+                UserIsAuthenticated,
+            ]
+        else:
+            self.permission_classes = [
+                IsAdminUser,
+            ]
+
+        return super(GroupSegmentApiView, self).get_permissions()
+
+    def get_group_environment(self, group_id: str, environment_key: str):
+        """Return the group and its project environment, or the error response."""
+        group = get_group_by_id(group_id)
+        if group is None:
+            return None, CustomResponse.not_found(
+                message="The organization project group does not exist."
+            )
+
+        if not is_valid_uuid(environment_key):
+            return None, CustomResponse.bad_request(
+                message=f"{environment_key} is not a valid UUID."
+            )
+
+        environment = get_environment_by_key(environment_key)
+        if environment is None or environment.project_id != group.project_id:
+            return None, CustomResponse.not_found(
+                message="The project environment does not exist."
+            )
+
+        return (group, environment), None
+
+    def get(self, request: Request, group_id: str, environment_key: str) -> Response:
+        """Get the segment of a group on an environment, with its members bitmap."""
+        found, error = self.get_group_environment(group_id, environment_key)
+        if error is not None:
+            return error
+
+        group, environment = found
+        segment = get_group_segment(group, environment)
+        if segment is None:
+            return CustomResponse.not_found(
+                message="The group has no members on this environment."
+            )
+
+        return CustomResponse.success(
+            data=GroupSegmentSerializer(segment).data,
+            message="The group segment found.",
+        )
+
+    def put(self, request: Request, group_id: str, environment_key: str) -> Response:
+        """
+        Add and remove members of the segment of a group on an environment, by the usernames of
+        the environment users. The rules targeting the group apply to its members.
+        """
+        found, error = self.get_group_environment(group_id, environment_key)
+        if error is not None:
+            return error
+
+        group, environment = found
+        if request.user.id != group.project.organization.owner_id:
+            return CustomResponse.unauthorized(
+                message="You do not have permission to access this resource because you are not the creator of the organization that owns this project.",
+            )
+
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return CustomResponse.bad_request(
+                message="Please make sure that you entered a valid data.",
+                error=serializer.errors,
+                data=request.data,
+            )
+
+        segment, missing = update_segment_members(
+            group,
+            environment,
+            add=serializer.validated_data["add"],
+            remove=serializer.validated_data["remove"],
+        )
+        data = GroupSegmentSerializer(segment).data
+        data["missing"] = missing
+        return CustomResponse.success(
+            data=data,
+            message="The group segment has been updated successfully.",
+        )
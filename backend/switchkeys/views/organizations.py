@@ -1,9 +1,10 @@
+from django.db import transaction
 from rest_framework.generics import GenericAPIView, ListAPIView
 from rest_framework.request import Request
 from rest_framework.response import Response
 
 from switchkeys.serializers.projects import OrganizationProjectSerializer
-from switchkeys.models.management import OrganizationProject
+from switchkeys.models.management import OrganizationProject, ProjectEnvironment
 from switchkeys.services.users import get_user_by_id
 from switchkeys.api.permissions import UserIsAuthenticated, IsAdminUser
 from switchkeys.serializers.organizations import (
@@ -18,6 +19,9 @@ from switchkeys.services.organizations import (
     get_user_organization_by_name,
 )
 from switchkeys.api.custom_response import CustomResponse
+from switchkeys.services.changes import record_change_event
+from switchkeys.services.snapshots import invalidate_organization_snapshots
+from switchkeys.services.streams import publish_environments_deleted
 
 
 class BaseOrganizationApiView(ListAPIView):
@@ -36,6 +40,7 @@ class BaseOrganizationApiView(ListAPIView):
         get_queryset = get_all_organization()
         return get_queryset
 
+    @transaction.atomic
     def post(self, request: Request) -> Response:
         """Create new organization object."""
 
@@ -53,10 +58,17 @@ class BaseOrganizationApiView(ListAPIView):
             organization_members = request.data.get("members")
 
             if type(organization_members) is list and len(organization_members) >= 0:
-                serializer.save(owner=request.user, members=organization_members)
+                organization = serializer.save(
+                    owner=request.user, members=organization_members
+                )
             else:
-                serializer.save(owner=request.user)
+                organization = serializer.save(owner=request.user)
 
+            record_change_event(
+                "organization.created",
+                organization_id=organization.id,
+                name=organization.name,
+            )
             return CustomResponse.success(
                 data=serializer.data,
                 message="Organization has been created successfully.",
@@ -90,10 +102,11 @@ class OrganizationApiView(GenericAPIView):
         if organization is None:
             return CustomResponse.not_found(message="The organization does not exist.")
         return CustomResponse.success(
-            data=OrganizationSerializer(organization).data,
+            data=self.get_serializer(organization).data,
             message="The organization found.",
         )
 
+    @transaction.atomic
     def put(self, request: Request, organization_id: str) -> Response:
         """Update organization by id"""
         organization = get_organization_by_id(organization_id)
@@ -119,6 +132,12 @@ class OrganizationApiView(GenericAPIView):
             else:
                 serializer.save(owner=request.user)
 
+            invalidate_organization_snapshots(organization)
+            record_change_event(
+                "organization.updated",
+                organization_id=organization.id,
+                name=organization.name,
+            )
             return CustomResponse.success(
                 data=serializer.data,
                 message="Organization has been updated successfully.",
@@ -131,6 +150,7 @@ class OrganizationApiView(GenericAPIView):
             error=serializer.errors,
         )
 
+    @transaction.atomic
     def delete(self, request: Request, organization_id: str) -> Response:
         """Delete an organization by its ID."""
         organization = get_organization_by_id(organization_id)
@@ -138,6 +158,12 @@ class OrganizationApiView(GenericAPIView):
         if organization is None:
             return CustomResponse.not_found(message="The organization does not exist.")
 
+        record_change_event("organization.deleted", organization_id=organization.id)
+        # The environment feeds and streams see the deletion too.
+        publish_environments_deleted(
+            ProjectEnvironment.objects.filter(project__organization=organization),
+            organization.id,
+        )
         organization.delete()
 
         return CustomResponse.success(
@@ -161,7 +187,7 @@ class OrganizationByNameApiView(GenericAPIView):
         if organization is None:
             return CustomResponse.not_found(message="The organization does not exist.")
         return CustomResponse.success(
-            data=OrganizationSerializer(organization).data,
+            data=self.get_serializer(organization).data,
             message="The organization found.",
         )
 
@@ -172,6 +198,7 @@ class OrganizationAddMemberApiView(GenericAPIView):
         IsAdminUser,
     ]
 
+    @transaction.atomic
     def put(self, request: Request, organization_id: str) -> Response:
         """
         Add a member on an organization
@@ -193,6 +220,12 @@ class OrganizationAddMemberApiView(GenericAPIView):
 
             organization.members.add(member)
             organization.save()
+            invalidate_organization_snapshots(organization)
+            record_change_event(
+                "organization.member_added",
+                organization_id=organization.id,
+                member_id=member.id,
+            )
 
             return CustomResponse.success(
                 data=OrganizationSerializer(organization).data,
@@ -212,6 +245,7 @@ class OrganizationRemoveMemberApiView(GenericAPIView):
         IsAdminUser,
     ]
 
+    @transaction.atomic
     def put(self, request: Request, organization_id: str) -> Response:
         """
         Add a member on an organization
@@ -239,6 +273,12 @@ class OrganizationRemoveMemberApiView(GenericAPIView):
 
             organization.members.remove(member)
             organization.save()
+            invalidate_organization_snapshots(organization)
+            record_change_event(
+                "organization.member_removed",
+                organization_id=organization.id,
+                member_id=member.id,
+            )
 
             return CustomResponse.success(
                 data=OrganizationSerializer(organization).data,
@@ -269,5 +309,5 @@ class OrganizationProjectsApiView(ListAPIView):
         """Get all projects exists on the organization"""
         projects = self.get_queryset()
         return CustomResponse.success(
-            data=self.serializer_class(projects, many=True).data
+            data=self.get_serializer(projects, many=True).data
         )
@@ -1,8 +1,13 @@
+from django.db import transaction
 from rest_framework.generics import GenericAPIView, ListAPIView
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from switchkeys.models.management import ProjectEnvironment
+from switchkeys.services.changes import record_change_event
 from switchkeys.services.environments import create_environments
+from switchkeys.services.snapshots import invalidate_project_snapshots
+from switchkeys.services.streams import publish_environments_deleted
 from switchkeys.services.organizations import get_organization_by_id
 from switchkeys.api.permissions import UserIsAuthenticated, IsAdminUser
 from switchkeys.serializers.projects import OrganizationProjectSerializer
@@ -35,6 +40,7 @@ class BaseOrganizationProjectApiView(ListAPIView):
         get_queryset = get_all_projects()
         return get_queryset
 
+    @transaction.atomic
     def post(self, request: Request) -> Response:
         """Create new organization project."""
 
@@ -63,6 +69,12 @@ class BaseOrganizationProjectApiView(ListAPIView):
             project = serializer.save(organization=organization)
             # When creating new projects, we need to create three environments: Development, Staging, and Production.
             create_environments(project)
+            record_change_event(
+                "project.created",
+                organization_id=organization.id,
+                project_id=project.id,
+                name=project.name,
+            )
             data = serializer.data
 
             return CustomResponse.success(
@@ -100,10 +112,11 @@ class OrganizationProjectApiView(GenericAPIView):
                 message="The organization project does not exist."
             )
         return CustomResponse.success(
-            data=OrganizationProjectSerializer(project).data,
+            data=self.get_serializer(project).data,
             message="The organization project found.",
         )
 
+    @transaction.atomic
     def put(self, request: Request, project_id: str) -> Response:
         """Update an organization project by its ID."""
         project = get_project_by_id(project_id)
@@ -127,7 +140,16 @@ class OrganizationProjectApiView(GenericAPIView):
                     message="You do not have permission to access this resource because you are not the creator of this organization.",
                 )
 
+            previous_organization_id = project.organization_id
             serializer.save(organization=organization)
+            invalidate_project_snapshots(project)
+            record_change_event(
+                "project.updated",
+                organization_id=organization.id,
+                project_id=project.id,
+                name=project.name,
+                previous_organization_id=previous_organization_id,
+            )
 
             return CustomResponse.success(
                 data=serializer.data,
@@ -141,6 +163,7 @@ class OrganizationProjectApiView(GenericAPIView):
             error=serializer.errors,
         )
 
+    @transaction.atomic
     def delete(self, request: Request, project_id: str) -> Response:
         """Delete an organization project by its ID."""
         project = get_project_by_id(project_id)
@@ -150,6 +173,16 @@ class OrganizationProjectApiView(GenericAPIView):
                 message="The organization project does not exist."
             )
 
+        record_change_event(
+            "project.deleted",
+            organization_id=project.organization_id,
+            project_id=project.id,
+        )
+        # The environment feeds and streams see the deletion too.
+        publish_environments_deleted(
+            ProjectEnvironment.objects.filter(project=project),
+            project.organization_id,
+        )
         project.delete()
         return CustomResponse.success(
             data={},
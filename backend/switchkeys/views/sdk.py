@@ -0,0 +1,275 @@
+"""
+This module contains the async views of the read-only SDK endpoints, serve them through `asgi.py`.
+
+Endpoints:
+- `AsyncProjectEnvironmentKeyView`: Retrieves an environment by its key.
+- `AsyncEnvironmentFeaturesView`: Retrieves the environment features.
+- `AsyncEnvironmentUserFeaturesView`: Retrieves user features from an environment.
+- `AsyncEnvironmentUsersFeaturesView`: Retrieves the features of many users in one call.
+
+The payloads are read from the cache and the database with the async APIs, the payloads missing
+from the cache are rendered by the sync serializers in a worker thread.
+"""
+
+from asgiref.sync import sync_to_async
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from switchkeys.api.custom_response import CustomResponse
+from switchkeys.api.fields import FieldSelection
+from switchkeys.api.views import AsyncAPIView
+from switchkeys.serializers.environments import (
+    EnvironmentFeatureSerialize,
+    EvaluateEnvironmentUsersSerializer,
+    UserFeatureSerializers,
+)
+from switchkeys.services.environments import (
+    aget_environment_by_key,
+    aresolve_users_features,
+    get_all_environment_features,
+)
+from switchkeys.services.payloads import (
+    PayloadKind,
+    aget_or_render_payload,
+    get_payload_cache,
+    payload_key,
+)
+from switchkeys.services.rules import aget_compiled_rules
+from switchkeys.services.snapshots import aget_environment_document
+from switchkeys.utils.etags import is_not_modified
+from switchkeys.utils.validators import is_valid_uuid
+
+
+class AsyncProjectEnvironmentKeyView(AsyncAPIView):
+    """
+    API endpoint for retrieving an environment by its key.
+    """
+
+    async def get(self, request: Request, environment_key: str) -> Response:
+        """Get the environment from the payload cache, or from its precomputed snapshot."""
+        if not is_valid_uuid(environment_key):
+            return CustomResponse.bad_request(
+                message=f"{environment_key} is not valid UUID."
+            )
+
+        environment = await aget_environment_by_key(environment_key)
+        if environment is None:
+            return CustomResponse.not_found(
+                message="The project environment does not exist."
+            )
+
+        etag = self.get_etag(request, environment.revision)
+        if is_not_modified(request, etag):
+            return CustomResponse.not_modified(etag)
+
+        response = CustomResponse.success(
+            message="Environment found.",
+            data=await aget_environment_document(
+                environment, FieldSelection.from_request(request)
+            ),
+        )
+        response["ETag"] = etag
+        return response
+
+
+class AsyncEnvironmentFeaturesView(AsyncAPIView):
+    """
+    API endpoint for retrieving the environment features.
+    """
+
+    async def get(self, request: Request, environment_key: str) -> Response:
+        """Get all features exists on the environment"""
+        if not is_valid_uuid(environment_key):
+            return CustomResponse.bad_request(
+                message=f"{environment_key} is not valid UUID."
+            )
+
+        environment = await aget_environment_by_key(environment_key)
+        if environment is None:
+            return CustomResponse.not_found(
+                message="The project environment does not exist."
+            )
+
+        selection = FieldSelection.from_request(request)
+        if not selection.is_default:
+            # Only the whole payload is cached.
+            return CustomResponse.success(
+                message="Environment features found.",
+                data=await sync_to_async(
+                    lambda: EnvironmentFeatureSerialize(
+                        get_all_environment_features(environment),
+                        many=True,
+                        selection=selection,
+                    ).data
+                )(),
+            )
+
+        async def render():
+            # The features are prefetched, the serializer doesn't query.
+            environment_features = [
+                environment_feature
+                async for environment_feature in get_all_environment_features(
+                    environment
+                )
+            ]
+            return EnvironmentFeatureSerialize(environment_features, many=True).data
+
+        return CustomResponse.success(
+            message="Environment features found.",
+            data=await aget_or_render_payload(
+                PayloadKind.FEATURES, environment, render
+            ),
+        )
+
+
+class AsyncEnvironmentUserFeaturesView(AsyncAPIView):
+    """
+    API endpoint for getting user features from an environment.
+    """
+
+    async def get(
+        self, request: Request, environment_key: str, username: str
+    ) -> Response:
+        """
+        Get user features from the specified environment.
+
+        Args:
+            request (Request): HTTP request object.
+            environment_key (str): The key of the environment to get the user features from.
+            username (str): the enviroment user username.
+
+        Returns:
+            Response: Response object containing the result of the operation.
+        """
+        if not is_valid_uuid(environment_key):
+            return CustomResponse.bad_request(
+                message=f"{environment_key} is not a valid UUID."
+            )
+
+        environment = await aget_environment_by_key(environment_key)
+        if environment is None:
+            return CustomResponse.not_found(
+                message="The project environment does not exist."
+            )
+
+        # Nothing changed on the environment since the client last read it.
+        etag = self.get_etag(request, environment.revision)
+        if is_not_modified(request, etag):
+            return CustomResponse.not_modified(etag)
+
+        cache = get_payload_cache()
+        key = payload_key(
+            PayloadKind.USER_FEATURES, environment.id, environment.revision, username
+        )
+
+        # Only the payloads of the environment members are cached.
+        data = await cache.aget(key)
+        if data is None:
+            user_features = (
+                await aresolve_users_features(
+                    environment, [username], await aget_compiled_rules(environment)
+                )
+            ).get(username)
+            if user_features is None:
+                return CustomResponse.not_found(message="User not found.")
+
+            data = UserFeatureSerializers(user_features, many=True).data
+            await cache.aset(key, data)
+
+        response = CustomResponse.success(
+            message="User features found.",
+            data=data,
+        )
+        response["ETag"] = etag
+        return response
+
+
+class AsyncEnvironmentUsersFeaturesView(AsyncAPIView):
+    """
+    API endpoint for getting the features of many users of an environment in one call, for the
+    apps rendering a page for many users at once.
+    """
+
+    async def post(self, request: Request, environment_key: str) -> Response:
+        """
+        Get the effective features of the given users, as `{name: value}` maps.
+
+        Args:
+            request (Request): HTTP request object, holds the `usernames` list.
+            environment_key (str): The key of the environment of the users.
+
+        Returns:
+            Response: Response object with the features of every user by username, and the
+                `missing` usernames not on the environment.
+        """
+        if not is_valid_uuid(environment_key):
+            return CustomResponse.bad_request(
+                message=f"{environment_key} is not a valid UUID."
+            )
+
+        environment = await aget_environment_by_key(environment_key)
+        if environment is None:
+            return CustomResponse.not_found(
+                message="The project environment does not exist."
+            )
+
+        serializer = EvaluateEnvironmentUsersSerializer(data=request.data)
+        if not serializer.is_valid():
+            return CustomResponse.bad_request(
+                message="Please make sure that you entered a valid data.",
+                error=serializer.errors,
+            )
+
+        usernames = list(dict.fromkeys(serializer.validated_data["usernames"]))
+        keys = {
+            username: payload_key(
+                PayloadKind.USER_FEATURES,
+                environment.id,
+                environment.revision,
+                username,
+            )
+            for username in usernames
+        }
+
+        # The payloads are shared with `AsyncEnvironmentUserFeaturesView`, only the users
+        # missing from the cache are read, all together.
+        cache = get_payload_cache()
+        cached = await cache.aget_many(keys.values())
+        payloads = {
+            username: cached[key] for username, key in keys.items() if key in cached
+        }
+
+        resolved = {}
+        if len(payloads) < len(usernames):
+            resolved = await aresolve_users_features(
+                environment,
+                [username for username in usernames if username not in payloads],
+                await aget_compiled_rules(environment),
+            )
+        if resolved:
+            rendered = {
+                username: UserFeatureSerializers(user_features, many=True).data
+                for username, user_features in resolved.items()
+            }
+            await cache.aset_many(
+                {keys[username]: data for username, data in rendered.items()}
+            )
+            payloads.update(rendered)
+
+        return CustomResponse.success(
+            message="User features found.",
+            data={
+                "revision": environment.revision,
+                "users": {
+                    username: {
+                        feature["name"]: feature["value"]
+                        for feature in payloads[username]
+                    }
+                    for username in usernames
+                    if username in payloads
+                },
+                "missing": [
+                    username for username in usernames if username not in payloads
+                ],
+            },
+        )
@@ -0,0 +1,110 @@
+"""
+This module contains the async views streaming the environment changes, serve them through `asgi.py`.
+
+Endpoints:
+- `EnvironmentStreamView`: Pushes the environment changes as Server-Sent Events.
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator
+
+from django.conf import settings
+from django.http import HttpRequest, JsonResponse, StreamingHttpResponse
+from django.views import View
+
+from switchkeys.models.management import ProjectEnvironment
+from switchkeys.services.streams import broadcaster
+from switchkeys.utils.validators import is_valid_uuid
+
+
+class EnvironmentStreamView(View):
+    """
+    API endpoint streaming the changes of an environment as Server-Sent Events.
+
+    Every event id is the environment revision of the change, clients reconnecting with the
+    `Last-Event-ID` header (or the `last_event_id` query param) receive the changes they missed,
+    or a `sync` event asking them to fetch the changes since their revision when the missed
+    events are no longer kept.
+    """
+
+    async def get(self, request: HttpRequest, environment_key: str):
+        """Open the environment stream."""
+        if not is_valid_uuid(environment_key):
+            return JsonResponse(
+                {"message": f"{environment_key} is not a valid UUID."}, status=400
+            )
+
+        try:
+            environment = await ProjectEnvironment.objects.aget(
+                environment_key=environment_key
+            )
+        except ProjectEnvironment.DoesNotExist:
+            return JsonResponse(
+                {"message": "The project environment does not exist."}, status=404
+            )
+
+        last_event_id = request.headers.get(
+            "Last-Event-ID", request.GET.get("last_event_id")
+        )
+        if last_event_id is not None and not str(last_event_id).isdigit():
+            return JsonResponse(
+                {
+                    "message": f"The last event id must be a revision number, got '{last_event_id}'."
+                },
+                status=400,
+            )
+
+        response = StreamingHttpResponse(
+            self.stream(
+                environment,
+                int(last_event_id) if last_event_id is not None else None,
+            ),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(
+        self, environment: ProjectEnvironment, last_event_id: int | None
+    ) -> AsyncIterator[str]:
+        """Yield the environment events until the client disconnects."""
+        environment_key = str(environment.environment_key)
+        subscriber = broadcaster.subscribe(environment_key)
+        _, queue = subscriber
+
+        try:
+            yield f"retry: {settings.SWITCHKEYS_STREAM_HEARTBEAT * 1000}\n\n"
+
+            if last_event_id is not None and last_event_id < environment.revision:
+                complete, events = broadcaster.events_after(
+                    environment_key, last_event_id
+                )
+                if not complete:
+                    payload = {"since": last_event_id, "revision": environment.revision}
+                    yield f"id: {environment.revision}\nevent: sync\ndata: {json.dumps(payload)}\n\n"
+                    last_event_id = environment.revision
+                for event in events:
+                    if event.id > last_event_id:
+                        last_event_id = event.id
+                        yield event.encode()
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=settings.SWITCHKEYS_STREAM_HEARTBEAT
+                    )
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+
+                # Skip the events already replayed from the backlog.
+                if last_event_id is not None and event.id <= last_event_id:
+                    continue
+
+                yield event.encode()
+                if event.event == "environment.deleted":
+                    break
+        finally:
+            broadcaster.unsubscribe(environment_key, subscriber)
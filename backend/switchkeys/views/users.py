@@ -5,6 +5,7 @@ from switchkeys.api.permissions import (
     IsAdminUser,
 )
 from switchkeys.api.custom_response import CustomResponse
+from switchkeys.api.pagination import SwitchKeysCursorPagination
 from switchkeys.serializers.users import OrganizationUserSerializer
 from switchkeys.services.users import get_user_by_email, get_user_by_id, get_all_users
 
@@ -12,6 +13,8 @@ from switchkeys.services.users import get_user_by_email, get_user_by_id, get_all
 class BaseGeneralUserAPIView(ListAPIView, GenericAPIView):
     permission_classes = []
     serializer_class = OrganizationUserSerializer
+    # The largest list, paged by keyset ranges instead of an OFFSET scan, newest first.
+    pagination_class = SwitchKeysCursorPagination
 
     def get_permissions(self):
         if self.request.method != "GET":
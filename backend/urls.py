@@ -17,6 +17,7 @@ urlpatterns = [
                 path("projects/", include("switchkeys.urls.projects")),
                 path("groups/", include("switchkeys.urls.groups")),
                 path("environments/", include("switchkeys.urls.environments")),
+                path("changes/", include("switchkeys.urls.changes")),
             ]
         ),
     ),
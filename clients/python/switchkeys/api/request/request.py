@@ -1,5 +1,6 @@
 import json
 from typing import Any, Dict
+import msgpack
 import requests
 from switchkeys.api.response.response import SwitchKeysResponse
 from enum import Enum
@@ -12,6 +13,10 @@ class SwitchKeysRequestMethod(Enum):
     DELETE = "DELETE"
 
 
+# Ask for the compact MessagePack encoding, servers without it answer with JSON.
+ACCEPT_HEADER = "application/msgpack, application/json;q=0.9"
+
+
 class SwitchKeysRequest:
     """
     Make an HTTP request to the specified URL using the provided method.
@@ -36,12 +41,12 @@ class SwitchKeysRequest:
         token: str | None = None,
     ) -> SwitchKeysResponse:
         try:
-            headers = {}
+            headers = {"Accept": ACCEPT_HEADER}
             if token:
                 headers["Authorization"] = f"Bearer {token}"
 
             if method == SwitchKeysRequestMethod.GET:
-                response = requests.get(url)
+                response = requests.get(url, headers=headers)
             elif method == SwitchKeysRequestMethod.POST:
                 response = requests.post(url, json=data, headers=headers)
             elif method == SwitchKeysRequestMethod.PUT:
@@ -51,6 +56,13 @@ class SwitchKeysRequest:
             else:
                 raise ValueError("Invalid method provided.")
 
+            # The MessagePack responses are decoded as they are, without the text checks.
+            content_type = response.headers.get("Content-Type", "")
+            if response.content and content_type.startswith("application/msgpack"):
+                return SwitchKeysRequest.parse_response(
+                    response.status_code, msgpack.unpackb(response.content)
+                )
+
             response_content = response.content.decode()
 
             # Check if response content is not valid JSON.
@@ -68,32 +80,9 @@ class SwitchKeysRequest:
                     error_message="Empty response content",
                 )
 
-            response_content = json.loads(response_content)
-
-            if response.status_code >= 200 and response.status_code < 400:
-                return SwitchKeysResponse(
-                    status_code=response.status_code,
-                    message=response_content.get("message"),
-                    data=response_content.get("results"),
-                )
-            elif response.status_code >= 400:
-                if response_content.get("detail") is None:
-                    error_message = response_content.get("message")
-                else:
-                    error_message = response_content.get("detail")
-
-                error = response_content.get("error")
-
-                return SwitchKeysResponse(
-                    status_code=response.status_code,
-                    error_message=error_message,
-                    error=error
-                )
-            else:
-                return SwitchKeysResponse(
-                    status_code=response.status_code,
-                    error_message=response_content.get("detail"),
-                )
+            return SwitchKeysRequest.parse_response(
+                response.status_code, json.loads(response_content)
+            )
         except requests.exceptions.RequestException as e:
             return SwitchKeysResponse(
                 status_code=500,
@@ -101,3 +90,42 @@ class SwitchKeysRequest:
                 data=None,
                 message=str(e),
             )
+
+    @staticmethod
+    def parse_response(
+        status_code: int, response_content: Dict[str, Any]
+    ) -> SwitchKeysResponse:
+        """
+        Build the SwitchKeysResponse of a decoded response body, JSON or MessagePack.
+
+        Args:
+            status_code (int): The HTTP status code of the response.
+            response_content (Dict[str, Any]): The decoded response body.
+
+        Returns:
+            SwitchKeysResponse: An object containing the response from the request.
+        """
+        if status_code >= 200 and status_code < 400:
+            return SwitchKeysResponse(
+                status_code=status_code,
+                message=response_content.get("message"),
+                data=response_content.get("results"),
+            )
+        elif status_code >= 400:
+            if response_content.get("detail") is None:
+                error_message = response_content.get("message")
+            else:
+                error_message = response_content.get("detail")
+
+            error = response_content.get("error")
+
+            return SwitchKeysResponse(
+                status_code=status_code,
+                error_message=error_message,
+                error=error
+            )
+        else:
+            return SwitchKeysResponse(
+                status_code=status_code,
+                error_message=response_content.get("detail"),
+            )
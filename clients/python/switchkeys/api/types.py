@@ -3,6 +3,12 @@ from uuid import UUID
 
 from switchkeys.api.request.request import SwitchKeysRequest, SwitchKeysRequestMethod
 from switchkeys.api.routes import EndPoints, SwitchKeysRoutes
+from switchkeys.utils.bitmaps import decode_segments
+from switchkeys.utils.rollouts import get_rollout_value
+from switchkeys.utils.rules import CompiledRules
+
+# The values of the disabled features, as sent by the API.
+FALSE_VALUES = ("false", "0", "")
 
 
 class SwitchKeysFeatureType:
@@ -11,6 +17,10 @@ class SwitchKeysFeatureType:
 
     Attributes:
         __features (Dict[str, Any]): A dictionary containing the user's features.
+        revision (int): The environment revision the features are synced to.
+        device (SwitchKeysDeviceType | None): The device of the user, the targeting rules are evaluated on it.
+        rules (CompiledRules | None): The compiled targeting rules of the environment.
+        ordinal (int | None): The ordinal of the user in the segments bitmaps, if the user is in a segment.
 
     Methods:
         has(feature: str) -> bool: Check if the user has the feature.
@@ -18,21 +28,44 @@ class SwitchKeysFeatureType:
         create(feature: str, value: str) -> None: Create a new feature with a value.
         is_enabled(feature: str) -> bool: Check if a feature is enabled.
         value_of(key: str) -> Any: Retrieve the value of the specified feature key.
+        apply_changes(changes: Dict[str, Any]) -> None: Patch the features with the environment changes.
+        sync() -> None: Fetch and apply the environment changes since the current revision.
     """
 
-    def __init__(self, features: Dict[str, Any], environment_key: UUID, user_id: int):
+    def __init__(
+        self,
+        features: Dict[str, Any],
+        environment_key: UUID,
+        user_id: int,
+        username: str | None = None,
+        revision: int = 0,
+        device: "SwitchKeysDeviceType | None" = None,
+        rules: CompiledRules | None = None,
+        ordinal: int | None = None,
+    ):
         """
         Initialize the SwitchKeysFeatureType object.
 
         Args:
             features (Dict[str, Any]): A dictionary containing the user's features.
             environment_key (UUID): The environment key to load the environment.
+            user_id (int): The ID of the user who owns the features.
+            username (str | None): The username of the user who owns the features, required to sync the features.
+            revision (int): The environment revision the features are loaded from.
+            device (SwitchKeysDeviceType | None): The device of the user.
+            rules (CompiledRules | None): The compiled targeting rules of the environment.
+            ordinal (int | None): The ordinal of the user in the segments bitmaps.
         """
 
         self.__features = features
         self.environment_key = environment_key
         self.__routes = SwitchKeysRoutes()
         self.user_id = user_id
+        self.username = username
+        self.revision = revision
+        self.device = device
+        self.rules = rules
+        self.ordinal = ordinal
 
     def has(self, feature: str) -> bool:
         """Check if a feature is enabled."""
@@ -77,14 +110,20 @@ class SwitchKeysFeatureType:
             print("Failed to set feature:", response.get_error_message())
 
     def is_enabled(self, feature: str) -> bool:
-        """Check if a feature is enabled."""
-        if feature in self.__features:
-            return bool(self.__features[feature].get("is_enabled"))
-        raise KeyError(f"'{feature}' does not exist in the user features.")
+        """
+        Check if a feature is enabled, i.e. its value for the user is not a false value.
+
+        Raises:
+            KeyError: If the specified feature does not exist in the user's features.
+        """
+        return str(self.value_of(feature)).lower() not in FALSE_VALUES
 
     def value_of(self, feature: str) -> Any:
         """
-        Retrieve the value of the specified feature key.
+        Retrieve the value of the specified feature key, as resolved by the API. The targeting rules matching
+        the user device and segments give their value, and the users out of the feature rollout get its initial
+        value. Both are evaluated locally on the rules, the same way the API does, the user overrides keep their
+        own value.
 
         Args:
             key (str): The key of the feature whose value needs to be retrieved.
@@ -95,19 +134,99 @@ class SwitchKeysFeatureType:
         Raises:
             KeyError: If the specified feature does not exist in the user's features.
         """
-        if feature in self.__features:
-            return self.__features[feature].get("value")
-        raise KeyError(f"'{feature}' does not exist in the user features.")
+        if feature not in self.__features:
+            raise KeyError(f"'{feature}' does not exist in the user features.")
+
+        value = self.__features[feature].get("value")
+        if self.__features[feature].get("is_override"):
+            return value
+
+        if self.rules and self.device is not None:
+            values = self.rules.evaluate(self.device.device_type, self.device.version, self.ordinal)
+            # The served value already went through the rollout, only a rule value still has to.
+            if feature in values:
+                value = get_rollout_value(self.__features[feature], self.username, values[feature])
+        return value
+
+    def apply_changes(self, changes: Dict[str, Any]) -> None:
+        """
+        Patch the local features with the changes returned by the environment changes endpoint,
+        instead of reloading all the features. The changes since the revision 0 replace them.
+
+        Args:
+            changes (Dict[str, Any]): The environment changes, with the `revision`, `rules`, `segments`, `users` and `deleted` keys.
+
+        Example:
+            ``feature_type.apply_changes({"revision": 5, "users": {"mahmoud": [{"name": "debug", "value": "true"}]}, "deleted": {}})``
+        """
+        deleted = changes.get("deleted") or {}
+
+        # The changes since the revision 0 hold all the features, without the older deletions.
+        if changes.get("since") == 0:
+            self.__features.clear()
+
+        # Apply the deletions first, a feature can be deleted then created again with the same name.
+        for feature in deleted.get("features", []):
+            self.__features.pop(feature, None)
+
+        if self.username in deleted.get("users", []):
+            self.__features.clear()
+
+        for feature in deleted.get("user_features", {}).get(self.username, []):
+            self.__features.pop(feature, None)
+
+        for feature in (changes.get("users") or {}).get(self.username, []):
+            self.__features[feature.get("name")] = feature
+
+        # The rules are always sent whole, with the members of their segments.
+        if changes.get("rules") is not None:
+            self.rules = CompiledRules(changes["rules"], decode_segments(changes.get("segments")))
+
+        self.revision = changes.get("revision", self.revision)
+
+    def sync(self) -> None:
+        """
+        Fetch the environment changes since the current revision and apply them, or all the features
+        when the API answers that a full sync is required.
+
+        Raises:
+            ValueError: If the features are not bound to a username.
+        """
+        if not self.username:
+            raise ValueError("Features can't be synced without a username.")
+
+        response = SwitchKeysRequest.call(
+            self.__routes.get_route(EndPoints.ENVIRONMENTS_CHANGES, self.environment_key, self.revision, self.username),
+            SwitchKeysRequestMethod.GET,
+        )
+
+        # The deletions since the current revision were pruned, fetch all the features again.
+        if response.get_status_code() == 410:
+            self.__features.clear()
+            self.revision = 0
+            response = SwitchKeysRequest.call(
+                self.__routes.get_route(EndPoints.ENVIRONMENTS_CHANGES, self.environment_key, 0, self.username),
+                SwitchKeysRequestMethod.GET,
+            )
+
+        if response.get_status_code() == 200:
+            self.apply_changes(response.get_data())
+        else:
+            print("Failed to sync features:", response.get_error_message())
 
 
 class SwitchKeysDeviceType:
     """
     Represents a Type object for device information.
-    It's not serialized yet.
+
+    Attributes:
+        device_type (str | None): The device type, e.g. `android` or `iphone`.
+        version (str | None): The device version, e.g. `5.2`.
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, device_type: str | None = None, version: str | None = None):
+        self.device_type = device_type
+        self.version = version
 
 
 class SwitchKeysProjectUserType:
@@ -120,6 +239,8 @@ class SwitchKeysProjectUserType:
         device (SwitchKeysDeviceType): The device information of the user.
         features (SwitchKeysFeatureType): The features associated with the user.
         environment_key (uuid): The key of the environment, to access the API.
+        rules (CompiledRules | None): The compiled targeting rules of the environment, shared by its users.
+        ordinal (int | None): The ordinal of the user in the segments bitmaps, if the user is in a segment.
     Methods:
         N/A
     """
@@ -131,12 +252,20 @@ class SwitchKeysProjectUserType:
         device: SwitchKeysDeviceType,
         features: Dict[str, Any],
         environment_key: UUID,
+        rules: CompiledRules | None = None,
+        ordinal: int | None = None,
     ):
         self.id = id
         self.username = username
         self.device = device
         self.features = SwitchKeysFeatureType(
-            features=features, environment_key=environment_key, user_id=self.id
+            features=features,
+            environment_key=environment_key,
+            user_id=self.id,
+            username=self.username,
+            device=self.device,
+            rules=rules,
+            ordinal=ordinal,
         )
 
 
@@ -0,0 +1,39 @@
+"""
+Check the segments membership locally, without calling the API.
+
+The members of a segment are served as a base64 encoded bitmap of their user ordinals, the bit of
+the ordinal `n` is the bit `n % 8` of the byte `n // 8`. It must stay the same as the backend's
+`switchkeys/utils/bitmaps.py`.
+"""
+
+import base64
+from typing import Dict
+
+
+class Bitmap:
+    """
+    A set of user ordinals, one bit per ordinal, checking an ordinal is a single bit test.
+
+    Example:
+        ``10 in Bitmap.decode("AAQ=")  # => True``
+    """
+
+    def __init__(self, data: bytes = b""):
+        self.__data = bytes(data)
+
+    @classmethod
+    def decode(cls, value: str) -> "Bitmap":
+        """Load a bitmap from its base64 encoded bytes."""
+        return cls(base64.b64decode(value))
+
+    def __contains__(self, ordinal: int) -> bool:
+        index = ordinal >> 3
+        return index < len(self.__data) and bool(self.__data[index] >> (ordinal & 7) & 1)
+
+    def __len__(self) -> int:
+        return int.from_bytes(self.__data, "little").bit_count()
+
+
+def decode_segments(segments: Dict[str, str] | None) -> Dict[int, Bitmap]:
+    """Decode the segments served by the API, the members bitmaps by group id."""
+    return {int(group): Bitmap.decode(members) for group, members in (segments or {}).items()}
@@ -6,6 +6,13 @@ from switchkeys.api.response.types import (
     SwitchKeysProjectResponse,
     SwitchKeysUserResponse,
 )
+from switchkeys.api.types import (
+    SwitchKeysDeviceType,
+    SwitchKeysEnvironmentType,
+    SwitchKeysProjectUserType,
+)
+from switchkeys.utils.bitmaps import decode_segments
+from switchkeys.utils.rules import CompiledRules
 
 
 def parse_user(
@@ -113,3 +120,65 @@ def parse_auth(auth_data: Dict[str, Any]) -> SwitchKeysAuthResponse:
         access_token=auth_data.get("access_token"),
         refresh_token=auth_data.get("refresh_token"),
     )
+
+
+def parse_device(device_data: Dict[str, Any] | None) -> SwitchKeysDeviceType | None:
+    """
+    Parse device data.
+
+    Args:
+        device_data (Dict[str, Any] | None): Device data to be parsed.
+
+    Returns:
+        SwitchKeysDeviceType | None: Parsed device object, None if the user has no device.
+    """
+
+    if not device_data:
+        return None
+
+    return SwitchKeysDeviceType(
+        device_type=device_data.get("device_type"),
+        version=device_data.get("version"),
+    )
+
+
+def parse_environment(environment_data: Dict[str, Any]) -> SwitchKeysEnvironmentType:
+    """
+    Parse environment data, the users get their device, their ordinal and the targeting rules
+    of the environment, compiled once and shared by them, to evaluate the rules locally.
+
+    Args:
+        environment_data (Dict[str, Any]): Environment data to be parsed.
+
+    Returns:
+        SwitchKeysEnvironmentType: Parsed environment object.
+    """
+
+    environment_key = environment_data.get("environment_key")
+    rules = CompiledRules(
+        environment_data.get("rules") or [],
+        decode_segments(environment_data.get("segments")),
+    )
+
+    return SwitchKeysEnvironmentType(
+        id=environment_data.get("id"),
+        name=environment_data.get("name"),
+        environment_key=environment_key,
+        created=environment_data.get("created"),
+        modified=environment_data.get("modified"),
+        users=[
+            SwitchKeysProjectUserType(
+                id=user.get("id"),
+                username=user.get("username"),
+                device=parse_device(user.get("device")),
+                features={
+                    feature.get("name"): feature
+                    for feature in user.get("features") or []
+                },
+                environment_key=environment_key,
+                rules=rules,
+                ordinal=user.get("ordinal"),
+            )
+            for user in environment_data.get("users") or []
+        ],
+    )
@@ -0,0 +1,48 @@
+"""
+Evaluate the percentage rollouts of the features locally, without calling the API.
+
+A user is in the rollout of a feature when its bucket, a stable hash of the feature name and the
+username, is below the rollout percentage. It must stay the same as the backend's
+`switchkeys/utils/rollouts.py`, so both evaluate a rollout to the same users.
+"""
+
+import hashlib
+from typing import Any, Dict
+
+# A rollout percentage covers `percentage * ROLLOUT_BUCKETS / 100` buckets.
+ROLLOUT_BUCKETS = 10_000
+
+
+def rollout_bucket(feature_name: str, username: str) -> int:
+    """
+    Return the bucket of a user in the rollouts of a feature, from 0 to `ROLLOUT_BUCKETS - 1`.
+
+    Example:
+        ``rollout_bucket("debug", "mahmoud")  # => 729``
+    """
+    digest = hashlib.sha256(f"{feature_name}:{username}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") % ROLLOUT_BUCKETS
+
+
+def is_in_rollout(feature_name: str, username: str, percentage: int | None) -> bool:
+    """Check if a user is in the rollout of a feature, every user is when there's no rollout."""
+    if percentage is None:
+        return True
+
+    return rollout_bucket(feature_name, username) < percentage * ROLLOUT_BUCKETS // 100
+
+
+def get_rollout_value(feature: Dict[str, Any], username: str | None, value: Any) -> Any:
+    """
+    Return the value of a feature for a user, the user value when the user is in the feature
+    rollout, else the feature initial value. The value is returned as it is without a username.
+
+    Args:
+        feature (Dict[str, Any]): The feature, with its `name`, `initial_value` and `rollout_percentage`.
+        username (str | None): The username of the user.
+        value (Any): The value of the feature for the user.
+    """
+    if username is None or is_in_rollout(feature.get("name"), username, feature.get("rollout_percentage")):
+        return value
+
+    return feature.get("initial_value")
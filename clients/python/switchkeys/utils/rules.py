@@ -0,0 +1,130 @@
+"""
+Evaluate the feature targeting rules locally, without calling the API.
+
+The rules served with the environment are compiled into a decision table keyed by device, holding
+the value of every targeted feature, so the users of a device share a single evaluation, plus a bit
+test in the segment bitmaps for the rules targeting a segment. It must stay the same as the
+backend's `switchkeys/utils/rules.py`, so both give the same values.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from switchkeys.utils.bitmaps import Bitmap
+
+Version = Tuple[int, ...]
+# The `(feature name, device type, min version, max version, segment, value)` of a compiled rule.
+CompiledRule = Tuple[str, str, Optional[Version], Optional[Version], Optional[int], str]
+# The values of a device, and the `(feature name, [(segment members, value)], value)` of the
+# features targeted by segments, with the value of the users out of the segments.
+Decision = Tuple[Dict[str, str], List[Tuple[str, List[Tuple[Bitmap, str]], Optional[str]]]]
+
+
+def parse_version(version: str | None) -> Version | None:
+    """
+    Parse a dotted version into comparable numbers, the trailing zeros are dropped so `5.2` and
+    `5.2.0` are the same version. A part without leading digits counts as `0`.
+
+    Example:
+        ``parse_version("5.2.0-beta")  # => (5, 2)``
+    """
+    if not version:
+        return None
+
+    numbers = [int(re.match(r"\d*", part).group() or 0) for part in version.strip().split(".")]
+    while numbers and numbers[-1] == 0:
+        numbers.pop()
+    return tuple(numbers)
+
+
+class CompiledRules:
+    """
+    The targeting rules of an environment, compiled into a decision table by device.
+
+    A rule matches the users of its device type (case insensitive), any when empty, with a device
+    version from its `min_version` (inclusive) to its `max_version` (exclusive), any when empty,
+    and the members of its segment, any user when empty. The first matching rule of a feature
+    gives its value.
+
+    Attributes:
+        rules (List[Dict[str, Any]]): The rules served by the API, ordered by priority.
+        segments (Dict[int, Bitmap]): The members of the segments targeted by the rules, by group id.
+
+    Methods:
+        evaluate(device_type: str | None, version: str | None, ordinal: int | None) -> Dict[str, str]: Get the value of every targeted feature for a device and a user.
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]], segments: Dict[int, Bitmap] | None = None):
+        self.rules = list(rules)
+        self.segments = segments or {}
+        self.__rules: List[CompiledRule] = [
+            (
+                rule["feature"],
+                (rule["device_type"] or "").lower(),
+                parse_version(rule["min_version"]),
+                parse_version(rule["max_version"]),
+                rule.get("segment"),
+                rule["value"],
+            )
+            for rule in self.rules
+        ]
+
+        # (device type, version) -> its decision, filled by the first user of a device.
+        self.__decisions: Dict[Tuple[str, Optional[str]], Decision] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.__rules)
+
+    def evaluate(self, device_type: str | None, version: str | None, ordinal: int | None = None) -> Dict[str, str]:
+        """
+        Return the value of every feature targeted by the rules for a device, and a user ordinal
+        when the rules target segments.
+        """
+        key = ((device_type or "").lower(), version)
+        decision = self.__decisions.get(key)
+        if decision is None:
+            decision = self.__decide(*key)
+            self.__decisions[key] = decision
+
+        values, segmented = decision
+        if not segmented:
+            return values
+
+        values = dict(values)
+        for feature, segments, value in segmented:
+            for members, segment_value in segments:
+                if ordinal is not None and ordinal in members:
+                    values[feature] = segment_value
+                    break
+            else:
+                if value is not None:
+                    values[feature] = value
+        return values
+
+    def __decide(self, device_type: str, version: str | None) -> Decision:
+        parsed = parse_version(version)
+        values: Dict[str, str] = {}
+        segmented: Dict[str, List[Any]] = {}
+        for feature, rule_device_type, min_version, max_version, segment, value in self.__rules:
+            if feature in values:
+                continue
+            if rule_device_type and rule_device_type != device_type:
+                continue
+            if min_version is not None and (parsed is None or parsed < min_version):
+                continue
+            if max_version is not None and (parsed is None or parsed >= max_version):
+                continue
+
+            if segment is not None:
+                members = self.segments.get(segment, Bitmap())
+                segmented.setdefault(feature, [[], None])[0].append((members, value))
+            elif feature in segmented:
+                # The users out of the segments of the feature.
+                segmented[feature][1] = value
+                values[feature] = value
+            else:
+                values[feature] = value
+
+        for feature in segmented:
+            values.pop(feature, None)
+        return values, [(feature, segments, value) for feature, (segments, value) in segmented.items()]
@@ -19,6 +19,8 @@ run_django_commands() {
     poetry run python3 manage.py makemigrations
     echo "Running the migrate"
     poetry run python3 manage.py migrate
+    echo "Creating the cache table"
+    poetry run python3 manage.py createcachetable
 }
 
 # Function to create superuser if not exists